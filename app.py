@@ -1,16 +1,26 @@
+import csv
+import json
 import logging.config
-from typing import Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
+import click
 import sqlite3
 import sqlalchemy.exc
-from flask import Flask, jsonify, render_template, request, Response
+from flask import Flask, jsonify, render_template, request, Response, stream_with_context
 from werkzeug.exceptions import BadRequestKeyError
 
 # For setting up the Flask-SQLAlchemy database session
-from src.database.create_db import Cars  # type: ignore
 from src.database.add_cars import CarManager  # type: ignore
+from src.flaskapp.assigner import ClusterAssigner  # type: ignore
+from src.flaskapp.cache_backends import MemoryCache, SQLiteCache  # type: ignore
+from src.flaskapp.catalog import Catalog  # type: ignore
 from src.flaskapp.flask_models import Form  # type: ignore
-from src.flaskapp.recommend import validate_input, get_recommendation  # type: ignore
+from src.flaskapp.http_cache import cache_by_etag, get_etag  # type: ignore
+from src.flaskapp.neighbors import FeatureNeighbors  # type: ignore
+from src.flaskapp.page_cache import PageCache  # type: ignore
+from src.flaskapp.recommend import (  # type: ignore
+    RecommendationIndex, validate_input, get_recommendation, get_cluster_recommendation,
+    get_batch_recommendation, car_to_dict)
 
 # Initialize the Flask application
 app = Flask(__name__,
@@ -35,6 +45,87 @@ logger.debug(
 # Initialize the database session
 car_manager = CarManager(app)
 
+# Share the in-memory indexes and rendered pages between workers, if configured
+if app.config['SHARED_CACHE_PATH']:
+    shared_cache = SQLiteCache(app.config['SHARED_CACHE_PATH'],
+                               max_entries=app.config['SHARED_CACHE_MAX_ENTRIES'],
+                               ttl_seconds=app.config['CACHE_TTL_SECONDS'])
+else:
+    shared_cache = None
+
+# Keep the maker -> model -> year -> body type tree and the per-cluster recommendation
+# lists in memory. Both are rebuilt whenever `run_db.py ingest` loads new data.
+catalog = Catalog(car_manager, refresh_seconds=app.config['CATALOG_REFRESH_SECONDS'],
+                  store=shared_cache)
+recommendation_index = RecommendationIndex(
+    car_manager, refresh_seconds=app.config['CATALOG_REFRESH_SECONDS'], store=shared_cache)
+try:
+    catalog.get()
+    recommendation_index.get()
+except sqlalchemy.exc.SQLAlchemyError as err_sql:
+    logger.error('Not able to load the car data at startup. '
+                 'Will retry on the first request. Error: %s', err_sql)
+
+# Load the feature matrix if recommendations are ranked by nearest neighbours
+if app.config['RECOMMENDER'] == 'neighbors':
+    neighbors = FeatureNeighbors(feature_path=app.config['FEATURE_PATH'],
+                                 labels_path=app.config['LABELS_PATH'])
+else:
+    neighbors = None
+
+# Load the featurizer and clustering model to assign new cars to clusters
+try:
+    assigner = ClusterAssigner(model_path=app.config['MODEL_PATH'],
+                               featurizer_path=app.config['FEATURIZER_PATH'])
+except (FileNotFoundError, ValueError) as err_load:
+    logger.error('Not able to load the featurizer and clustering model. '
+                 '/api/assign is disabled. Error: %s', err_load)
+    assigner = None
+
+# Keep the rendered result pages
+page_cache = PageCache(local=MemoryCache(max_entries=app.config['PAGE_CACHE_MAX_ENTRIES'],
+                                         ttl_seconds=app.config['CACHE_TTL_SECONDS']),
+                       shared=shared_cache)
+
+
+def get_catalog_etag() -> Optional[str]:
+    """Get the ETag of the dropdown lists, which only change with the data version.
+
+    Returns:
+        Optional[str]: The ETag. None if the data version is not known.
+    """
+    return get_etag(catalog)
+
+
+def get_catalog_json_etag() -> Optional[str]:
+    """Get the ETag of the whole catalog tree, which differs between its gzipped
+    and plain representation.
+
+    Returns:
+        Optional[str]: The ETag. None if the data version is not known.
+    """
+    return get_etag(catalog, accepts_gzip())
+
+
+def accepts_gzip() -> bool:
+    """Check whether the client accepts gzipped responses.
+
+    Returns:
+        bool: True if the request's `Accept-Encoding` allows gzip.
+    """
+    return request.accept_encodings['gzip'] > 0
+
+
+def get_recommendation_etag() -> Optional[str]:
+    """Get the ETag of the recommendation pages, which change with the data version
+    and the recommender settings.
+
+    Returns:
+        Optional[str]: The ETag. None if the data version is not known.
+    """
+    return get_etag(recommendation_index, app.config['MAX_ROWS_SHOW'],
+                    app.config['RECOMMENDER'], app.config['NEIGHBORS_SAME_CLUSTER'])
+
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
@@ -55,11 +146,7 @@ def index():
         form_user_input = Form()
 
         # get a list of all makers in the data base
-        maker_list = [(makers[0], makers[0]) for makers in (car_manager.session
-                                                            .query(Cars.maker)
-                                                            .distinct()
-                                                            .order_by(Cars.maker)
-                                                            .all())]
+        maker_list = [(maker, maker) for maker in catalog.makers()]
         logger.debug('Retrieved maker list: %s', maker_list)
 
         # set makers as choices in the dropdown list
@@ -74,33 +161,35 @@ def index():
             'Error page returned. Not able to query local sqlite database: %s.'
             ' Error: %s ',
             app.config['SQLALCHEMY_DATABASE_URI'], err_or)
-        return render_template('error.html')
+        return render_template('error.html'), 500
     except sqlalchemy.exc.OperationalError as err_or:
         logger.error(
             'Error page returned. Not able to query MySQL database: %s. '
             'Error: %s ',
             app.config['SQLALCHEMY_DATABASE_URI'], err_or)
-        return render_template('error.html')
+        return render_template('error.html'), 500
 
 
-@app.route('/recommend', methods=['POST'])
-def get_recommendations() -> str:
+@app.route('/recommend', methods=['GET', 'POST'])
+@cache_by_etag(get_recommendation_etag, app.config['HTTP_CACHE_MAX_AGE'])
+def get_recommendations() -> Union[str, Tuple[str, int]]:
     """Make recommendation using the information submitted by the user.
-    Take the form posted by the index page. Validate input and get recommendations
-    from database.
+    Take the form submitted by the index page. Validate input and get recommendations
+    from database. GET requests are cacheable.
 
     Returns:
-        str: The rendered index page.
+        Union[str, Tuple[str, int]]: The rendered result page, or an error page with
+            its status code.
     """
     logger.info('Getting recommendations for user...')
-    logger.debug('Form received: \n%s', request.form)
+    logger.debug('Form received: \n%s', request.values)
 
     try:
         # retrieve variables from user submission
-        maker = request.form['maker']
-        model = request.form['model']
-        year_str = request.form['year']
-        bodytype = request.form['bodytype']
+        maker = request.values['maker']
+        model = request.values['model']
+        year_str = request.values['year']
+        bodytype = request.values['bodytype']
         logger.info(
             'User input received.'
             ' \nMaker: %s \nModel: %s \nYear %s \nBodyType: %s',
@@ -112,46 +201,299 @@ def get_recommendations() -> str:
 
         # convert year to int if valid
         year = int(year_str)
-
-        # get recommendations
-        input_specs = {'maker': maker, 'model': model,
-                       'year': year, 'bodytype': bodytype}
-        car_recommendations, dream_car = get_recommendation(
-            car_manager=car_manager,
-            max_rows=app.config['MAX_ROWS_SHOW'],
-            **input_specs
-        )
-        logger.info('Recommendations list retrieved. %s', car_recommendations)
-        logger.info('Dream car retrieved. %s', dream_car)
-
-        # render result page
-        return render_template(
-            'result.html',
-            cars=car_recommendations,
-            dream_car=dream_car
-        )
     except (BadRequestKeyError, ValueError) as missing_input:
         logger.error('Some values are missing from the form.'
                      'Must input all four required attributes:'
                      ' maker, model, year, and body type. '
                      'Message: %s', missing_input)
-        return render_template('error_form.html', error_message=missing_input)
+        return render_template('error_form.html', error_message=missing_input), 400
+
+    try:
+        # get recommendations and render result page
+        return render_recommendation(maker, model, year, bodytype)
+    except ValueError as err_not_found:
+        logger.warning('Dream car not found. Message: %s', err_not_found)
+        return render_template('error_form.html', error_message=err_not_found), 404
     except sqlite3.OperationalError as err_or:
         logger.error(
             'Error page returned. Not able to query local sqlite database: %s.'
             ' Error: %s ',
             app.config['SQLALCHEMY_DATABASE_URI'], err_or)
-        return render_template('error.html')
+        return render_template('error.html'), 500
     except sqlalchemy.exc.OperationalError as err_or:
         logger.error(
             'Error page returned. Not able to query MySQL database: %s. '
             'Error: %s ',
             app.config['SQLALCHEMY_DATABASE_URI'], err_or)
-        return render_template('error.html')
+        return render_template('error.html'), 500
+
+
+def render_recommendation(maker: str, model: str, year: int, bodytype: str) -> str:
+    """Render the result page of a dream car. Pages are served from the page cache,
+    keyed by the dream car and the ETag of the recommendation pages (the data
+    version, `MAX_ROWS_SHOW` and the recommender settings).
+
+    Args:
+        maker (str): Manufacturer of the car.
+        model (str): Specific model of the car.
+        year (int): Year of production.
+        bodytype (str): Body type of the car.
+
+    Raises:
+        ValueError: The dream car is not in the database.
+
+    Returns:
+        str: The rendered result page.
+    """
+    version = get_recommendation_etag()
+    key = [maker, model, year, bodytype]
+    if version is not None:
+        page = page_cache.get(version, key)
+        if page is not None:
+            logger.info('Result page served from the page cache.')
+            return page
+
+    car_recommendations, dream_car = get_recommendation(
+        car_manager=car_manager,
+        maker=maker,
+        model=model,
+        year=year,
+        bodytype=bodytype,
+        max_rows=app.config['MAX_ROWS_SHOW'],
+        index=recommendation_index,
+        neighbors=neighbors,
+        same_cluster=app.config['NEIGHBORS_SAME_CLUSTER']
+    )
+    logger.info('Recommendations list retrieved. %s', car_recommendations)
+    logger.info('Dream car retrieved. %s', dream_car)
+
+    page = render_template(
+        'result.html',
+        cars=car_recommendations,
+        dream_car=dream_car
+    )
+    if version is not None:
+        page_cache.set(version, key, page)
+    return page
+
+
+@app.route('/api/page-cache')
+def get_page_cache_stats() -> Response:
+    """Report the hit and miss counters of this worker's page cache.
+
+    Returns:
+        flask.Response: `{"hits": ..., "misses": ..., "entries": ...}`.
+    """
+    return jsonify(page_cache.stats())
+
+
+@app.cli.command('warm-page-cache')
+@click.option('--keys', 'keys_path', required=True,
+              help='Csv of dream cars with the columns maker, model, year, bodytype, '
+                   'and optionally count (e.g. the number of requests).')
+@click.option('--top', default=1000, show_default=True,
+              help='Number of dream cars to pre-render, by decreasing count.')
+def warm_page_cache(keys_path: str, top: int) -> None:
+    """Pre-render the result pages of the most popular dream cars, e.g. at deploy
+    time. Only useful with `SHARED_CACHE_PATH`, where the app's workers find them.
+    """
+    if page_cache.shared is None:
+        logger.warning('SHARED_CACHE_PATH is not set, pre-rendered pages are lost '
+                       'when this command exits.')
+    elif isinstance(page_cache.shared, SQLiteCache):
+        # delete expired and surplus entries up front, outside of any request
+        page_cache.shared.evict()
+
+    with open(keys_path, 'r', encoding='utf-8', newline='') as file:
+        keys = list(csv.DictReader(file))
+    if keys and 'count' in keys[0]:
+        keys.sort(key=lambda row: float(row['count']), reverse=True)
+    keys = keys[:top]
+
+    n_rendered = 0
+    with app.test_request_context():
+        for row in keys:
+            try:
+                render_recommendation(row['maker'], row['model'], int(row['year']),
+                                      row['bodytype'])
+                n_rendered += 1
+            except ValueError as err_value:
+                logger.warning('Not able to render %s: %s', dict(row), err_value)
+    logger.info('Pre-rendered %s of %s result pages. Page cache: %s',
+                n_rendered, len(keys), page_cache.stats())
+
+
+@app.route('/api/assign', methods=['POST'])
+def assign_cluster() -> Union[Response, Tuple[Response, int]]:
+    """Assign cars that are not in the database to a cluster and recommend the cars
+    of that cluster. The request body is the json spec of a car, e.g.
+    `{"engin_size": 2.0, "gearbox": "Manual", "seat_num": 5, "door_num": 4}`, or a
+    list of specs. A spec may also name its `model`, whose cars are then not
+    recommended.
+
+    Returns:
+        flask.Response: `{"cluster": ..., "recommendations": [...]}` for a spec, or a
+            list of them for a list of specs.
+    """
+    if assigner is None:
+        return jsonify({'error': 'Cluster assignment is not available.'}), 503
+
+    payload = request.get_json(silent=True)
+    is_batch = isinstance(payload, list)
+    specs = payload if is_batch else [payload]
+    if not specs or not all(isinstance(spec, dict) for spec in specs):
+        return jsonify({'error': 'Body must be a car spec or a list of car specs, '
+                                 f'with the fields {assigner.feature_cols}.'}), 400
+    if not all(value is None or isinstance(value, (str, int, float))
+               for spec in specs for value in spec.values()):
+        return jsonify({'error': 'Every field of a car spec must be a string, '
+                                 'a number or null.'}), 400
+    if len(specs) > app.config['API_MAX_BATCH_SIZE']:
+        return jsonify({'error': 'At most '
+                                 f'{app.config["API_MAX_BATCH_SIZE"]} cars per request.'}), 413
+    logger.info('Assigning %s cars to clusters.', len(specs))
+
+    try:
+        clusters = assigner.assign(specs)
+
+        # cars of the same cluster and model share their recommendations, which are
+        # looked up once
+        recommendations: Dict[Tuple[int, Any], List[Dict[str, Any]]] = {}
+        results = []
+        for spec, cluster in zip(specs, clusters.tolist()):
+            key = (cluster, spec.get('model'))
+            if key not in recommendations:
+                recommendations[key] = [
+                    car_to_dict(car) for car in get_cluster_recommendation(
+                        recommendation_index, cluster, app.config['MAX_ROWS_SHOW'],
+                        spec.get('model'))]
+            results.append({'cluster': cluster, 'recommendations': recommendations[key]})
+
+        return jsonify(results if is_batch else results[0])
+    except ValueError as err_value:
+        logger.warning('Not able to assign cars: %s', err_value)
+        return jsonify({'error': str(err_value)}), 400
+    except (sqlite3.OperationalError, sqlalchemy.exc.OperationalError) as err_or:
+        logger.error('Not able to query database: %s. Error: %s ',
+                     app.config['SQLALCHEMY_DATABASE_URI'], err_or)
+        return jsonify({'error': 'Database not available.'}), 500
+
+
+@app.route('/api/recommendations', methods=['POST'])
+def get_batch_recommendations() -> Union[Response, Tuple[Response, int]]:
+    """Recommend cars similar to many cars of the database at once, like `/recommend`.
+    The request body is a json list of cars, each given as
+    `{"maker": ..., "model": ..., "year": ..., "bodytype": ...}` or as a
+    `[maker, model, year, bodytype]` list. The response is streamed.
+
+    Returns:
+        flask.Response: A list with, for every car in the order of the request,
+            `{"maker": ..., "model": ..., "year": ..., "bodytype": ...,
+            "dream_car": {...}, "recommendations": [...]}`. Cars that are not in
+            the database get `"dream_car": null`, and they and cars that cannot be
+            recommended for (e.g. without features in neighbours mode) get no
+            recommendations and an `"error"`.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, list) or not payload:
+        return jsonify({'error': 'Body must be a list of cars, each with a maker, '
+                                 'model, year and bodytype.'}), 400
+    if len(payload) > app.config['API_MAX_BATCH_SIZE']:
+        return jsonify({'error': 'At most '
+                                 f'{app.config["API_MAX_BATCH_SIZE"]} cars per request.'}), 413
+
+    try:
+        keys = [_parse_car_key(car) for car in payload]
+    except (KeyError, TypeError, ValueError) as err_input:
+        logger.warning('Not valid batch of cars: %s', err_input)
+        return jsonify({'error': f'Car not valid: {err_input}'}), 400
+    logger.info('Getting recommendations for %s cars.', len(keys))
+
+    try:
+        # load the lookup tables before streaming, so that database errors are
+        # still reported with an error status
+        recommendation_index.get()
+    except (sqlite3.OperationalError, sqlalchemy.exc.OperationalError) as err_or:
+        logger.error('Not able to query database: %s. Error: %s ',
+                     app.config['SQLALCHEMY_DATABASE_URI'], err_or)
+        return jsonify({'error': 'Database not available.'}), 500
+
+    results = get_batch_recommendation(
+        recommendation_index, keys, app.config['MAX_ROWS_SHOW'],
+        neighbors=neighbors, same_cluster=app.config['NEIGHBORS_SAME_CLUSTER'])
+    return Response(stream_with_context(_stream_batch_recommendations(results)),
+                    mimetype='application/json')
+
+
+def _parse_car_key(car: Any) -> Tuple[str, str, int, str]:
+    if isinstance(car, dict):
+        car = [car['maker'], car['model'], car['year'], car['bodytype']]
+    if not isinstance(car, list) or len(car) != 4:
+        raise ValueError(f'{car} must have a maker, model, year and bodytype.')
+    maker, model, year, bodytype = car
+    validate_input(maker, model, year, bodytype)
+    return str(maker), str(model), int(year), str(bodytype)
+
+
+def _stream_batch_recommendations(results: Iterator[Tuple[Tuple[str, str, int, str], Any,
+                                                          List[Any], Optional[str]]]
+                                  ) -> Iterator[str]:
+    # every car is converted once, and so are the recommendations shared by the
+    # cars of the same cluster and model
+    car_dicts: Dict[str, Dict[str, Any]] = {}
+    recommendations: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
+
+    def to_dict(car: Any) -> Dict[str, Any]:
+        if car.car_id not in car_dicts:
+            car_dicts[car.car_id] = car_to_dict(car)
+        return car_dicts[car.car_id]
+
+    yield '['
+    for position, (key, dream_car, cars, error) in enumerate(results):
+        maker, model, year, bodytype = key
+        if dream_car is not None and neighbors is None:
+            group = (dream_car.cluster, model)
+            if group not in recommendations:
+                recommendations[group] = [to_dict(car) for car in cars]
+            car_list = recommendations[group]
+        else:
+            car_list = [to_dict(car) for car in cars]
+
+        item = {'maker': maker, 'model': model, 'year': year, 'bodytype': bodytype,
+                'dream_car': None if dream_car is None else to_dict(dream_car),
+                'recommendations': car_list}
+        if error is not None:
+            item['error'] = error
+        yield json.dumps(item) if position == 0 else ', ' + json.dumps(item)
+    yield ']'
+
+
+@app.route('/catalog.json')
+@cache_by_etag(get_catalog_json_etag, app.config['HTTP_CACHE_MAX_AGE'], vary='Accept-Encoding')
+def get_catalog() -> Union[Response, Tuple[Response, int]]:
+    """Send the whole maker -> model -> year -> body type tree, so that the dropdown
+    lists of the index page are filled without further requests. The json is
+    serialized and compressed once per data version.
+
+    Returns:
+        flask.Response: `{maker: {model: {year: [body type, ...]}}}`, gzipped if
+            the client accepts it.
+    """
+    try:
+        compressed = accepts_gzip()
+        response = Response(catalog.to_json(compressed), mimetype='application/json')
+        if compressed:
+            response.content_encoding = 'gzip'
+        return response
+    except (sqlite3.OperationalError, sqlalchemy.exc.OperationalError) as err_or:
+        logger.error('Not able to query database: %s. Error: %s ',
+                     app.config['SQLALCHEMY_DATABASE_URI'], err_or)
+        return jsonify({'error': 'Database not available.'}), 500
 
 
 @app.route('/models/<maker>')
-def get_models(maker: str) -> Union[Response, str]:
+@cache_by_etag(get_catalog_etag, app.config['HTTP_CACHE_MAX_AGE'])
+def get_models(maker: str) -> Union[Response, Tuple[str, int]]:
     """Given user's selected maker, query all car models made by that maker,
     and return the model list as a json response.
 
@@ -164,16 +506,7 @@ def get_models(maker: str) -> Union[Response, str]:
     try:
         # retrieve all models built by the maker
         logger.debug('Getting all models for maker %s', maker)
-        models = [
-            (model[0], model[0]) for model in (
-                car_manager.session
-                .query(Cars.genmodel)
-                .filter(Cars.maker == maker)
-                .distinct()
-                .order_by(Cars.genmodel)
-                .all()
-            )
-        ]
+        models = [(model, model) for model in catalog.models(maker)]
         logger.info('Get model list: %s', models)
 
         # create model objects and save in a lists
@@ -191,17 +524,18 @@ def get_models(maker: str) -> Union[Response, str]:
             'Error page returned. Not able to query local sqlite database: %s.'
             ' Error: %s ',
             app.config['SQLALCHEMY_DATABASE_URI'], err_or)
-        return render_template('error.html')
+        return render_template('error.html'), 500
     except sqlalchemy.exc.OperationalError as err_or:
         logger.error(
             'Error page returned. Not able to query MySQL database: %s. '
             'Error: %s ',
             app.config['SQLALCHEMY_DATABASE_URI'], err_or)
-        return render_template('error.html')
+        return render_template('error.html'), 500
 
 
 @app.route('/years/<maker>/<model>')
-def get_years(maker: str, model: str) -> Union[Response, str]:
+@cache_by_etag(get_catalog_etag, app.config['HTTP_CACHE_MAX_AGE'])
+def get_years(maker: str, model: str) -> Union[Response, Tuple[str, int]]:
     """Given user's selected maker and car model, query all years in which the car
     was made, and return the year list as a json response.
 
@@ -216,17 +550,7 @@ def get_years(maker: str, model: str) -> Union[Response, str]:
         # retrieve all years of this model
         logger.debug('Getting all years for maker %s model %s',
                      maker, model)
-        years = [
-            (year[0], year[0]) for year in (
-                car_manager.session
-                .query(Cars.year)
-                .filter(Cars.maker == maker,
-                        Cars.genmodel == model)
-                .distinct()
-                .order_by(Cars.year)
-                .all()
-            )
-        ]
+        years = [(year, year) for year in catalog.years(maker, model)]
         logger.info('Get year list: %s', years)
 
         # create model objects and save in a lists
@@ -245,17 +569,18 @@ def get_years(maker: str, model: str) -> Union[Response, str]:
             'Error page returned. Not able to query local sqlite database: %s.'
             ' Error: %s ',
             app.config['SQLALCHEMY_DATABASE_URI'], err_or)
-        return render_template('error.html')
+        return render_template('error.html'), 500
     except sqlalchemy.exc.OperationalError as err_or:
         logger.error(
             'Error page returned. Not able to query MySQL database: %s. '
             'Error: %s ',
             app.config['SQLALCHEMY_DATABASE_URI'], err_or)
-        return render_template('error.html')
+        return render_template('error.html'), 500
 
 
 @app.route('/bodytypes/<maker>/<model>/<year>')
-def get_body_types(maker: str, model: str, year: str) -> Union[Response, str]:
+@cache_by_etag(get_catalog_etag, app.config['HTTP_CACHE_MAX_AGE'])
+def get_body_types(maker: str, model: str, year: str) -> Union[Response, Tuple[str, int]]:
     """Given user's selected maker, car model and years,
     query all bodytype in which the car, and return the
     bodytype list as a json response.
@@ -275,18 +600,8 @@ def get_body_types(maker: str, model: str, year: str) -> Union[Response, str]:
 
     try:
         # get all possible body types
-        bodytypes = [
-            (bodytype[0], bodytype[0]) for bodytype in (
-                car_manager.session
-                .query(Cars.bodytype)
-                .filter(Cars.maker == maker,
-                        Cars.genmodel == model,
-                        Cars.year == year)
-                .distinct()
-                .order_by(Cars.bodytype)
-                .all()
-            )
-        ]
+        bodytypes = [(bodytype, bodytype)
+                     for bodytype in catalog.bodytypes(maker, model, year)]
         logger.info('Get body type list: %s', bodytypes)
 
         # create model objects and save in a lists
@@ -305,13 +620,13 @@ def get_body_types(maker: str, model: str, year: str) -> Union[Response, str]:
             'Error page returned. Not able to query local sqlite database: %s.'
             ' Error: %s ',
             app.config['SQLALCHEMY_DATABASE_URI'], err_or)
-        return render_template('error.html')
+        return render_template('error.html'), 500
     except sqlalchemy.exc.OperationalError as err_or:
         logger.error(
             'Error page returned. Not able to query MySQL database: %s. '
             'Error: %s ',
             app.config['SQLALCHEMY_DATABASE_URI'], err_or)
-        return render_template('error.html')
+        return render_template('error.html'), 500
 
 
 if __name__ == '__main__':
@@ -0,0 +1,266 @@
+import asyncio
+import functools
+import json
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import sqlalchemy.exc
+from werkzeug.http import parse_accept_header
+
+from app import (app as flask_app, car_manager, catalog, neighbors,  # type: ignore
+                 recommendation_index)
+from src.flaskapp.http_cache import get_etag  # type: ignore
+from src.flaskapp.recommend import car_to_dict, get_recommendation, validate_input  # type: ignore
+
+# Asynchronous json api over the catalog and the recommendations of the web app, to be
+# served by an ASGI server (e.g. `uvicorn asgi:app --port 5001`). It reuses the database
+# session, the in-memory indexes and the settings of app.py. Any lookup of an index may
+# query the database (to build it or check its data version), so all of them run in a
+# bounded thread pool: a slow database holds a thread instead of the event loop.
+logger = logging.getLogger(flask_app.config['APP_NAME'])
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+executor = ThreadPoolExecutor(max_workers=flask_app.config['ASYNC_MAX_THREADS'],
+                              thread_name_prefix='asgi-db')
+# requests being answered at once, beyond which new requests are turned away
+pending: Optional[asyncio.Semaphore] = None
+
+
+class HTTPError(Exception):
+    """Error answered with a json message and a status code.
+
+    Args:
+        status (int): HTTP status code.
+        message (str): Error message.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a function that may query the database in the thread pool.
+
+    Args:
+        func (Callable[..., Any]): The function.
+        *args (Any): Positional arguments of `func`.
+        **kwargs (Any): Keyword arguments of `func`.
+
+    Returns:
+        Any: The return value of `func`.
+    """
+    def call() -> Any:
+        try:
+            return func(*args, **kwargs)
+        finally:
+            # release the thread's connection, like flask does after every request
+            car_manager.session.remove()
+
+    return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+
+async def get_catalog(headers: Dict[str, str]) -> Tuple[int, Optional[bytes], Dict[str, str]]:
+    """Send the whole maker -> model -> year -> body type tree, with the same ETag
+    and caching headers as `/catalog.json`.
+
+    Args:
+        headers (Dict[str, str]): Headers of the request, by lower case name.
+
+    Returns:
+        Tuple[int, Optional[bytes], Dict[str, str]]: Status code, the json (gzipped
+            if accepted, None if the client's copy is current) and headers.
+    """
+    # like `request.accept_encodings` of flask, so that `gzip;q=0` is a refusal
+    compressed = parse_accept_header(headers.get('accept-encoding'))['gzip'] > 0
+    response_headers = {'vary': 'Accept-Encoding'}
+    if compressed:
+        response_headers['content-encoding'] = 'gzip'
+
+    # the etag looks up the data version too
+    etag, body = await run_blocking(
+        lambda: (get_etag(catalog, compressed), catalog.to_json(compressed)))
+    if etag is not None:
+        response_headers['etag'] = f'"{etag}"'
+        max_age = flask_app.config['HTTP_CACHE_MAX_AGE']
+        response_headers['cache-control'] = \
+            f'public, max-age={max_age}' if max_age > 0 else 'public, no-cache'
+        if_none_match = [tag.strip().replace('W/', '', 1)
+                         for tag in headers.get('if-none-match', '').split(',')]
+        if response_headers['etag'] in if_none_match:
+            response_headers.pop('content-encoding', None)
+            return 304, None, response_headers
+
+    return 200, body, response_headers
+
+
+async def get_models(maker: str) -> Dict[str, Any]:
+    """Get all models made by a maker, like `/models/<maker>`."""
+    models = await run_blocking(catalog.models, maker)
+    return {'models': [{'id': model, 'name': model} for model in models]}
+
+
+async def get_years(maker: str, model: str) -> Dict[str, Any]:
+    """Get all years in which a model was made, like `/years/<maker>/<model>`."""
+    years = await run_blocking(catalog.years, maker, model)
+    return {'years': [{'id': year, 'name': year} for year in years]}
+
+
+async def get_body_types(maker: str, model: str, year: str) -> Dict[str, Any]:
+    """Get all body types of a model made in a year, like
+    `/bodytypes/<maker>/<model>/<year>`."""
+    bodytypes = await run_blocking(catalog.bodytypes, maker, model, year)
+    return {'bodytypes': [{'id': bodytype, 'name': bodytype} for bodytype in bodytypes]}
+
+
+async def recommend(query: Dict[str, str]) -> Dict[str, Any]:
+    """Recommend cars similar to a dream car, like `/recommend`.
+
+    Args:
+        query (Dict[str, str]): The maker, model, year and bodytype of the dream car.
+
+    Raises:
+        HTTPError: The dream car is not valid (400) or not in the database (404).
+
+    Returns:
+        Dict[str, Any]: `{"dream_car": {...}, "recommendations": [...]}`.
+    """
+    try:
+        validate_input(query['maker'], query['model'], query['year'], query['bodytype'])
+        specs = {'maker': query['maker'], 'model': query['model'],
+                 'year': int(query['year']), 'bodytype': query['bodytype']}
+    except (KeyError, ValueError) as err_input:
+        raise HTTPError(400, 'Must input all four required attributes: maker, model, '
+                             f'year, and bodytype. Message: {err_input}') from err_input
+
+    recommendation = functools.partial(
+        get_recommendation, car_manager, max_rows=flask_app.config['MAX_ROWS_SHOW'],
+        index=recommendation_index, neighbors=neighbors,
+        same_cluster=flask_app.config['NEIGHBORS_SAME_CLUSTER'], **specs)
+    try:
+        cars, dream_car = await run_blocking(recommendation)
+    except ValueError as err_value:
+        raise HTTPError(404, str(err_value)) from err_value
+
+    return {'dream_car': car_to_dict(dream_car),
+            'recommendations': [car_to_dict(car) for car in cars]}
+
+
+async def app(scope: Scope, receive: Receive, send: Send) -> None:
+    """The ASGI application.
+
+    Args:
+        scope (Scope): Connection scope.
+        receive (Receive): Receive events from the server.
+        send (Send): Send events to the server.
+    """
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    global pending  # pylint: disable=global-statement
+    if pending is None:
+        pending = asyncio.Semaphore(flask_app.config['ASYNC_MAX_PENDING'])
+
+    if pending.locked():
+        logger.warning('Too many pending requests, returning 503.')
+        await send_json(send, 503, {'error': 'Too many requests, try again later.'})
+        return
+
+    async with pending:
+        try:
+            status, body, headers = await route(scope)
+        except HTTPError as err_http:
+            status, body, headers = err_http.status, {'error': err_http.message}, {}
+        except (sqlite3.OperationalError, sqlalchemy.exc.OperationalError) as err_or:
+            logger.error('Not able to query database: %s. Error: %s ',
+                         flask_app.config['SQLALCHEMY_DATABASE_URI'], err_or)
+            status, body, headers = 500, {'error': 'Database not available.'}, {}
+        await send_json(send, status, body, headers)
+
+
+async def route(scope: Scope) -> Tuple[int, Any, Dict[str, str]]:
+    """Dispatch a request to its handler.
+
+    Args:
+        scope (Scope): Connection scope of the request.
+
+    Raises:
+        HTTPError: Unknown path (404) or method (405).
+
+    Returns:
+        Tuple[int, Any, Dict[str, str]]: Status code, body (json serializable or
+            already serialized bytes) and extra headers of the response.
+    """
+    if scope['method'] != 'GET':
+        raise HTTPError(405, 'Method not allowed.')
+
+    headers = {name.decode('latin-1'): value.decode('latin-1')
+               for name, value in scope['headers']}
+    query = {key: values[0] for key, values
+             in parse_qs(scope['query_string'].decode()).items()}
+    parts: List[str] = scope['path'].strip('/').split('/')
+
+    if parts == ['catalog.json']:
+        return await get_catalog(headers)
+    if len(parts) == 2 and parts[0] == 'models':
+        return 200, await get_models(parts[1]), {}
+    if len(parts) == 3 and parts[0] == 'years':
+        return 200, await get_years(parts[1], parts[2]), {}
+    if len(parts) == 4 and parts[0] == 'bodytypes':
+        return 200, await get_body_types(parts[1], parts[2], parts[3]), {}
+    if parts == ['api', 'recommend']:
+        return 200, await recommend(query), {}
+    raise HTTPError(404, 'Not found.')
+
+
+async def send_json(send: Send, status: int, body: Any,
+                    headers: Optional[Dict[str, str]] = None) -> None:
+    """Send a response.
+
+    Args:
+        send (Send): Send events to the server.
+        status (int): HTTP status code.
+        body (Any): Json serializable body, or already serialized bytes. None for
+            an empty body.
+        headers (Dict[str, str]): Extra headers. Optional.
+    """
+    if body is None:
+        content = b''
+    elif isinstance(body, bytes):
+        content = body
+    else:
+        content = json.dumps(body).encode()
+    response_headers = [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(content)).encode())]
+    response_headers += [(name.encode(), value.encode())
+                         for name, value in (headers or {}).items()]
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': content})
+
+
+async def lifespan(receive: Receive, send: Send) -> None:
+    """Handle the startup and shutdown of the server.
+
+    Args:
+        receive (Receive): Receive events from the server.
+        send (Send): Send events to the server.
+    """
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
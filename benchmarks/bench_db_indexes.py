@@ -0,0 +1,119 @@
+"""Benchmark the latency of the app's queries on SQLite with and without the
+indexes of the cars table.
+
+Usage:
+    python -m benchmarks.bench_db_indexes --n_rows 250000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database.create_db import Cars, create_db, create_indexes
+
+MAKERS = [f'Maker{i}' for i in range(80)]
+BODYTYPES = ['Saloon', 'SUV', 'Hatchback', 'Coupe', 'Estate', 'Convertible']
+
+
+def make_rows(n_rows: int, n_clusters: int, seed: int = 0) -> List[dict]:
+    """Generate synthetic cars."""
+    rng = random.Random(seed)
+    rows = []
+    for car_id in range(n_rows):
+        maker = rng.choice(MAKERS)
+        rows.append({
+            'car_id': str(car_id),
+            'maker': maker,
+            'genmodel': f'{maker}-{rng.randrange(40)}',
+            'year': rng.randrange(2000, 2022),
+            'bodytype': rng.choice(BODYTYPES),
+            'price': rng.uniform(1000, 60000),
+            'cluster': rng.randrange(n_clusters),
+        })
+    return rows
+
+
+def time_queries(session, rows: List[dict], n_repeats: int) -> Dict[str, float]:
+    """Time every hot query of the app. Returns the mean latency in milliseconds."""
+    rng = random.Random(1)
+    samples = [rng.choice(rows) for _ in range(n_repeats)]
+
+    queries: Dict[str, Callable[[dict], object]] = {
+        'makers': lambda car: (session.query(Cars.maker).distinct()
+                               .order_by(Cars.maker).all()),
+        'models': lambda car: (session.query(Cars.genmodel)
+                               .filter(Cars.maker == car['maker'])
+                               .distinct().order_by(Cars.genmodel).all()),
+        'years': lambda car: (session.query(Cars.year)
+                              .filter(Cars.maker == car['maker'],
+                                      Cars.genmodel == car['genmodel'])
+                              .distinct().order_by(Cars.year).all()),
+        'bodytypes': lambda car: (session.query(Cars.bodytype)
+                                  .filter(Cars.maker == car['maker'],
+                                          Cars.genmodel == car['genmodel'],
+                                          Cars.year == car['year'])
+                                  .distinct().order_by(Cars.bodytype).all()),
+        'dream car': lambda car: (session.query(Cars)
+                                  .filter(Cars.maker == car['maker'],
+                                          Cars.genmodel == car['genmodel'],
+                                          Cars.year == car['year'],
+                                          Cars.bodytype == car['bodytype'])
+                                  .limit(1).all()),
+        'recommend': lambda car: (session.query(Cars)
+                                  .filter(Cars.cluster == car['cluster'],
+                                          Cars.genmodel != car['genmodel'])
+                                  .order_by(Cars.maker, Cars.genmodel, Cars.year)
+                                  .limit(100).all()),
+    }
+
+    latencies = {}
+    for name, query in queries.items():
+        start = time.perf_counter()
+        for car in samples:
+            query(car)
+        latencies[name] = (time.perf_counter() - start) / n_repeats * 1000
+        session.expunge_all()
+    return latencies
+
+
+def main(n_rows: int, n_clusters: int, n_repeats: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine_string = 'sqlite:///' + os.path.join(tmp_dir, 'bench.db')
+        create_db(engine_string)
+        engine = create_engine(engine_string)
+
+        # start without indexes
+        for index in Cars.__table__.indexes:
+            index.drop(engine)
+
+        rows = make_rows(n_rows, n_clusters)
+        with engine.begin() as connection:
+            connection.execute(Cars.__table__.insert(), rows)
+        session = sessionmaker(bind=engine)()
+
+        before = time_queries(session, rows, n_repeats)
+        create_indexes(engine_string)
+        with engine.connect() as connection:
+            connection.exec_driver_sql('ANALYZE')
+        after = time_queries(session, rows, n_repeats)
+        session.close()
+
+    print(f'{n_rows} rows, {n_clusters} clusters, mean of {n_repeats} queries (ms)')
+    print(f'{"query":<12}{"no index":>12}{"indexed":>12}{"speedup":>10}')
+    for name in before:
+        print(f'{name:<12}{before[name]:>12.3f}{after[name]:>12.3f}'
+              f'{before[name] / after[name]:>9.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark cars table indexes')
+    parser.add_argument('--n_rows', type=int, default=250000)
+    parser.add_argument('--n_clusters', type=int, default=50)
+    parser.add_argument('--n_repeats', type=int, default=20)
+    args = parser.parse_args()
+    main(args.n_rows, args.n_clusters, args.n_repeats)
@@ -0,0 +1,69 @@
+"""Benchmark the vectorized `mode` aggregation of `clean.aggregate_by_keys` against
+the per-group `pd.Series.mode` lambda it replaced.
+
+Usage:
+    python -m benchmarks.bench_mode_aggregation --n_rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.modeling.clean import method_to_func, mode_from_counts
+
+KEY_COLS = ['maker', 'genmodel', 'year', 'bodytype']
+MODE_COLS = ['gearbox', 'seat_num', 'door_num']
+
+
+def make_data(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Generate synthetic ads with keys and mode columns like the raw ad table."""
+    rng = np.random.default_rng(seed)
+    makers = rng.integers(0, 80, n_rows)
+    return pd.DataFrame({
+        'maker': np.char.add('maker', makers.astype(str)),
+        'genmodel': np.char.add('model', (makers * 40 + rng.integers(0, 40, n_rows)).astype(str)),
+        'year': rng.integers(2000, 2022, n_rows),
+        'bodytype': rng.choice(['Saloon', 'SUV', 'Hatchback', 'Coupe'], n_rows),
+        'gearbox': rng.choice(['Manual', 'Automatic', 'Semi-Auto'], n_rows),
+        'seat_num': rng.choice([2.0, 4.0, 5.0, 7.0], n_rows),
+        'door_num': rng.choice([2.0, 3.0, 4.0, 5.0], n_rows),
+    })
+
+
+def mode_lambda(data: pd.DataFrame) -> pd.DataFrame:
+    """Previous implementation: a python callback for every group and column."""
+    return data.groupby(KEY_COLS).agg({col: method_to_func('mode') for col in MODE_COLS})
+
+
+def mode_vectorized(data: pd.DataFrame) -> pd.DataFrame:
+    """Current implementation: grouped value counts."""
+    return pd.DataFrame({
+        col: mode_from_counts(data.groupby(KEY_COLS + [col]).size(), KEY_COLS, col)
+        for col in MODE_COLS
+    })
+
+
+def main(n_rows: int) -> None:
+    data = make_data(n_rows)
+    n_groups = data.groupby(KEY_COLS).ngroups
+
+    start = time.perf_counter()
+    expected = mode_lambda(data)
+    time_lambda = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = mode_vectorized(data)
+    time_vectorized = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(expected, result)
+    print(f'{n_rows} rows, {n_groups} groups, {len(MODE_COLS)} mode columns')
+    print(f'lambda:     {time_lambda:8.2f} s')
+    print(f'vectorized: {time_vectorized:8.2f} s ({time_lambda / time_vectorized:.1f}x)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark mode aggregation')
+    parser.add_argument('--n_rows', type=int, default=1000000)
+    args = parser.parse_args()
+    main(args.n_rows)
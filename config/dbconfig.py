@@ -1 +1,2 @@
-LOGGING_CONFIG = "config/logging/local.conf"
\ No newline at end of file
+LOGGING_CONFIG = "config/logging/local.conf"
+INGEST_CHUNKSIZE = 10000
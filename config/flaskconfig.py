@@ -11,3 +11,46 @@ MAX_ROWS_SHOW = 100
 SECRET_KEY = os.urandom(32)
 
 SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI')
+
+# Seconds between two checks of the data version. In-memory copies of the cars
+# table are rebuilt when `run_db.py ingest` has loaded new data.
+CATALOG_REFRESH_SECONDS = 60
+# Seconds browsers and proxies may reuse the dropdown lists and recommendation pages
+# before revalidating them with their ETag, which changes with the data version.
+# 0 makes them revalidate every time, which is answered with an empty 304 until
+# the next ingest, so new data is shown as soon as the app has picked it up.
+HTTP_CACHE_MAX_AGE = 0
+# Maximum number of rendered result pages kept in memory by every worker
+PAGE_CACHE_MAX_ENTRIES = 10000
+# SQLite file shared by all workers, holding the in-memory indexes and rendered pages
+# of the current data version so that one worker's work serves the others. Disabled
+# if not set. The indexes are stored pickled and unpickled when loaded, which runs
+# arbitrary code of whoever wrote the file: it must only be writable by the app's
+# user, on a local disk, never in a shared or world-writable directory.
+SHARED_CACHE_PATH = os.environ.get('SHARED_CACHE_PATH')
+SHARED_CACHE_MAX_ENTRIES = 100000
+# Seconds cached pages and indexes are kept, in memory and in the shared cache
+CACHE_TTL_SECONDS = 86400
+
+# How recommendations are made: 'cluster' lists the cars of the dream car's KMeans
+# cluster alphabetically, 'neighbors' ranks cars by distance in feature space.
+RECOMMENDER = 'cluster'
+# A feature store (.npy, see `run_model.py featurize`) is memory mapped and shared by all workers
+FEATURE_PATH = 'data/processed/feature.csv'
+LABELS_PATH = 'data/processed/labels.csv'
+# Only used by the 'neighbors' recommender: restrict the search to the dream car's cluster.
+NEIGHBORS_SAME_CLUSTER = True
+
+# Featurizer and clustering model saved by the modeling pipeline, used by /api/assign
+# to assign cars that are not in the database to a cluster.
+MODEL_PATH = 'models/kmeans_50'
+FEATURIZER_PATH = 'models/featurizer'
+# Maximum number of cars in one request to the json api
+API_MAX_BATCH_SIZE = 10000
+# Send compact json, also in debug mode, as api responses may list many cars
+JSONIFY_PRETTYPRINT_REGULAR = False
+
+# Async api (asgi.py): threads running the lookups that query the database, and
+# requests answered at once before new ones get a 503
+ASYNC_MAX_THREADS = 16
+ASYNC_MAX_PENDING = 1000
@@ -1 +1,8 @@
-LOGGING_CONFIG = "config/logging/local.conf"
\ No newline at end of file
+import os
+
+LOGGING_CONFIG = "config/logging/local.conf"
+
+# Directory where run_model.py caches the outputs of every step, see src/utils/cache.py
+CACHE_DIR = os.environ.get('MODEL_CACHE_DIR', 'data/cache')
+# Number of cached runs kept per step, the least recently used are deleted
+CACHE_MAX_ENTRIES = int(os.environ.get('MODEL_CACHE_MAX_ENTRIES', 5))
@@ -1,7 +1,7 @@
 import argparse
 import logging.config
 
-from src.database.create_db import create_db
+from src.database.create_db import create_db, create_indexes
 from src.database.add_cars import add_car_df
 from config.flaskconfig import SQLALCHEMY_DATABASE_URI
 from config import dbconfig
@@ -23,6 +23,12 @@ if __name__ == "__main__":
     sp_create.add_argument("--engine_string", default=SQLALCHEMY_DATABASE_URI,
                            help="SQLAlchemy connection URI for database")
 
+    # Sub-parser for adding indexes to an existing database
+    sp_index = subparsers.add_parser("create_indexes",
+                                     description="Add indexes to existing database")
+    sp_index.add_argument("--engine_string", default=SQLALCHEMY_DATABASE_URI,
+                          help="SQLAlchemy connection URI for database")
+
     # Sub-parser for ingesting new data
     sp_ingest = subparsers.add_parser("ingest",
                                       description="Add data to database")
@@ -30,12 +36,23 @@ if __name__ == "__main__":
                            help="SQLAlchemy connection URI for database")
     sp_ingest.add_argument("--input", default=None,
                            help="Path of the data frame to be added")
+    sp_ingest.add_argument("--chunksize", type=int, default=dbconfig.INGEST_CHUNKSIZE,
+                           help="Number of rows read and inserted at a time")
+    sp_ingest.add_argument("--mode", default="append", choices=["append", "upsert"],
+                           help="`append` inserts all rows into an empty table, "
+                                "`upsert` only inserts new cars and updates changed cars")
+    sp_ingest.add_argument("--delete_missing", action="store_true",
+                           help="In upsert mode, delete cars missing from the input")
 
     args = parser.parse_args()
     sp_used = args.subparser_name
     if sp_used == 'create_db':
         create_db(args.engine_string)
+    elif sp_used == 'create_indexes':
+        create_indexes(args.engine_string)
     elif sp_used == 'ingest':
-        add_car_df(input_path=args.input, engine_string=args.engine_string)
+        add_car_df(input_path=args.input, engine_string=args.engine_string,
+                   chunksize=args.chunksize, mode=args.mode,
+                   delete_missing=args.delete_missing)
     else:
         parser.print_help()
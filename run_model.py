@@ -1,18 +1,68 @@
 import argparse
 import logging.config
+import sys
+from typing import Any, Dict, Tuple
 
 import pandas as pd
 import yaml
 
 from config import modelconfig
-from src.modeling import clean, featurize, train, label, evaluate
-from src.utils import io
+from src.modeling import clean, featurize, train, label, evaluate, sweep, pipeline
+from src.utils import cache, io
 
 # configure logger
 logging.config.fileConfig(modelconfig.LOGGING_CONFIG)
 logger = logging.getLogger()
 
 
+def get_step_files(args: argparse.Namespace,
+                   config: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, str],
+                                                    Dict[str, Any]]:
+    """List the files read and written by a step, and the configuration its outputs
+    depend on. Together they are the cache key of the step (see `src/utils/cache.py`).
+
+    Args:
+        args (argparse.Namespace): Command line arguments.
+        config (Dict[str, Any]): Configurations of the modeling pipeline.
+
+    Returns:
+        Tuple[Dict[str, str], Dict[str, str], Dict[str, Any]]: Path of every input
+            and output by name, and the configuration of the step.
+    """
+    step_config = {'config': config.get(args.step),
+                   'output_format': io.get_file_format(args.output),
+                   'chunksize': args.chunksize}
+    input_paths = {'input': args.input}
+    output_paths = {'output': args.output}
+
+    if args.step == 'clean':
+        output_paths['key_path'] = config['clean']['aggregation']['key_path']
+    elif args.step == 'featurize':
+        # the feature store keeps the car ids of the clean data
+        step_config['new_index'] = config['clean']['new_index']
+        output_paths['manifest'] = io.get_manifest_path(args.output)
+        if config['featurize'].get('transform_path') is not None:
+            output_paths['transform'] = config['featurize']['transform_path']
+    elif args.step == 'train':
+        output_paths['metadata'] = io.get_model_metadata_path(args.output)
+    elif args.step == 'sweep':
+        model_save_path = config['sweep']['model_save_path']
+        output_paths['model'] = model_save_path
+        output_paths['metadata'] = io.get_model_metadata_path(model_save_path)
+    elif args.step in ['label', 'evaluate']:
+        input_paths['metadata'] = io.get_model_metadata_path(args.input)
+        input_paths['feature_path'] = config[args.step]['feature_path']
+        if args.step == 'label':
+            input_paths['clean_data_path'] = config['label']['clean_data_path']
+
+    # a feature store is an array plus a manifest
+    for name, path in list(input_paths.items()):
+        if path is not None and io.get_file_format(path) == 'npy':
+            input_paths[name + '_manifest'] = io.get_manifest_path(path)
+
+    return input_paths, output_paths, step_config
+
+
 if __name__ == '__main__':
 
     # parse arguments from user input
@@ -20,13 +70,20 @@ if __name__ == '__main__':
         description='Acquire, clean, create features, and generate clusters from car data')
 
     parser.add_argument('step', help='Which step to run',
-                        choices=['acquire', 'clean', 'featurize', 'train', 'label', 'evaluate'])
+                        choices=['acquire', 'clean', 'featurize', 'train', 'sweep', 'label',
+                                 'evaluate', 'pipeline'])
     parser.add_argument('--input', '-i', default=None,
                         help='Path to input data')
     parser.add_argument('--config', default='config/local/config_modeling.yml',
                         help='Path to configuration file')
     parser.add_argument('--output', '-o', default=None,
-                        help='Path to save output CSV (optional, default = None)')
+                        help='Path to save output CSV, parquet or feather file '
+                             '(optional, default = None)')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='If given, clean the raw data in chunks of this many rows '
+                             'instead of loading it all in memory (optional, default = None)')
+    parser.add_argument('--no_cache', action='store_true',
+                        help='Run the step even if its outputs are cached')
     # parser.add_argument('--model_save_path', default=None,
     #                     help='Path where the trained model is saved (optional, default = None)')
     args = parser.parse_args()
@@ -38,13 +95,32 @@ if __name__ == '__main__':
     config = io.read_yml(path=args.config)
     logger.info('Configuration file loaded from %s', args.config)
 
+    # skip the step if it already ran with the same inputs, configuration and code
+    use_cache = ((not args.no_cache) and (args.output is not None)
+                 and (args.step not in ['acquire', 'pipeline']))
+    if use_cache:
+        input_paths, output_paths, step_config = get_step_files(args, config)
+        cache_key = cache.get_step_key(args.step, input_paths, step_config,
+                                       modelconfig.CACHE_DIR)
+        if cache.restore_outputs(args.step, cache_key, output_paths, modelconfig.CACHE_DIR):
+            sys.exit(0)
+
     # input data
-    if (args.input is not None) and (args.step not in ['label', 'evaluate']):
+    # some steps stream their input from disk instead of loading it in memory
+    is_chunked_clean = (args.step == 'clean') and (args.chunksize is not None)
+    is_chunked_train = ((args.step == 'train')
+                        and (config['train'].get('backend') == 'minibatch')
+                        and (config['train'].get('chunksize') is not None))
+    if ((args.input is not None) and (args.step not in ['sweep', 'label', 'evaluate', 'pipeline'])
+            and not (is_chunked_clean or is_chunked_train)):
         df_input = io.read_pandas(args.input)
         logger.info('Input data loaded from %s', args.input)
 
-
-    if args.step == 'clean':
+    if is_chunked_clean:
+        # Stream the raw data file through the cleaning steps chunk by chunk.
+        df_output = clean.clean_chunked(input_path=args.input, chunksize=args.chunksize,
+                                        **config['clean'])
+    elif args.step == 'clean':
         # Extract cloud data from raw data file based on the user's specification.
         df_output = clean.clean(data=df_input, **config['clean'])
     elif args.step == 'featurize':
@@ -53,8 +129,13 @@ if __name__ == '__main__':
     elif args.step == 'train':
         # Train model using features generated. Trained model
         # will be saved to local directory.
-        train.train(feature=df_input, model_save_path=args.output,
+        train.train(feature=None if is_chunked_train else df_input,
+                    model_save_path=args.output, feature_path=args.input,
                     **config['train'])
+    elif args.step == 'sweep':
+        # Train and evaluate a model for every number of clusters in the configured
+        # range. The best model is saved to the path in the config file.
+        df_output = sweep.sweep(feature_path=args.input, **config['sweep'])
     elif args.step == 'label':
         # Use the clustering model to label all cars into different classes.
         # User should also specify the path the clean data and features data
@@ -65,7 +146,22 @@ if __name__ == '__main__':
         # evaluation metrics should be specified in config file.
         df_output = evaluate.evaluate(
             model_path=args.input, **config['evaluate'])
+    elif args.step == 'pipeline':
+        # Run clean, featurize, train, label and evaluate in this process, handing
+        # the data from one step to the next in memory. The output is the time
+        # taken by every step.
+        df_output = pipeline.run_pipeline(input_path=args.input, config=config,
+                                          **config['pipeline'])
 
     # Save results of the previous processing step
     if (args.output is not None) and (args.step != 'train'):
-        io.write_pandas_to_csv(df_output, args.output)
+        if (args.step == 'featurize') and (io.get_file_format(args.output) == 'npy'):
+            # feature store: keep the car id of every row next to the matrix
+            io.write_feature_store(df_output, args.output,
+                                   car_ids=df_input[config['clean']['new_index']])
+        else:
+            io.write_pandas(df_output, args.output)
+
+    if use_cache:
+        cache.save_outputs(args.step, cache_key, output_paths, modelconfig.CACHE_DIR,
+                           modelconfig.CACHE_MAX_ENTRIES)
@@ -1,6 +1,9 @@
 import logging.config
+import math
 import sqlite3
+import time
 import typing
+import uuid
 
 import flask
 import sqlalchemy
@@ -9,7 +12,7 @@ from flask_sqlalchemy import SQLAlchemy  # type: ignore
 from sqlalchemy.ext.declarative import declarative_base
 
 from src.utils import io  # type: ignore
-from src.database.create_db import Cars  # type: ignore
+from src.database.create_db import Cars, DataVersion  # type: ignore
 
 logger = logging.getLogger(__name__)
 
@@ -47,55 +50,210 @@ class CarManager:
         """
         self.session.close()
 
-    def add_car_df(self, input_path: str) -> None:
+    def get_data_version(self) -> typing.Optional[str]:
+        """Get the version of the data currently loaded into the cars table.
+
+        Returns:
+            typing.Optional[str]: The data version. None if no version has been
+                recorded (e.g. the `data_version` table has not been created yet).
+        """
+        try:
+            version = (self.session
+                       .query(DataVersion.version)
+                       .filter(DataVersion.id == 1)
+                       .scalar())
+        except sqlalchemy.exc.SQLAlchemyError as err_sql:
+            self.session.rollback()
+            logger.warning("Not able to retrieve the data version. Error: %s", err_sql)
+            return None
+
+        logger.debug("Current data version: %s", version)
+        return version
+
+    def bump_data_version(self, commit: bool = True) -> str:
+        """Record a new data version. Should be called every time the content of the
+        cars table changes so that caches built from it can be invalidated.
+
+        Args:
+            commit (bool): If false, the new version is only added to the session,
+                to be committed in the same transaction as the changes of the cars
+                table, so that they are never visible under the old version.
+
+        Returns:
+            str: The new data version.
+        """
+        version = uuid.uuid4().hex
+        self.session.merge(DataVersion(id=1, version=version))
+        if commit:
+            self.session.commit()
+            logger.info("Data version updated to %s", version)
+
+        return version
+
+    def add_car_df(self, input_path: str, chunksize: int = 10000) -> int:
         """Add the car data into the data base.
 
+        The csv is streamed in chunks of `chunksize` rows and every chunk is bulk
+        inserted with a single executemany, so memory use does not grow with the
+        size of the file. All chunks are committed in one transaction with the new
+        data version.
+
         Args:
             input_path (str): Path to the car data.
+            chunksize (int): Number of rows read and inserted at a time.
 
         Returns:
-            None
+            int: Number of rows added. 0 if the transaction was rolled back.
         """
         # establish session
         session = self.session
         logger.debug("Session retrieved.")
 
-        # load data frame
-        cars = io.read_pandas(input_path=input_path)
-        logger.info("Car data (with assignment) loaded.")
-
-        # every element corresponds to a row in the data frame.
-        car_dict_list = cars.to_dict(orient="records")
-        logger.debug("Transformed df into list. Length: %s",
-                     len(car_dict_list))
+        n_rows = 0
+        try:
+            logger.info("Adding records to database...")
+            for cars in io.read_pandas_chunks(input_path, chunksize=chunksize):
+                # every element corresponds to a row in the data frame.
+                car_dict_list = (cars
+                                 .astype(object)
+                                 .where(cars.notna(), None)
+                                 .to_dict(orient="records"))
 
-        # convert dict to records and put all records in a list
-        car_record_list = []
-        for car_dict in car_dict_list:
-            car_record_list.append(Cars(**car_dict))
-        logger.debug("Collected all records into list. Length: %s",
-                     len(car_record_list))
+                # insert the whole chunk in one statement
+                session.execute(Cars.__table__.insert(), car_dict_list)
+                n_rows += len(car_dict_list)
+                logger.debug("Inserted %s rows.", n_rows)
 
-        # add all records to data base
-        try:
-            logger.info("Adding record list to database...")
-            session.add_all(car_record_list)
+            version = self.bump_data_version(commit=False)
             session.commit()
-            logger.info("Data loaded into database.")
+            logger.info("Data loaded into database, data version updated to %s.", version)
+            return n_rows
         except sqlalchemy.exc.OperationalError:
+            session.rollback()
             logger.error("Operational error occurred. "
                          "Check your connection to the database")
         except sqlalchemy.exc.IntegrityError:
+            session.rollback()
             logger.error("The database already contains the records you are trying to insert. "
                          "Please truncate the table before attempting again.")
+        except sqlalchemy.exc.SQLAlchemyError as err_sql:
+            session.rollback()
+            logger.error("Not able to add the car data to the database. Error: %s", err_sql)
+        return 0
+
+    def upsert_car_df(self, input_path: str, chunksize: int = 10000,
+                      delete_missing: bool = False) -> typing.Dict[str, int]:
+        """Incrementally sync the cars table with the car data. Rows are matched
+        on `car_id`: new cars are inserted, cars whose values changed (e.g. a new
+        cluster or price) are updated, and unchanged cars are left alone.
+
+        The csv is streamed in chunks of `chunksize` rows, and all chunks are
+        written in one transaction with the new data version, so that a failure
+        leaves the table and its version as they were.
+
+        Args:
+            input_path (str): Path to the car data.
+            chunksize (int): Number of rows read and written at a time.
+            delete_missing (bool): If true, also delete the cars that are in the
+                database but not in the car data.
+
+        Raises:
+            sqlalchemy.exc.SQLAlchemyError: Writing failed, nothing was changed.
+
+        Returns:
+            typing.Dict[str, int]: Number of rows inserted, updated, unchanged and deleted.
+        """
+        session = self.session
+        table = Cars.__table__
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+
+        # snapshot of the current table: car id -> column values
+        existing = {str(row.car_id): row._mapping
+                    for row in session.query(*table.columns)}
+        logger.info("Loaded %s existing cars.", len(existing))
+
+        update_stmt = (table.update()
+                       .where(table.c.car_id == sqlalchemy.bindparam("b_car_id")))
+        seen: typing.Set[str] = set()
+        try:
+            for cars in io.read_pandas_chunks(input_path, chunksize=chunksize):
+                car_dict_list = (cars
+                                 .astype(object)
+                                 .where(cars.notna(), None)
+                                 .to_dict(orient="records"))
 
+                # split the chunk into new and changed cars
+                inserts, updates = [], []
+                for car_dict in car_dict_list:
+                    car_id = str(car_dict["car_id"])
+                    car_dict["car_id"] = car_id
+                    seen.add(car_id)
+                    if car_id not in existing:
+                        inserts.append(car_dict)
+                    elif _is_changed(existing[car_id], car_dict):
+                        updates.append(dict(car_dict, b_car_id=car_id))
+                    else:
+                        counts["unchanged"] += 1
 
-def add_car_df(input_path: str, engine_string: str) -> None:
+                if inserts:
+                    session.execute(table.insert(), inserts)
+                if updates:
+                    session.execute(update_stmt, updates)
+                counts["inserted"] += len(inserts)
+                counts["updated"] += len(updates)
+                logger.debug("Upserted chunk: %s inserted, %s updated.",
+                             len(inserts), len(updates))
+
+            # remove cars that disappeared from the car data
+            if delete_missing:
+                missing = [car_id for car_id in existing if car_id not in seen]
+                for start in range(0, len(missing), chunksize):
+                    batch = missing[start:start + chunksize]
+                    session.execute(table.delete().where(table.c.car_id.in_(batch)))
+                    counts["deleted"] += len(batch)
+
+            is_changed = counts["inserted"] or counts["updated"] or counts["deleted"]
+            if is_changed:
+                version = self.bump_data_version(commit=False)
+            session.commit()
+        except sqlalchemy.exc.SQLAlchemyError:
+            session.rollback()
+            logger.error("Not able to sync the cars table, nothing was changed.")
+            raise
+
+        logger.info("Cars table synced: %s", counts)
+        if is_changed:
+            logger.info("Data version updated to %s", version)
+        return counts
+
+
+def _is_changed(old: typing.Mapping, new: typing.Mapping) -> bool:
+    """Check if any column of a new car record differs from the stored one.
+    Floats are compared with a relative tolerance, since some databases store
+    them with less precision than the csv.
+    """
+    for col, new_value in new.items():
+        old_value = old.get(col)
+        if isinstance(old_value, float) and isinstance(new_value, (int, float)):
+            if not math.isclose(old_value, new_value, rel_tol=1e-6):
+                return True
+        elif old_value != new_value:
+            return True
+    return False
+
+
+def add_car_df(input_path: str, engine_string: str, chunksize: int = 10000,
+               mode: str = "append", delete_missing: bool = False) -> None:
     """Add a car table to the data base.
 
     Args:
         input_path (str): Path to the car table.
         engine_string (str): Engine string of the sql server.
+        chunksize (int): Number of rows read and inserted at a time.
+        mode (str): `append` to insert all rows into an empty table, `upsert` to
+            only insert new cars and update changed cars.
+        delete_missing (bool): Only used in `upsert` mode. If true, delete the cars
+            that are not in the car table anymore.
     """
     logger.info("Adding car data frame to the database...")
 
@@ -105,8 +263,16 @@ def add_car_df(input_path: str, engine_string: str) -> None:
 
     try:
         # use manager to add data to data base
-        car_manager.add_car_df(input_path)
-        logger.info("Data frame added to database.")
+        start = time.perf_counter()
+        if mode == "upsert":
+            counts = car_manager.upsert_car_df(input_path, chunksize=chunksize,
+                                               delete_missing=delete_missing)
+            n_rows = counts["inserted"] + counts["updated"] + counts["unchanged"]
+        else:
+            n_rows = car_manager.add_car_df(input_path, chunksize=chunksize)
+        elapsed = time.perf_counter() - start
+        logger.info("Data frame added to database. %s rows in %.2f seconds "
+                    "(%.0f rows/s).", n_rows, elapsed, n_rows / elapsed)
     except sqlite3.OperationalError as err_oe:
         logger.error(
             "Error page returned. Not able to add song to local sqlite "
@@ -116,5 +282,7 @@ def add_car_df(input_path: str, engine_string: str) -> None:
         logger.error(
             "Error page returned. Not able to add song to MySQL database.  "
             "Please check engine string and VPN. Error: %s ", err_oe)
+    except sqlalchemy.exc.SQLAlchemyError as err_sql:
+        logger.error("Not able to add the car data to the database. Error: %s", err_sql)
 
     car_manager.close()
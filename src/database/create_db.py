@@ -1,6 +1,6 @@
 import logging
 
-from sqlalchemy import Column, Integer, String, Float, create_engine
+from sqlalchemy import Column, Index, Integer, String, Float, create_engine
 from sqlalchemy.orm import declarative_base
 
 logger = logging.getLogger(__name__)
@@ -12,6 +12,14 @@ class Cars(Base):
     assignments.
     """
     __tablename__ = 'cars'
+    __table_args__ = (
+        # covers the maker -> model -> year -> body type dropdown queries
+        Index('ix_cars_maker_genmodel_year_bodytype',
+              'maker', 'genmodel', 'year', 'bodytype'),
+        # serves the sorted same-cluster recommendation query
+        Index('ix_cars_cluster_maker_genmodel_year',
+              'cluster', 'maker', 'genmodel', 'year'),
+    )
 
     car_id = Column(String(100), primary_key=True)
     genmodel_id = Column(String(100))
@@ -31,6 +39,20 @@ class Cars(Base):
         return f'Maker:{self.maker}, Model:{self.genmodel}, Year:{self.year}, Cluster:{self.cluster}.'
 
 
+class DataVersion(Base):
+    """Data version table: a single row identifying the data currently loaded into the cars
+    table. It is replaced on every ingest so that the app knows when its in-memory copies of
+    the cars table are out of date.
+    """
+    __tablename__ = 'data_version'
+
+    id = Column(Integer, primary_key=True)
+    version = Column(String(100))
+
+    def __repr__(self):
+        return f'Data version:{self.version}.'
+
+
 def create_db(engine_string: str) -> None:
     """Connect to an SQL engine through engine string and create
     a data base.
@@ -44,3 +66,18 @@ def create_db(engine_string: str) -> None:
     # Create the tracks table
     Base.metadata.create_all(engine)
     logger.info('Database created!')
+
+
+def create_indexes(engine_string: str) -> None:
+    """Add the indexes of the cars table to an existing data base. Indexes that
+    already exist are skipped.
+
+    Args:
+        engine_string (str): The SQL Engine Path.
+    """
+    engine = create_engine(engine_string)
+
+    for index in Cars.__table__.indexes:
+        logger.info('Creating index %s...', index.name)
+        index.create(engine, checkfirst=True)
+    logger.info('Indexes created!')
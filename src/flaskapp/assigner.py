@@ -0,0 +1,84 @@
+import logging
+from typing import Any, List, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.utils import io  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# from this many cars on, featurizing through pandas is faster than record by record
+DATAFRAME_MIN_BATCH = 2000
+
+
+class ClusterAssigner:
+    """Assign cars that are not in the database to a cluster, with the featurizer
+    and clustering model saved by the modeling pipeline.
+
+    Args:
+        model_path (str): Path to the clustering model.
+        featurizer_path (str): Path to the featurizer (the `transform_path` of the
+            `featurize` configuration).
+
+    Raises:
+        ValueError: The featurizer and the model do not have the same features.
+    """
+
+    def __init__(self, model_path: str, featurizer_path: str):
+        self.featurizer = io.load_model(featurizer_path)
+        model = io.load_model(model_path)
+        self.centers = np.asarray(model.cluster_centers_, dtype=np.float64)
+        self.center_sq_norms = np.einsum('ij,ij->i', self.centers, self.centers)
+
+        if len(self.featurizer.columns) != self.centers.shape[1]:
+            raise ValueError(
+                f'The featurizer generates {len(self.featurizer.columns)} features but '
+                f'the model was trained on {self.centers.shape[1]}.')
+        logger.info('Loaded clustering model with %s clusters.', len(self.centers))
+
+    @property
+    def feature_cols(self) -> List[str]:
+        """List[str]: Specs needed to assign a car."""
+        return self.featurizer.feature_cols
+
+    def featurize(self, specs: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """Featurize cars.
+
+        Args:
+            specs (Sequence[Mapping[str, Any]]): Specs of every car.
+
+        Raises:
+            ValueError: A spec is missing or not valid.
+
+        Returns:
+            np.ndarray: One row of features per car.
+        """
+        try:
+            if len(specs) >= DATAFRAME_MIN_BATCH:
+                data = pd.DataFrame.from_records(specs, columns=self.feature_cols)
+                if data.isna().any(axis=None):
+                    raise ValueError('Some specs are missing.')
+                return self.featurizer.transform(data).to_numpy()
+            return self.featurizer.transform_records(specs)
+        except KeyError as err_key:
+            raise ValueError(f'Spec missing: {err_key}.') from err_key
+        except (TypeError, ValueError) as err_value:
+            raise ValueError(f'Spec not valid: {err_value}') from err_value
+
+    def assign(self, specs: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """Assign cars to the cluster of their nearest cluster center.
+
+        Args:
+            specs (Sequence[Mapping[str, Any]]): Specs of every car.
+
+        Raises:
+            ValueError: A spec is missing or not valid.
+
+        Returns:
+            np.ndarray: Cluster of every car.
+        """
+        features = self.featurize(specs)
+        # squared euclidean distance to every center, up to the car's squared norm
+        distances = self.center_sq_norms - 2 * features @ self.centers.T
+        return distances.argmin(axis=1)
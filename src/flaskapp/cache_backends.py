@@ -0,0 +1,164 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# a shared store drops its expired and oldest entries every this many writes
+EVICT_EVERY = 1000
+
+# errors of a backend whose storage is not available, e.g. a full disk or a locked
+# file, which its users should survive by computing the value instead
+CACHE_ERRORS = (OSError, sqlite3.Error)
+
+
+class CacheBackend:
+    """Base class of the key-value stores behind the caches of the app. Entries
+    expire `ttl_seconds` after they were written, and at most `max_entries` are
+    kept.
+
+    Args:
+        max_entries (int): Maximum number of entries.
+        ttl_seconds (float): Number of seconds an entry is valid for.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get an entry. Must be implemented by subclasses.
+
+        Args:
+            key (str): Key of the entry.
+
+        Returns:
+            Optional[bytes]: The value. None if there is no valid entry.
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes) -> None:
+        """Write an entry, replacing any previous value. Must be implemented by
+        subclasses.
+
+        Args:
+            key (str): Key of the entry.
+            value (bytes): The value.
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """In-process cache evicting the least recently used entries.
+
+    Args:
+        max_entries (int): Maximum number of entries.
+        ttl_seconds (float): Number of seconds an entry is valid for.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 86400):
+        super().__init__(max_entries, ttl_seconds)
+        self._entries: 'OrderedDict[str, Tuple[float, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """Cache in a local SQLite file, shared by all processes opening the same path,
+    e.g. the workers of the app. The file is in WAL mode, so that readers do not
+    block each other or the writer. Expired entries, then the oldest entries beyond
+    `max_entries`, are deleted every `EVICT_EVERY` writes of a process.
+
+    Args:
+        path (str): Path to the SQLite file.
+        max_entries (int): Maximum number of entries.
+        ttl_seconds (float): Number of seconds an entry is valid for.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, ttl_seconds: float = 86400):
+        super().__init__(max_entries, ttl_seconds)
+        self.path = path
+        self._local = threading.local()
+        self._n_writes = 0
+        self._n_writes_lock = threading.Lock()
+
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS cache ('
+                               'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                               'expires_at REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_cache_expires_at '
+                               'ON cache (expires_at)')
+        finally:
+            connection.close()
+        logger.info('Shared cache at %s.', path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connect().execute(
+            'SELECT value FROM cache WHERE key = ? AND expires_at > ?',
+            (key, time.time())).fetchone()
+        return None if row is None else row[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        self._connect().execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                                (key, value, time.time() + self.ttl_seconds))
+        with self._n_writes_lock:
+            self._n_writes += 1
+            is_evict_due = self._n_writes % EVICT_EVERY == 0
+        if is_evict_due:
+            self.evict()
+
+    def evict(self) -> None:
+        """Delete the expired entries, then the oldest entries beyond `max_entries`."""
+        connection = self._connect()
+        expired = connection.execute('DELETE FROM cache WHERE expires_at <= ?',
+                                     (time.time(),)).rowcount
+        # entries have the same time to live, so the first to expire are the oldest
+        evicted = connection.execute(
+            'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+            'ORDER BY expires_at DESC LIMIT -1 OFFSET ?)', (self.max_entries,)).rowcount
+        logger.debug('Deleted %s expired and %s evicted cache entries.', expired, evicted)
+
+    def __len__(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        # connections cannot be shared between threads, nor between forked workers
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
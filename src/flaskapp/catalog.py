@@ -0,0 +1,123 @@
+import gzip
+import json
+import logging
+from typing import Dict, List, NamedTuple
+
+from src.database.create_db import Cars  # type: ignore
+from src.flaskapp.data_index import DataIndex  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+CatalogTree = Dict[str, Dict[str, Dict[int, List[str]]]]
+
+
+class CatalogTables(NamedTuple):
+    """The catalog tree of the `Catalog`, and its json serialization."""
+    tree: CatalogTree
+    json: bytes
+    json_gzip: bytes
+
+
+class Catalog(DataIndex):
+    """Sorted maker -> model -> year -> body type tree of all cars in the database.
+
+    Serves the cascading dropdown lists of the index page from memory instead of
+    running a `SELECT DISTINCT` against the cars table for every selection. The
+    whole tree is also serialized to json once per data version, plain and gzipped,
+    so that it can be sent to the browser as is.
+    """
+
+    def build(self) -> CatalogTables:
+        """Query all distinct (maker, model, year, body type) keys and arrange them
+        into a tree. Every level keeps the order of the database.
+
+        Returns:
+            CatalogTables: The catalog tree and its json serialization.
+        """
+        keys = (
+            self.car_manager.session
+            .query(Cars.maker, Cars.genmodel, Cars.year, Cars.bodytype)
+            .distinct()
+            .order_by(Cars.maker, Cars.genmodel, Cars.year, Cars.bodytype)
+            .all()
+        )
+        logger.debug('Retrieved %s distinct car keys.', len(keys))
+
+        tree: CatalogTree = {}
+        for maker, model, year, bodytype in keys:
+            (tree
+             .setdefault(maker, {})
+             .setdefault(model, {})
+             .setdefault(year, [])
+             .append(bodytype))
+
+        # compact json, compressed once at the highest level since it is sent many times
+        tree_json = json.dumps(tree, separators=(',', ':')).encode()
+        tree_json_gzip = gzip.compress(tree_json, compresslevel=9, mtime=0)
+        logger.debug('Catalog json is %s bytes, %s bytes gzipped.',
+                     len(tree_json), len(tree_json_gzip))
+
+        return CatalogTables(tree=tree, json=tree_json, json_gzip=tree_json_gzip)
+
+    def to_json(self, compressed: bool = False) -> bytes:
+        """Get the whole catalog tree as json, e.g.
+        `{"Audi": {"A3": {"2018": ["Hatchback", "Saloon"]}}}`.
+
+        Args:
+            compressed (bool): If true, get the json gzipped.
+
+        Returns:
+            bytes: The serialized catalog tree.
+        """
+        tables = self.get()
+        return tables.json_gzip if compressed else tables.json
+
+    def makers(self) -> List[str]:
+        """Get all makers.
+
+        Returns:
+            List[str]: Sorted makers.
+        """
+        return list(self.get().tree)
+
+    def models(self, maker: str) -> List[str]:
+        """Get all models made by a maker.
+
+        Args:
+            maker (str): The maker.
+
+        Returns:
+            List[str]: Sorted models. Empty if the maker is unknown.
+        """
+        return list(self.get().tree.get(maker, {}))
+
+    def years(self, maker: str, model: str) -> List[int]:
+        """Get all years in which a model was made.
+
+        Args:
+            maker (str): The maker.
+            model (str): The model.
+
+        Returns:
+            List[int]: Sorted years. Empty if the model is unknown.
+        """
+        return list(self.get().tree.get(maker, {}).get(model, {}))
+
+    def bodytypes(self, maker: str, model: str, year: str) -> List[str]:
+        """Get all body types of a model made in a year.
+
+        Args:
+            maker (str): The maker.
+            model (str): The model.
+            year (str): The year, as received in the url.
+
+        Returns:
+            List[str]: Sorted body types. Empty if the car is unknown.
+        """
+        try:
+            year_int = int(year)
+        except ValueError:
+            logger.warning('Year is not an integer: %s', year)
+            return []
+
+        return list(self.get().tree.get(maker, {}).get(model, {}).get(year_int, []))
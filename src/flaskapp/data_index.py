@@ -0,0 +1,121 @@
+import logging
+import pickle
+import threading
+import time
+from typing import Any, Optional
+
+from src.database.add_cars import CarManager  # type: ignore
+from src.flaskapp.cache_backends import CACHE_ERRORS, CacheBackend  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class DataIndex:
+    """Base class of in-memory indexes built from the cars table.
+
+    The index is built on first use and rebuilt whenever the data version recorded
+    by `run_db.py ingest` changes. To keep the database out of the hot path, the
+    data version is looked up at most once every `refresh_seconds`.
+
+    If a shared `store` is given, a built index is saved there for its data
+    version, and other workers load it from the store instead of querying the
+    database. If the store fails, the index is built from the database.
+
+    Args:
+        car_manager (CarManager): Manage connection to the car database.
+        refresh_seconds (float): Minimum number of seconds between two data
+            version checks.
+        store (CacheBackend): Cache shared by the workers, e.g. a `SQLiteCache`.
+            Optional.
+    """
+
+    def __init__(self, car_manager: CarManager, refresh_seconds: float = 60,
+                 store: Optional[CacheBackend] = None):
+        self.car_manager = car_manager
+        self.refresh_seconds = refresh_seconds
+        self.store = store
+        self._data: Any = None
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[str]:
+        """Optional[str]: Data version the index was built from."""
+        return self._version
+
+    def get(self) -> Any:
+        """Get the index, rebuilding it first if the data version has changed. While
+        another thread checks the data version or rebuilds the index, the current
+        index is returned without waiting.
+
+        Returns:
+            Any: The index built by `build`.
+        """
+        data = self._data
+        if data is not None:
+            if not self._is_check_due():
+                return data
+            # keep serving the current index while another thread refreshes it
+            if not self._lock.acquire(blocking=False):
+                return data
+        else:
+            self._lock.acquire()
+
+        try:
+            # another thread may have refreshed the index while we were waiting
+            if self._data is not None and not self._is_check_due():
+                return self._data
+
+            version = self.car_manager.get_data_version()
+            if self._data is None or version != self._version:
+                logger.info('Building %s for data version %s...',
+                            type(self).__name__, version)
+                self._data = self._load_or_build(version)
+                self._version = version
+                logger.info('%s built.', type(self).__name__)
+            self._checked_at = time.monotonic()
+            return self._data
+        finally:
+            self._lock.release()
+
+    def invalidate(self) -> None:
+        """Drop the index so that it is rebuilt on next use."""
+        with self._lock:
+            self._data = None
+            self._version = None
+
+    def build(self) -> Any:
+        """Build the index from the cars table. Must be implemented by subclasses.
+
+        Returns:
+            Any: The index.
+        """
+        raise NotImplementedError
+
+    def _load_or_build(self, version: Optional[str]) -> Any:
+        # without a data version, a stored index could be outdated
+        if self.store is None or version is None:
+            return self.build()
+
+        key = f'index:{type(self).__name__}:{version}'
+        try:
+            snapshot = self.store.get(key)
+            if snapshot is not None:
+                data = pickle.loads(snapshot)
+                logger.info('Loaded %s from the shared cache.', type(self).__name__)
+                return data
+        except (*CACHE_ERRORS, pickle.UnpicklingError) as err_cache:
+            logger.warning('Not able to load %s from the shared cache, building it. '
+                           'Error: %s', type(self).__name__, err_cache)
+
+        data = self.build()
+        try:
+            self.store.set(key, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+        except CACHE_ERRORS as err_cache:
+            logger.warning('Not able to save %s to the shared cache. Error: %s',
+                           type(self).__name__, err_cache)
+        return data
+
+    def _is_check_due(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.refresh_seconds
@@ -0,0 +1,91 @@
+import functools
+import hashlib
+import json
+import logging
+from typing import Any, Callable, Optional
+
+import sqlalchemy.exc
+from flask import make_response, request, Response
+
+from src.flaskapp.data_index import DataIndex  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+def get_etag(index: DataIndex, *settings: Any) -> Optional[str]:
+    """Compute the ETag of responses that only depend on the data loaded at ingest
+    time and on some settings of the app.
+
+    Args:
+        index (DataIndex): Index the responses are served from. Its data version
+            changes with every `run_db.py ingest`.
+        *settings (Any): Settings of the app the responses depend on, e.g.
+            `MAX_ROWS_SHOW`.
+
+    Returns:
+        Optional[str]: The ETag. None if the data version is not known, in which
+            case the responses must not be cached.
+    """
+    try:
+        index.get()
+    except sqlalchemy.exc.SQLAlchemyError as err_sql:
+        logger.warning('Not able to get the data version, responses are not cached. '
+                       'Error: %s', err_sql)
+        return None
+
+    if index.version is None:
+        return None
+    key = json.dumps([index.version, *settings], default=str)
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def cache_by_etag(etag_func: Callable[[], Optional[str]],
+                  max_age: int,
+                  vary: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Make the GET responses of a view cacheable by browsers and proxies. Successful
+    responses get an ETag and a `Cache-Control` max-age, and requests whose
+    `If-None-Match` matches the ETag are answered with 304 without calling the view.
+    Error responses are not cached.
+
+    Args:
+        etag_func (Callable[[], Optional[str]]): Compute the current ETag, see
+            `get_etag`. If it returns None, responses are not cached.
+        max_age (int): Number of seconds responses may be reused without
+            revalidation. 0 sends `no-cache`, so that clients revalidate every
+            time and see new data as soon as the ETag changes.
+        vary (str): Request headers the response depends on, sent as the `Vary`
+            header, e.g. `Accept-Encoding`. Optional.
+
+    Returns:
+        Callable[[Callable[..., Any]], Callable[..., Any]]: The view decorator.
+    """
+    def decorator(view: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            etag = etag_func()
+            if etag is None:
+                return view(*args, **kwargs)
+
+            # proxies that compress responses send the etag back as weak
+            if request.if_none_match.contains_weak(etag):
+                logger.debug('ETag %s matched, returning 304.', etag)
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.cache_control.public = True
+            if max_age > 0:
+                response.cache_control.max_age = max_age
+            else:
+                response.cache_control.no_cache = True
+            if vary is not None:
+                response.vary.add(vary)
+            return response
+        return wrapper
+    return decorator
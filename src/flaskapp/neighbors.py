@@ -0,0 +1,101 @@
+import logging
+from typing import Dict, List
+
+import numpy as np
+
+from src.utils import io
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureNeighbors:
+    """Nearest-neighbour search over the standardized feature matrix.
+
+    The features generated by `featurize.featurize` are kept in memory as a
+    contiguous float32 array. A feature store (`.npy`) is memory mapped as is
+    instead, so that all web workers share one copy. Row i of the feature matrix
+    describes row i of the labeled data, which provides the car id, model and
+    cluster of every row.
+
+    Args:
+        feature_path (str): Path to the feature data.
+        labels_path (str): Path to the labeled data (clean data with cluster
+            assignment appended).
+        col_id (str): Name of the car id column in the labeled data.
+        col_model (str): Name of the car model column in the labeled data.
+        col_cluster (str): Name of the cluster assignment column in the labeled data.
+    """
+
+    def __init__(self, feature_path: str, labels_path: str,
+                 col_id: str = 'car_id',
+                 col_model: str = 'genmodel',
+                 col_cluster: str = 'cluster'):
+        labels = io.read_pandas(labels_path, columns=[col_id, col_model, col_cluster])
+        self.car_ids = labels[col_id].astype(str).to_numpy()
+
+        if io.get_file_format(feature_path) == 'npy':
+            self.features, manifest = io.read_feature_store(feature_path)
+            if (manifest['car_ids'] is not None
+                    and not np.array_equal(manifest['car_ids'], self.car_ids)):
+                raise ValueError('Feature store and labels are not aligned.')
+        else:
+            feature = io.read_pandas(feature_path)
+            self.features = np.ascontiguousarray(feature.to_numpy(dtype=np.float32))
+        if len(self.features) != len(labels):
+            raise ValueError(
+                f'Features ({len(self.features)} rows) and labels ({len(labels)} rows) '
+                'are not aligned.')
+
+        self.sq_norms = np.einsum('ij,ij->i', self.features, self.features)
+        self.models = labels[col_model].to_numpy()
+        self.clusters = labels[col_cluster].to_numpy()
+
+        self._row_of: Dict[str, int] = {
+            car_id: row for row, car_id in enumerate(self.car_ids)}
+        self._cluster_rows: Dict[int, np.ndarray] = {
+            cluster: np.flatnonzero(self.clusters == cluster)
+            for cluster in np.unique(self.clusters)}
+        logger.info('Loaded %s x %s feature matrix for nearest-neighbour search.',
+                    *self.features.shape)
+
+    def query(self, car_id: str, k: int, same_cluster: bool = True) -> List[str]:
+        """Find the cars closest to a given car. Cars of the same model as the
+        given car are never returned.
+
+        Args:
+            car_id (str): Id of the car.
+            k (int): Number of neighbours to return.
+            same_cluster (bool): If true, only search the cluster of the given car.
+
+        Raises:
+            ValueError: The car id is not in the feature matrix.
+
+        Returns:
+            List[str]: Ids of the neighbours, closest first.
+        """
+        try:
+            row = self._row_of[str(car_id)]
+        except KeyError as err_key:
+            raise ValueError(f'Car {car_id} has no features.') from err_key
+
+        # candidate rows: the car's cluster or the whole matrix, minus the same model
+        if same_cluster:
+            candidates = self._cluster_rows[self.clusters[row]]
+        else:
+            candidates = np.arange(len(self.features))
+        candidates = candidates[self.models[candidates] != self.models[row]]
+
+        # squared euclidean distance, up to the query's constant squared norm
+        distances = (self.sq_norms[candidates]
+                     - 2 * self.features[candidates] @ self.features[row])
+
+        # partial sort: only the candidates within the k-th smallest distance are
+        # fully ordered. Ties, e.g. cars with identical specs, keep the row order.
+        if k < len(candidates):
+            kth_distance = np.partition(distances, k - 1)[k - 1]
+            top = np.flatnonzero(distances <= kth_distance)
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.lexsort((top, distances[top]))][:k]
+
+        return self.car_ids[candidates[top]].tolist()
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+from src.flaskapp.cache_backends import CACHE_ERRORS, CacheBackend  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class PageCache:
+    """Cache of rendered pages, in memory and optionally in a store shared by all
+    workers of the app (and `flask warm-page-cache`).
+
+    Pages are stored under a version, which must change whenever the pages would
+    render differently (e.g. the data version and the settings of the app), and a
+    key identifying the page within the version. Pages of older versions are never
+    deleted when serving requests; they are evicted by the backends like any other
+    entry. If the shared cache fails, pages are served as if it were not set.
+
+    Args:
+        local (CacheBackend): In-process cache, e.g. a `MemoryCache`.
+        shared (CacheBackend): Cache shared by the workers, e.g. a `SQLiteCache`.
+            Pages missing from `local` are looked up there. Optional.
+    """
+
+    def __init__(self, local: CacheBackend, shared: Optional[CacheBackend] = None):
+        self.local = local
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, version: str, key: Sequence[Any]) -> Optional[str]:
+        """Get a page.
+
+        Args:
+            version (str): Version of the pages.
+            key (Sequence[Any]): Key of the page, e.g. the inputs of the form.
+
+        Returns:
+            Optional[str]: The page. None if it is not cached.
+        """
+        digest = self._get_digest(version, key)
+        page = self.local.get(digest)
+        if page is None and self.shared is not None:
+            try:
+                page = self.shared.get(digest)
+            except CACHE_ERRORS as err_cache:
+                logger.warning('Not able to read the shared page cache: %s', err_cache)
+            if page is not None:
+                self.local.set(digest, page)
+
+        with self._lock:
+            if page is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return page.decode()
+
+    def set(self, version: str, key: Sequence[Any], page: str) -> None:
+        """Store a page.
+
+        Args:
+            version (str): Version of the pages.
+            key (Sequence[Any]): Key of the page, e.g. the inputs of the form.
+            page (str): The rendered page.
+        """
+        digest = self._get_digest(version, key)
+        value = page.encode()
+        self.local.set(digest, value)
+        if self.shared is not None:
+            try:
+                self.shared.set(digest, value)
+            except CACHE_ERRORS as err_cache:
+                logger.warning('Not able to write the shared page cache: %s', err_cache)
+
+    def stats(self) -> Dict[str, int]:
+        """Get the counters of the cache.
+
+        Returns:
+            Dict[str, int]: Number of hits, misses and pages in memory.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.local)}
+
+    @staticmethod
+    def _get_digest(version: str, key: Sequence[Any]) -> str:
+        digest = hashlib.sha256(json.dumps([version, *key], default=str).encode())
+        return 'page:' + digest.hexdigest()
@@ -1,13 +1,136 @@
+import itertools
 import logging
-from typing import Tuple, List
+from typing import Any, Dict, Iterator, Tuple, List, NamedTuple, Optional
 
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Query
 
 from src.database.create_db import Cars  # type: ignore
 from src.database.add_cars import CarManager  # type: ignore
+from src.flaskapp.data_index import DataIndex  # type: ignore
+from src.flaskapp.neighbors import FeatureNeighbors  # type: ignore
 
 logger = logging.getLogger(__name__)
 
+CarKey = Tuple[str, str, int, str]
+
+
+class RecommendationTables(NamedTuple):
+    """Lookup tables of the `RecommendationIndex`."""
+    by_key: Dict[CarKey, Row]
+    by_id: Dict[str, Row]
+    by_cluster: Dict[int, List[Row]]
+
+
+class RecommendationIndex(DataIndex):
+    """Precomputed lookup tables for recommendations.
+
+    Maps every (maker, model, year, body type) key to its car, and every cluster
+    to its members sorted by maker, model and year. Since the cluster assignments
+    are fixed at ingest time, recommending becomes two dictionary lookups.
+    """
+
+    def build(self) -> RecommendationTables:
+        """Load all cars and group them by key, by id and by cluster.
+
+        Returns:
+            RecommendationTables: The lookup tables.
+        """
+        cars = (
+            self.car_manager.session
+            .query(*Cars.__table__.columns)
+            .order_by(Cars.maker, Cars.genmodel, Cars.year)
+            .all()
+        )
+        logger.debug('Retrieved %s cars.', len(cars))
+
+        tables = RecommendationTables(by_key={}, by_id={}, by_cluster={})
+        for car in cars:
+            tables.by_key.setdefault(
+                (car.maker, car.genmodel, car.year, car.bodytype), car)
+            tables.by_id[str(car.car_id)] = car
+            tables.by_cluster.setdefault(car.cluster, []).append(car)
+
+        return tables
+
+    def get_car(self, maker: str, model: str, year: int, bodytype: str) -> Row:
+        """Get the car of a (maker, model, year, body type) key.
+
+        Args:
+            maker (str): Manufacturer of the car.
+            model (str): Specific model of the car.
+            year (int): Year of production.
+            bodytype (str): Body type of the car.
+
+        Raises:
+            ValueError: No such car in the database.
+
+        Returns:
+            Row: The car.
+        """
+        try:
+            return self.get().by_key[(maker, model, year, bodytype)]
+        except KeyError as err_key:
+            raise ValueError(
+                f'No car found for {maker} {model} {year} {bodytype}.') from err_key
+
+    def get_cars_by_id(self, car_ids: List[str]) -> List[Row]:
+        """Get cars by their ids. Unknown ids are skipped.
+
+        Args:
+            car_ids (List[str]): Ids of the cars.
+
+        Returns:
+            List[Row]: The cars, in the order of `car_ids`.
+        """
+        by_id = self.get().by_id
+        return [by_id[car_id] for car_id in car_ids if car_id in by_id]
+
+    def get_cluster(self, cluster: int) -> List[Row]:
+        """Get all cars of a cluster.
+
+        Args:
+            cluster (int): The cluster.
+
+        Returns:
+            List[Row]: Cars sorted by maker, model and year.
+        """
+        return self.get().by_cluster.get(cluster, [])
+
+
+def get_cluster_recommendation(index: RecommendationIndex,
+                               cluster: int,
+                               max_rows: int,
+                               model: Optional[str] = None) -> List[Row]:
+    """Recommend the cars of a cluster, sorted by maker, model and year.
+
+    Args:
+        index (RecommendationIndex): Precomputed lookup tables.
+        cluster (int): The cluster.
+        max_rows (int): Maximum number of recommendations.
+        model (str): Cars of this model are not recommended. Optional.
+
+    Returns:
+        List[Row]: The recommended cars.
+    """
+    # skip cars of the same model in the pre-sorted cluster
+    return list(itertools.islice(
+        (car for car in index.get_cluster(cluster) if car.genmodel != model),
+        max_rows
+    ))
+
+
+def car_to_dict(car: Row) -> Dict[str, Any]:
+    """Convert a car to a json serializable dictionary.
+
+    Args:
+        car (Row): The car.
+
+    Returns:
+        Dict[str, Any]: Value of every column of the car.
+    """
+    return dict(car._mapping)
+
 
 def validate_input(maker: str,
                    model: str,
@@ -41,8 +164,14 @@ def get_recommendation(car_manager: CarManager,
                        model: str,
                        year: int,
                        bodytype: str,
-                       max_rows: int) -> Tuple[Query, List[Query]]:
-    """Recommend cars from the same cluster as the input.
+                       max_rows: int,
+                       index: Optional[RecommendationIndex] = None,
+                       neighbors: Optional[FeatureNeighbors] = None,
+                       same_cluster: bool = True
+                       ) -> Tuple[List[Query], Query]:
+    """Recommend cars similar to the input. By default, recommend cars from the
+    same cluster as the input, sorted by maker, model and year. If `neighbors` is
+    given, recommend the nearest cars in feature space instead, closest first.
 
     Args:
         car_manager (CarManager): Manage connection to the car database.
@@ -51,28 +180,66 @@ def get_recommendation(car_manager: CarManager,
         year (int): Year of production.
         bodytype (str): Body type of the car.
         max_rows (int): Maximum number of recommendations to be displayed.
+        index (RecommendationIndex): Precomputed lookup tables. If given, the
+            recommendations are served from memory. Optional.
+        neighbors (FeatureNeighbors): Nearest-neighbour search over the features.
+            If given, recommendations are ranked by similarity. Optional.
+        same_cluster (bool): Only used with `neighbors`. If true, only recommend
+            cars from the same cluster as the input.
+
+    Raises:
+        ValueError: The dream car is not in the database.
 
     Returns:
-        Query: The dream car row.
         List[Query]: The recommended cars.
+        Query: The dream car row.
     """
     logger.debug('Recommending by: %s, %s, %s, %s',
                  maker, model, year, bodytype)
 
     # get full specification of the input cars for display
-    dream_car = (
-        car_manager.session
-        .query(Cars)
-        .filter(Cars.maker == maker,
-                Cars.genmodel == model,
-                Cars.year == year,
-                Cars.bodytype == bodytype)
-        .all()
-    )[0]
+    if index is not None:
+        dream_car = index.get_car(maker, model, year, bodytype)
+    else:
+        dream_cars = (
+            car_manager.session
+            .query(Cars)
+            .filter(Cars.maker == maker,
+                    Cars.genmodel == model,
+                    Cars.year == year,
+                    Cars.bodytype == bodytype)
+            .limit(1)
+            .all()
+        )
+        if not dream_cars:
+            raise ValueError(f'No car found for {maker} {model} {year} {bodytype}.')
+        dream_car = dream_cars[0]
+
+    # rank cars by distance to the dream car in feature space
+    if neighbors is not None:
+        car_ids = neighbors.query(dream_car.car_id, max_rows, same_cluster)
+        logger.debug('Nearest neighbours: %s', car_ids)
+        if index is not None:
+            return index.get_cars_by_id(car_ids), dream_car
+
+        cars_by_id = {
+            str(car.car_id): car for car in (
+                car_manager.session
+                .query(Cars)
+                .filter(Cars.car_id.in_(car_ids))
+                .all()
+            )
+        }
+        car_recommend = [cars_by_id[car_id] for car_id in car_ids
+                         if car_id in cars_by_id]
+        return car_recommend, dream_car
 
     # retrieve cluster from saved prediction data
     cluster = dream_car.cluster
 
+    if index is not None:
+        return get_cluster_recommendation(index, cluster, max_rows, model), dream_car
+
     # get cars in the same cluster as recommendations
     car_recommend = (
         car_manager.session
@@ -84,3 +251,53 @@ def get_recommendation(car_manager: CarManager,
     )
 
     return car_recommend, dream_car
+
+
+def get_batch_recommendation(index: RecommendationIndex,
+                             keys: List[CarKey],
+                             max_rows: int,
+                             neighbors: Optional[FeatureNeighbors] = None,
+                             same_cluster: bool = True
+                             ) -> Iterator[Tuple[CarKey, Optional[Row], List[Row],
+                                                 Optional[str]]]:
+    """Recommend cars similar to each of many inputs, like `get_recommendation`.
+    All inputs are looked up in the in-memory index, and the recommendations of
+    every (cluster, model) pair are only computed once.
+
+    Args:
+        index (RecommendationIndex): Precomputed lookup tables.
+        keys (List[CarKey]): The (maker, model, year, body type) of every input.
+        max_rows (int): Maximum number of recommendations per input.
+        neighbors (FeatureNeighbors): Nearest-neighbour search over the features.
+            If given, recommendations are ranked by similarity. Optional.
+        same_cluster (bool): Only used with `neighbors`. If true, only recommend
+            cars from the same cluster as the input.
+
+    Yields:
+        Tuple[CarKey, Optional[Row], List[Row], Optional[str]]: Every input key with
+            its dream car, recommendations and error message, in the order of
+            `keys`. The dream car is None if the key is not in the database. The
+            error is None unless the input cannot be recommended for, in which case
+            there are no recommendations.
+    """
+    by_key = index.get().by_key
+    by_cluster: Dict[Tuple[int, str], List[Row]] = {}
+    for key in keys:
+        dream_car = by_key.get(key)
+        if dream_car is None:
+            yield key, None, [], 'No car found for {} {} {} {}.'.format(*key)
+        elif neighbors is not None:
+            try:
+                car_ids = neighbors.query(dream_car.car_id, max_rows, same_cluster)
+            except ValueError as err_value:
+                # e.g. the car was ingested after the features were generated
+                logger.warning('Not able to recommend for %s: %s', key, err_value)
+                yield key, dream_car, [], str(err_value)
+                continue
+            yield key, dream_car, index.get_cars_by_id(car_ids), None
+        else:
+            group = (dream_car.cluster, dream_car.genmodel)
+            if group not in by_cluster:
+                by_cluster[group] = get_cluster_recommendation(
+                    index, dream_car.cluster, max_rows, dream_car.genmodel)
+            yield key, dream_car, by_cluster[group], None
@@ -0,0 +1,75 @@
+import hashlib
+import logging
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from src.utils import io
+
+logger = logging.getLogger(__name__)
+
+
+def get_fingerprint(feature: pd.DataFrame, chunksize: int = 100000) -> Dict[str, Any]:
+    """Fingerprint a feature data frame, to tell whether a model was trained on it.
+
+    Args:
+        feature (pd.DataFrame): The features.
+        chunksize (int): Number of rows hashed at a time.
+
+    Returns:
+        Dict[str, Any]: Sha256 hash of the values, shape and columns of the features.
+    """
+    values = feature.to_numpy()
+    digest = hashlib.sha256(str(values.dtype).encode())
+    for start in range(0, len(values), chunksize):
+        digest.update(np.ascontiguousarray(values[start:start + chunksize]).data)
+
+    return {'sha256': digest.hexdigest(),
+            'shape': list(feature.shape),
+            'columns': [str(column) for column in feature.columns]}
+
+
+def assign_clusters(model: sklearn.base.BaseEstimator,
+                    model_path: str,
+                    feature: pd.DataFrame,
+                    chunksize: int = 100000) -> np.ndarray:
+    """Get the cluster of every row of the features. If they are the features the
+    model was trained on, according to the fingerprint saved by `train`, the
+    assignment of the model (`labels_`) is returned as is. Otherwise the clusters
+    are predicted chunk by chunk, each chunk cast to the data type of the cluster
+    centers.
+
+    Args:
+        model (sklearn.base.BaseEstimator): The clustering model.
+        model_path (str): Path where the model is saved.
+        feature (pd.DataFrame): The features.
+        chunksize (int): Number of rows predicted at a time.
+
+    Returns:
+        np.ndarray: Cluster of every row.
+    """
+    metadata = io.load_model_metadata(model_path) or {}
+    fingerprint = metadata.get('fingerprint')
+    labels = getattr(model, 'labels_', None)
+
+    # compare the cheap parts of the fingerprint before hashing the features
+    if (fingerprint is not None and labels is not None
+            and len(labels) == len(feature)
+            and fingerprint['shape'] == list(feature.shape)
+            and fingerprint['columns'] == [str(column) for column in feature.columns]
+            and fingerprint == get_fingerprint(feature)):
+        logger.info('Features are the training features, reusing the cluster '
+                    'assignment of the model.')
+        return labels
+
+    logger.info('Predicting clusters in chunks of %s rows.', chunksize)
+    # k-means only predicts features of the data type of its centers, e.g. a
+    # float32 feature store for a model trained on float64 csv features
+    dtype = model.cluster_centers_.dtype
+    if len(feature) == 0:
+        return model.predict(feature.astype(dtype, copy=False))
+    chunks = (feature.iloc[start:start + chunksize].astype(dtype, copy=False)
+              for start in range(0, len(feature), chunksize))
+    return np.concatenate([model.predict(chunk) for chunk in chunks])
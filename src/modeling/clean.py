@@ -1,5 +1,5 @@
 import logging
-from typing import Union, Callable
+from typing import Dict, Optional, Union, Callable
 
 import pandas as pd
 
@@ -37,6 +37,91 @@ def clean(data: pd.DataFrame,
     logger.info('Start Cleaning...')
     logger.debug('Raw data dimension %s', data.shape)
 
+    # reformat, rename and transform columns, then drop na's
+    data = prepare_rows(data, transformation, rename_map)
+
+    # aggregate raw data by keys
+    df_output = aggregate_by_keys(data, aggregation, new_index)
+
+    logger.info('Finish Cleaning.')
+    return df_output
+
+
+def clean_chunked(input_path: str,
+                  chunksize: int,
+                  transformation: dict,
+                  aggregation: dict,
+                  rename_map: dict,
+                  new_index: str) -> pd.DataFrame:
+    """Streaming version of `clean` for raw files larger than memory. The raw csv
+    is read in chunks of `chunksize` rows. Row-level transformations are applied
+    to every chunk, and the group aggregates of all chunks are merged: sums and
+    counts for `mean`, value counts for `mode` and the first seen row for `first`.
+    Memory use is bounded by the size of a chunk plus the number of groups.
+
+    The columns to be transformed are read as strings, as they would be by
+    `clean` when they contain non-numeric values.
+
+    Args:
+        input_path (str): Path to the raw data.
+        chunksize (int): Number of raw rows processed at a time.
+        transformation (dict): Transformations strategy. See `clean`.
+        aggregation (dict): Aggregation strategy. See `clean`.
+        rename_map (dict): Keys are the columns to be renamed. Values are the new
+            names.
+        new_index (str): Name of the new index.
+
+    Returns:
+        pd.DataFrame: Cleaned data, identical to the output of `clean`. Empty if
+            no rows are left after cleaning.
+    """
+    logger.info('Start Cleaning in chunks of %s rows...', chunksize)
+
+    # read the transformed columns as strings in every chunk
+    str_cols = (set(transformation['vars_strip_numeric'])
+                | set(transformation['vars_drop_non_numeric_rows']))
+    raw_cols = pd.read_csv(input_path, nrows=0).columns
+    dtype = {col: str for col in raw_cols
+             if rename_map.get(col.strip().lower(), col.strip().lower()) in str_cols}
+
+    partial = None
+    n_rows = 0
+    for chunk in io.read_pandas_chunks(input_path, chunksize=chunksize, dtype=dtype):
+        n_rows += len(chunk)
+        chunk = prepare_rows(chunk, transformation, rename_map)
+        logger.debug('Processed %s raw rows.', n_rows)
+        if chunk.empty:
+            continue
+        partial = combine_partial_aggregates(
+            partial, partial_aggregate(chunk, aggregation))
+
+    if partial is None:
+        # the raw data is empty or every row was dropped
+        logger.warning('No rows left after cleaning %s.', input_path)
+        columns = aggregation['key_cols'] + list(aggregation['agg_cols_transforms'])
+        partial = partial_aggregate(pd.DataFrame(columns=columns, dtype=float), aggregation)
+
+    df_output = finalize_partial_aggregates(partial, aggregation, new_index)
+
+    logger.info('Finish Cleaning.')
+    return df_output
+
+
+def prepare_rows(data: pd.DataFrame,
+                 transformation: dict,
+                 rename_map: dict) -> pd.DataFrame:
+    """Apply the row-level cleaning steps: reformat and rename columns,
+    transform variables and drop rows with missing values.
+
+    Args:
+        data (pd.DataFrame): Raw data.
+        transformation (dict): User specified transformations (in config.yml).
+        rename_map (dict): Keys are the columns to be renamed. Values are the new
+            names.
+
+    Returns:
+        pd.DataFrame: Row-level cleaned data.
+    """
     # reformat column names
     data.columns = [col.strip().lower() for col in data.columns]
 
@@ -47,13 +132,7 @@ def clean(data: pd.DataFrame,
     data = transform_vars(data, transformation)
 
     # drop na's
-    data = data.dropna()
-
-    # aggregate raw data by keys
-    df_output = aggregate_by_keys(data, aggregation, new_index)
-
-    logger.info('Finish Cleaning.')
-    return df_output
+    return data.dropna()
 
 
 def transform_vars(data: pd.DataFrame,
@@ -103,15 +182,28 @@ def aggregate_by_keys(data: pd.DataFrame,
     """
     logger.info('Aggregating data by specified keys.')
 
-    # map transform methods to transform functions
+    key_cols = aggregation['key_cols']
+    agg_cols_transforms = aggregation['agg_cols_transforms']
+
+    # map transform methods to transform functions. `mode` columns are
+    # aggregated separately from grouped value counts, which avoids calling a
+    # python function for every group.
     agg_cols_transforms_funcs = {k: method_to_func(
-        v) for k, v in aggregation['agg_cols_transforms'].items()}
+        v) for k, v in agg_cols_transforms.items() if v != 'mode'}
 
     # aggregate raw data by keys
+    grouped = data.groupby(key_cols)
+    if agg_cols_transforms_funcs:
+        df_agg = grouped.agg(agg_cols_transforms_funcs)
+    else:
+        df_agg = pd.DataFrame(index=grouped.size().index)
+    for col, method in agg_cols_transforms.items():
+        if method == 'mode':
+            df_agg[col] = mode_from_counts(
+                data.groupby(key_cols + [col]).size(), key_cols, col)
+
     df_output = (
-        data
-        .groupby(aggregation['key_cols'])
-        .agg(agg_cols_transforms_funcs)
+        df_agg[list(agg_cols_transforms)]
         .reset_index()
         .reset_index(drop=False)
         .rename(columns={'index': new_index})
@@ -126,6 +218,131 @@ def aggregate_by_keys(data: pd.DataFrame,
     return df_output
 
 
+def partial_aggregate(data: pd.DataFrame,
+                      aggregation: dict) -> Dict[str, Union[pd.DataFrame, pd.Series]]:
+    """Aggregate a chunk of data into mergeable partial results: the first row of
+    every group for `first`, sums and counts for `mean`, and value counts for `mode`.
+
+    Args:
+        data (pd.DataFrame): Row-level cleaned chunk.
+        aggregation (dict): A dictionary specifying how each column will be transformed.
+
+    Returns:
+        Dict[str, Union[pd.DataFrame, pd.Series]]: Partial results. Keys are
+            `first`, `sum`, `count`, and `mode:<column>` for every mode column.
+    """
+    key_cols = aggregation['key_cols']
+    methods = aggregation['agg_cols_transforms']
+    first_cols = [col for col, method in methods.items() if method == 'first']
+    mean_cols = [col for col, method in methods.items() if method == 'mean']
+
+    grouped = data.groupby(key_cols)
+    partial = {
+        'first': grouped[first_cols].first(),
+        'sum': grouped[mean_cols].sum(),
+        'count': grouped[mean_cols].count(),
+    }
+    for col, method in methods.items():
+        if method == 'mode':
+            partial['mode:' + col] = data.groupby(key_cols + [col]).size()
+
+    return partial
+
+
+def combine_partial_aggregates(
+        left: Optional[Dict[str, Union[pd.DataFrame, pd.Series]]],
+        right: Dict[str, Union[pd.DataFrame, pd.Series]]
+) -> Dict[str, Union[pd.DataFrame, pd.Series]]:
+    """Merge the partial results of two consecutive chunks.
+
+    Args:
+        left (Dict[str, Union[pd.DataFrame, pd.Series]]): Partial results of the
+            earlier chunks. None for the first chunk.
+        right (Dict[str, Union[pd.DataFrame, pd.Series]]): Partial results of the
+            later chunk.
+
+    Returns:
+        Dict[str, Union[pd.DataFrame, pd.Series]]: Merged partial results.
+    """
+    if left is None:
+        return right
+
+    combined = {}
+    for name, left_part in left.items():
+        grouped = (pd.concat([left_part, right[name]])
+                   .groupby(level=list(range(left_part.index.nlevels))))
+        # keep the earlier chunk's row for `first`, add up everything else
+        combined[name] = grouped.first() if name == 'first' else grouped.sum()
+
+    return combined
+
+
+def finalize_partial_aggregates(partial: Dict[str, Union[pd.DataFrame, pd.Series]],
+                                aggregation: dict,
+                                new_index: str) -> pd.DataFrame:
+    """Compute the aggregated data from merged partial results. The output has
+    the same layout as the output of `aggregate_by_keys`.
+
+    Args:
+        partial (Dict[str, Union[pd.DataFrame, pd.Series]]): Merged partial results.
+        aggregation (dict): A dictionary specifying how each column will be transformed.
+        new_index (str): Name of the index of the aggregated data.
+
+    Returns:
+        pd.DataFrame: Aggregated data.
+    """
+    key_cols = aggregation['key_cols']
+
+    columns = {}
+    for col, method in aggregation['agg_cols_transforms'].items():
+        if method == 'first':
+            columns[col] = partial['first'][col]
+        elif method == 'mean':
+            columns[col] = partial['sum'][col] / partial['count'][col]
+        elif method == 'mode':
+            columns[col] = mode_from_counts(partial['mode:' + col], key_cols, col)
+
+    df_output = (
+        pd.DataFrame(columns)
+        .sort_index()
+        .rename_axis(key_cols)
+        .reset_index()
+        .reset_index(drop=False)
+        .rename(columns={'index': new_index})
+    )
+
+    # archive key_columns
+    io.write_pandas_to_csv(pd.Series(key_cols), aggregation['key_path'])
+
+    logger.info('Aggregation completed.')
+    return df_output
+
+
+def mode_from_counts(counts: pd.Series, key_cols: list, col: str) -> pd.Series:
+    """Pick the most frequent value of every group from value counts. Ties are
+    broken by taking the smallest value, like `pd.Series.mode(x)[0]`.
+
+    Args:
+        counts (pd.Series): Number of rows of every (keys, value) pair, indexed by
+            `key_cols + [col]`.
+        key_cols (list): Key columns.
+        col (str): Column of the values.
+
+    Returns:
+        pd.Series: The mode of every group, indexed by `key_cols`.
+    """
+    return (
+        counts
+        .rename('count')
+        .reset_index()
+        .sort_values(key_cols + ['count', col],
+                     ascending=[True] * len(key_cols) + [False, True],
+                     kind='mergesort')
+        .drop_duplicates(key_cols)
+        .set_index(key_cols)[col]
+    )
+
+
 def method_to_func(method_string: str) -> Union[Callable, str]:
     """Map transformation method strings to transformation functions.
 
@@ -140,5 +357,6 @@ def method_to_func(method_string: str) -> Union[Callable, str]:
     if method_string == 'first':
         return 'first'
     if method_string == 'mode':
-        # return pd.Series.mode
+        # `aggregate_by_keys` computes modes with `mode_from_counts` instead,
+        # which is much faster on large data
         return lambda x: pd.Series.mode(x)[0]
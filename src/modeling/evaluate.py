@@ -1,9 +1,14 @@
-from typing import List
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 import logging
 import sys
+import time
 
+import numpy as np
 import pandas as pd
+import sklearn
+from scipy import sparse, stats
 from sklearn.metrics import silhouette_score
+from src.modeling.assign import assign_clusters
 from src.utils.io import load_model, read_pandas
 
 
@@ -12,7 +17,8 @@ logger = logging.getLogger(__name__)
 
 def evaluate(model_path: str,
              feature_path: str,
-             metrics: List[str]) -> pd.DataFrame:
+             metrics: List[str],
+             silhouette: Optional[dict] = None) -> pd.DataFrame:
     """Evaluate model performance using user specified metrics. Load model from
     model path. Load feature from feature path. Then calculate all evaluation metrics.
 
@@ -20,6 +26,7 @@ def evaluate(model_path: str,
         model_path (str): Path where the model is saved.
         feature_path (str): Path where the feature is saved.
         metrics (List[str]): A list of metrics to be computed
+        silhouette (dict): Options of the silhouette metric, see `compute_silhouette`.
 
     Returns:
         pd.DataFrame: Evaluation results.
@@ -33,8 +40,28 @@ def evaluate(model_path: str,
     feature = read_pandas(feature_path)
     logger.info('Features loaded.')
 
+    return evaluate_model(model, model_path, feature, metrics, silhouette)
+
+
+def evaluate_model(model: sklearn.base.BaseEstimator,
+                   model_path: str,
+                   feature: pd.DataFrame,
+                   metrics: List[str],
+                   silhouette: Optional[dict] = None) -> pd.DataFrame:
+    """Evaluate a loaded model on its features using user specified metrics.
+
+    Args:
+        model (sklearn.base.BaseEstimator): The clustering model.
+        model_path (str): Path where the model is saved.
+        feature (pd.DataFrame): The features.
+        metrics (List[str]): A list of metrics to be computed
+        silhouette (dict): Options of the silhouette metric, see `compute_silhouette`.
+
+    Returns:
+        pd.DataFrame: Evaluation results.
+    """
     # get cluster assignment
-    cluster_assignment = model.predict(feature)
+    cluster_assignment = assign_clusters(model, model_path, feature)
     logger.info('Retrieving cluster assignments from model.')
 
     # check if metrics are specified.
@@ -45,14 +72,380 @@ def evaluate(model_path: str,
         sys.exit(1)
 
     # get evaluation results for all metrics
+    df_result = compute_metrics(feature, cluster_assignment, metrics, silhouette,
+                                getattr(model, 'cluster_centers_', None))
+    logger.info('Evaluation wrapped into data frame.')
+
+    return df_result
+
+
+class ClusterStats(NamedTuple):
+    """Per-cluster sums of the features, from which the centroid metrics are
+    computed without pairwise distances."""
+    sizes: np.ndarray
+    """Number of rows of every cluster."""
+    centroids: np.ndarray
+    """Centroid of every cluster, e.g. the cluster centers of the model."""
+    means: np.ndarray
+    """Mean of the rows of every cluster."""
+    dist_sums: np.ndarray
+    """Sum of the distances of the rows of every cluster to its centroid."""
+    sq_dist_sums: np.ndarray
+    """Sum of the squared distances of the rows of every cluster to its centroid."""
+
+
+def get_cluster_stats(feature: pd.DataFrame,
+                      cluster_assignment: np.ndarray,
+                      centroids: Optional[np.ndarray] = None,
+                      chunksize: int = 100000) -> ClusterStats:
+    """Accumulate the per-cluster sums of the features in one pass over them.
+
+    Args:
+        feature (pd.DataFrame): Features the model was fitted on.
+        cluster_assignment (np.ndarray): Cluster of every row of the features.
+        centroids (np.ndarray): Centroid of every cluster label, e.g. the cluster
+            centers of a KMeans model. If None, the cluster means are computed
+            first, which takes one more pass.
+        chunksize (int): Number of rows processed at a time.
+
+    Returns:
+        ClusterStats: Per-cluster sums of the features.
+    """
+    values = np.asarray(feature)
+    clusters, codes = np.unique(cluster_assignment, return_inverse=True)
+    n_clusters = len(clusters)
+
+    if centroids is None:
+        logger.debug('No centroids given, computing the cluster means first.')
+        sums = np.zeros((n_clusters, values.shape[1]))
+        for start in range(0, len(values), chunksize):
+            block_codes = codes[start:start + chunksize]
+            sums += _one_hot(block_codes, n_clusters).T @ values[start:start + chunksize]
+        centroids = sums / np.bincount(codes, minlength=n_clusters)[:, None]
+    else:
+        centroids = np.asarray(centroids, dtype=np.float64)[clusters]
+
+    sizes = np.zeros(n_clusters)
+    sums = np.zeros((n_clusters, values.shape[1]))
+    dist_sums = np.zeros(n_clusters)
+    sq_dist_sums = np.zeros(n_clusters)
+    for start in range(0, len(values), chunksize):
+        block = np.asarray(values[start:start + chunksize], dtype=np.float64)
+        block_codes = codes[start:start + chunksize]
+
+        diff = block - centroids[block_codes]
+        sq_dists = np.einsum('ij,ij->i', diff, diff)
+        sizes += np.bincount(block_codes, minlength=n_clusters)
+        sums += _one_hot(block_codes, n_clusters).T @ block
+        dist_sums += np.bincount(block_codes, np.sqrt(sq_dists), minlength=n_clusters)
+        sq_dist_sums += np.bincount(block_codes, sq_dists, minlength=n_clusters)
+
+    return ClusterStats(sizes=sizes, centroids=centroids, means=sums / sizes[:, None],
+                        dist_sums=dist_sums, sq_dist_sums=sq_dist_sums)
+
+
+def _one_hot(codes: np.ndarray, n_clusters: int) -> sparse.csr_matrix:
+    return sparse.csr_matrix((np.ones(len(codes)), (np.arange(len(codes)), codes)),
+                             shape=(len(codes), n_clusters))
+
+
+def inertia(cluster_stats: ClusterStats) -> Dict[str, float]:
+    """Sum of the squared distances of all rows to their centroid."""
+    return {'inertia': cluster_stats.sq_dist_sums.sum()}
+
+
+def davies_bouldin(cluster_stats: ClusterStats) -> Dict[str, float]:
+    """Davies-Bouldin index: the mean, over clusters, of the largest ratio of
+    within-cluster to between-centroid distances. Lower is better."""
+    if len(cluster_stats.sizes) < 2:
+        raise ValueError('Davies-Bouldin index needs at least 2 clusters.')
+    scatter = cluster_stats.dist_sums / cluster_stats.sizes
+    diff = cluster_stats.centroids[:, None, :] - cluster_stats.centroids[None, :, :]
+    centroid_dists = np.sqrt(np.einsum('ijk,ijk->ij', diff, diff))
+    centroid_dists[centroid_dists == 0] = np.inf
+    ratios = (scatter[:, None] + scatter[None, :]) / centroid_dists
+    return {'davies_bouldin': ratios.max(axis=1).mean()}
+
+
+def calinski_harabasz(cluster_stats: ClusterStats) -> Dict[str, float]:
+    """Calinski-Harabasz index: ratio of between-cluster to within-cluster
+    dispersion, normalized by degrees of freedom. Higher is better."""
+    n_rows, n_clusters = cluster_stats.sizes.sum(), len(cluster_stats.sizes)
+    if n_clusters < 2:
+        raise ValueError('Calinski-Harabasz index needs at least 2 clusters.')
+    mean = cluster_stats.sizes @ cluster_stats.means / n_rows
+    between = cluster_stats.sizes @ ((cluster_stats.means - mean) ** 2).sum(axis=1)
+    # squared distances to the cluster means, from those to the centroids
+    within = (cluster_stats.sq_dist_sums
+              - cluster_stats.sizes * ((cluster_stats.means - cluster_stats.centroids) ** 2).sum(axis=1)).sum()
+    if within <= 0:
+        return {'calinski_harabasz': 1.0}
+    return {'calinski_harabasz': between * (n_rows - n_clusters)
+                                 / (within * (n_clusters - 1))}
+
+
+def cluster_size(cluster_stats: ClusterStats) -> Dict[str, float]:
+    """Smallest, median and largest number of rows of a cluster."""
+    return {'cluster_size_min': cluster_stats.sizes.min(),
+            'cluster_size_median': np.median(cluster_stats.sizes),
+            'cluster_size_max': cluster_stats.sizes.max()}
+
+
+def dispersion(cluster_stats: ClusterStats) -> Dict[str, float]:
+    """Smallest, mean and largest root mean squared distance of the rows of a
+    cluster to its centroid."""
+    rms = np.sqrt(cluster_stats.sq_dist_sums / cluster_stats.sizes)
+    return {'dispersion_min': rms.min(),
+            'dispersion_mean': rms.mean(),
+            'dispersion_max': rms.max()}
+
+
+# metrics computed from the cluster stats, in linear time
+CENTROID_METRICS: Dict[str, Callable[[ClusterStats], Dict[str, float]]] = {
+    'inertia': inertia,
+    'davies_bouldin': davies_bouldin,
+    'calinski_harabasz': calinski_harabasz,
+    'cluster_size': cluster_size,
+    'dispersion': dispersion,
+}
+
+
+def get_metric_names(metrics: List[str]) -> List[str]:
+    """Get the names of the scores computed by `compute_metrics`, which differ from
+    the metrics for those with several scores, e.g. `cluster_size_min` for
+    `cluster_size`.
+
+    Args:
+        metrics (List[str]): A list of metrics.
+
+    Raises:
+        ValueError: A metric is unknown.
+
+    Returns:
+        List[str]: The names of the scores.
+    """
+    unknown = set(metrics) - {'silhouette', *CENTROID_METRICS}
+    if unknown:
+        raise ValueError(f'Unknown metrics: {sorted(unknown)}')
+
+    # the names do not depend on the data, compute them on two unit clusters
+    unit_stats = ClusterStats(sizes=np.ones(2), centroids=np.eye(2), means=np.eye(2),
+                              dist_sums=np.ones(2), sq_dist_sums=np.ones(2))
+    names: List[str] = []
+    for metric in metrics:
+        if metric in CENTROID_METRICS:
+            names.extend(CENTROID_METRICS[metric](unit_stats))
+        else:
+            names.append(metric)
+    return names
+
+
+def compute_metrics(feature: pd.DataFrame,
+                    cluster_assignment: np.ndarray,
+                    metrics: List[str],
+                    silhouette: Optional[dict] = None,
+                    centroids: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """Calculate evaluation metrics of a cluster assignment. `silhouette` compares
+    pairs of rows. The metrics of `CENTROID_METRICS` are all computed from one
+    pass over the features (see `get_cluster_stats`).
+
+    Args:
+        feature (pd.DataFrame): Features the model was fitted on.
+        cluster_assignment (np.ndarray): Cluster of every row of the features.
+        metrics (List[str]): A list of metrics to be computed
+        silhouette (dict): Options of the silhouette metric, see `compute_silhouette`.
+        centroids (np.ndarray): Centroid of every cluster label, e.g. the cluster
+            centers of the model. If None, the cluster means are used.
+
+    Raises:
+        ValueError: A metric is unknown.
+
+    Returns:
+        pd.DataFrame: Evaluation results. The confidence interval of a metric is
+            only set if it is estimated from samples.
+    """
+    unknown = set(metrics) - {'silhouette', *CENTROID_METRICS}
+    if unknown:
+        raise ValueError(f'Unknown metrics: {sorted(unknown)}')
+
     result_list = []
     if 'silhouette' in metrics:
         logger.info('Calculating silhouettes statistics.')
-        result_list.append(
-            ['silhouette', silhouette_score(feature, cluster_assignment)])
+        start = time.perf_counter()
+        score, ci_low, ci_high = compute_silhouette(
+            feature, cluster_assignment, **(silhouette or {}))
+        seconds = time.perf_counter() - start
+        logger.info('Silhouette calculated in %.2f seconds.', seconds)
+        result_list.append(['silhouette', score, ci_low, ci_high, seconds])
+
+    centroid_metrics = [metric for metric in metrics if metric in CENTROID_METRICS]
+    if centroid_metrics:
+        start = time.perf_counter()
+        cluster_stats = get_cluster_stats(feature, cluster_assignment, centroids)
+        logger.info('Cluster stats calculated in %.2f seconds.',
+                    time.perf_counter() - start)
+        for metric in centroid_metrics:
+            start = time.perf_counter()
+            scores = CENTROID_METRICS[metric](cluster_stats)
+            seconds = time.perf_counter() - start
+            result_list.extend([name, score, None, None, seconds]
+                               for name, score in scores.items())
 
     # return all evaluation results
-    df_result = pd.DataFrame(result_list, columns=['metric name', 'score'])
-    logger.info('Evaluation wrapped into data frame.')
+    return pd.DataFrame(result_list,
+                        columns=['metric name', 'score', 'ci_low', 'ci_high', 'seconds'])
 
-    return df_result
+
+def compute_silhouette(feature: pd.DataFrame,
+                       cluster_assignment: np.ndarray,
+                       method: str = 'exact',
+                       sample_size: int = 10000,
+                       n_repeats: int = 5,
+                       confidence: float = 0.95,
+                       working_memory: int = 256,
+                       random_state: Optional[int] = None
+                       ) -> Tuple[float, Optional[float], Optional[float]]:
+    """Calculate the mean silhouette coefficient of all rows.
+
+    Args:
+        feature (pd.DataFrame): Features the model was fitted on.
+        cluster_assignment (np.ndarray): Cluster of every row of the features.
+        method (str): `exact` uses `sklearn.metrics.silhouette_score`. `chunked` is
+            exact too, but computes the pairwise distances block by block within
+            `working_memory`. `sampled` estimates the score on stratified samples.
+        sample_size (int): Rows per sample of the `sampled` method.
+        n_repeats (int): Number of samples drawn by the `sampled` method.
+        confidence (float): Confidence level of the interval of the `sampled` method.
+        working_memory (int): Memory (MB) used by a block of distances of the
+            `chunked` method.
+        random_state (int): Seed of the samples.
+
+    Raises:
+        ValueError: The method is unknown.
+
+    Returns:
+        Tuple[float, Optional[float], Optional[float]]: Silhouette score, and lower
+            and upper bounds of its confidence interval (None if not sampled).
+    """
+    if method == 'exact':
+        return silhouette_score(feature, cluster_assignment), None, None
+    if method == 'chunked':
+        return silhouette_chunked(feature, cluster_assignment, working_memory), None, None
+    if method == 'sampled':
+        return silhouette_sampled(feature, cluster_assignment, sample_size, n_repeats,
+                                  confidence, random_state)
+    raise ValueError(f'Unknown silhouette method: {method}')
+
+
+def silhouette_chunked(feature: pd.DataFrame,
+                       cluster_assignment: np.ndarray,
+                       working_memory: int = 256) -> float:
+    """Calculate the exact mean silhouette coefficient with bounded memory.
+
+    The distances from a block of rows to all rows are summed per cluster with a
+    sparse one-hot matrix of the clusters, so only one block of distances is in
+    memory at a time.
+
+    Args:
+        feature (pd.DataFrame): Features the model was fitted on.
+        cluster_assignment (np.ndarray): Cluster of every row of the features.
+        working_memory (int): Memory (MB) used by a block of distances.
+
+    Returns:
+        float: Silhouette score.
+    """
+    values = np.asarray(feature, dtype=np.float64)
+    n_rows = len(values)
+    clusters, codes = np.unique(cluster_assignment, return_inverse=True)
+    if not 1 < len(clusters) < n_rows:
+        raise ValueError(f'Number of labels is {len(clusters)}. Valid values are 2 '
+                         f'to n_samples - 1 (inclusive)')
+    sizes = np.bincount(codes)
+    one_hot = sparse.csr_matrix((np.ones(n_rows), (np.arange(n_rows), codes)),
+                                shape=(n_rows, len(clusters)))
+    sq_norms = np.einsum('ij,ij->i', values, values)
+
+    block_rows = max(1, working_memory * 2 ** 20 // (8 * n_rows))
+    logger.debug('Computing distances in blocks of %s rows.', block_rows)
+
+    scores = np.empty(n_rows)
+    for start in range(0, n_rows, block_rows):
+        stop = min(start + block_rows, n_rows)
+        rows = np.arange(start, stop)
+
+        # euclidean distances from the block to all rows
+        distances = sq_norms[rows, None] + sq_norms[None, :] - 2 * values[rows] @ values.T
+        np.maximum(distances, 0, out=distances)
+        np.sqrt(distances, out=distances)
+        distances[rows - start, rows] = 0
+
+        # sum of the distances to every cluster
+        cluster_sums = distances @ one_hot
+        own = codes[rows]
+        own_size = sizes[own]
+        intra = cluster_sums[rows - start, own] / np.maximum(own_size - 1, 1)
+        cluster_sums[rows - start, own] = np.inf
+        inter = (cluster_sums / sizes).min(axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            block_scores = (inter - intra) / np.maximum(intra, inter)
+        # rows alone in their cluster score 0
+        scores[rows] = np.where(own_size > 1, np.nan_to_num(block_scores), 0)
+
+    return float(scores.mean())
+
+
+def silhouette_sampled(feature: pd.DataFrame,
+                       cluster_assignment: np.ndarray,
+                       sample_size: int = 10000,
+                       n_repeats: int = 5,
+                       confidence: float = 0.95,
+                       random_state: Optional[int] = None
+                       ) -> Tuple[float, Optional[float], Optional[float]]:
+    """Estimate the mean silhouette coefficient on samples stratified by cluster.
+
+    Every sample keeps the cluster proportions of the data, with at least two rows
+    of each cluster. The estimate is the mean score of `n_repeats` samples, and the
+    confidence interval is the t-interval of that mean.
+
+    Args:
+        feature (pd.DataFrame): Features the model was fitted on.
+        cluster_assignment (np.ndarray): Cluster of every row of the features.
+        sample_size (int): Rows per sample.
+        n_repeats (int): Number of samples.
+        confidence (float): Confidence level of the interval.
+        random_state (int): Seed of the samples.
+
+    Returns:
+        Tuple[float, Optional[float], Optional[float]]: Estimated silhouette score,
+            and lower and upper bounds of its confidence interval. If the data has
+            no more than `sample_size` rows, the exact score and no interval.
+    """
+    values = np.asarray(feature)
+    cluster_assignment = np.asarray(cluster_assignment)
+    if sample_size >= len(values):
+        logger.info('Sample size is not smaller than the data, computing exact score.')
+        return silhouette_score(values, cluster_assignment), None, None
+
+    # rows of every cluster, and how many of them to draw
+    order = np.argsort(cluster_assignment, kind='stable')
+    _, starts, sizes = np.unique(cluster_assignment[order], return_index=True,
+                                 return_counts=True)
+    n_draws = np.minimum(
+        sizes, np.maximum(2, np.round(sample_size * sizes / len(values)).astype(int)))
+
+    rng = np.random.default_rng(random_state)
+    scores = []
+    for _ in range(n_repeats):
+        sample = np.concatenate([
+            order[start + rng.choice(size, n_draw, replace=False)]
+            for start, size, n_draw in zip(starts, sizes, n_draws)])
+        scores.append(silhouette_score(values[sample], cluster_assignment[sample]))
+    logger.debug('Silhouette of every sample: %s', scores)
+
+    score = float(np.mean(scores))
+    if n_repeats < 2:
+        return score, None, None
+    half_width = (stats.t.ppf((1 + confidence) / 2, n_repeats - 1)
+                  * np.std(scores, ddof=1) / np.sqrt(n_repeats))
+    return score, score - half_width, score + half_width
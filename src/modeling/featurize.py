@@ -1,16 +1,141 @@
 import logging
-from typing import List
+from typing import Any, Dict, List, Mapping, Optional, Sequence
 
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
 
+from src.utils import io
+
 logger = logging.getLogger(__name__)
 
 
+class Featurizer:
+    """Features of cars: numerical columns as is, categorical columns as dummies,
+    optionally standardized. Fitting records the categories of every categorical
+    column and the scaler parameters, so that new cars are featurized exactly like
+    the cars the clustering model was trained on.
+
+    Args:
+        feature_cols (List[str]): Columns to be used as features.
+        is_get_dummies (bool): If true, convert categorical variables to
+            dummies variables.
+        is_standardize (bool): If true, standardize the data.
+    """
+
+    def __init__(self, feature_cols: List[str], is_get_dummies: bool, is_standardize: bool):
+        self.feature_cols = feature_cols
+        self.is_get_dummies = is_get_dummies
+        self.is_standardize = is_standardize
+        self.numeric_cols: List[str] = []
+        self.vocabulary: Dict[str, List[Any]] = {}
+        self.columns: List[str] = []
+        self.scaler: Optional[StandardScaler] = None
+
+    def fit(self, data: pd.DataFrame) -> 'Featurizer':
+        """Learn the categories and scaler parameters from cleaned data.
+
+        Args:
+            data (pd.DataFrame): Cleaned data.
+
+        Returns:
+            Featurizer: The fitted featurizer.
+        """
+        # same categorical columns, categories and column order as `pd.get_dummies`
+        if self.is_get_dummies:
+            categorical = (data[self.feature_cols]
+                           .select_dtypes(include=['object', 'string', 'category']).columns)
+            self.vocabulary = {col: pd.Categorical(data[col]).categories.tolist()
+                               for col in categorical}
+        self.numeric_cols = [col for col in self.feature_cols if col not in self.vocabulary]
+        self.columns = self.numeric_cols + [f'{col}_{category}'
+                                            for col, categories in self.vocabulary.items()
+                                            for category in categories]
+        if self.is_get_dummies:
+            # make all column names lower case
+            self.columns = [col.lower() for col in self.columns]
+        logger.debug('Categories of the categorical features: %s', self.vocabulary)
+
+        if self.is_standardize:
+            self.scaler = StandardScaler().fit(self._encode(data))
+        return self
+
+    def transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Generate features from cleaned data. Categories unseen by `fit` get no
+        dummy.
+
+        Args:
+            data (pd.DataFrame): Cleaned data.
+
+        Returns:
+            pd.DataFrame: The features.
+        """
+        if not (self.is_get_dummies or self.is_standardize):
+            return data[self.feature_cols]
+
+        values = self._encode(data)
+        if self.scaler is not None:
+            return pd.DataFrame(self.scaler.transform(values), columns=self.columns)
+        return pd.DataFrame(values, columns=self.columns, index=data.index)
+
+    def fit_transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Fit the featurizer and generate features from the same data.
+
+        Args:
+            data (pd.DataFrame): Cleaned data.
+
+        Returns:
+            pd.DataFrame: The features.
+        """
+        return self.fit(data).transform(data)
+
+    def transform_records(self, records: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """Generate features of a few cars, without the overhead of pandas.
+
+        Args:
+            records (Sequence[Mapping[str, Any]]): Specs of every car, by column.
+
+        Raises:
+            KeyError: A spec misses a feature column.
+            ValueError: A numerical feature is not a number.
+
+        Returns:
+            np.ndarray: One row of features per car, in the order of `columns`.
+        """
+        values = np.zeros((len(records), len(self.columns)))
+        for row, record in enumerate(records):
+            for col_index, col in enumerate(self.numeric_cols):
+                values[row, col_index] = float(record[col])
+            offset = len(self.numeric_cols)
+            for col, categories in self.vocabulary.items():
+                if record[col] in categories:
+                    values[row, offset + categories.index(record[col])] = 1
+                offset += len(categories)
+
+        if self.scaler is not None:
+            values = (values - self.scaler.mean_) / self.scaler.scale_
+        return values
+
+    def _encode(self, data: pd.DataFrame) -> np.ndarray:
+        """Numerical columns followed by the dummies of the categorical columns."""
+        blocks = [data[self.numeric_cols].to_numpy(dtype=float)]
+        for col, categories in self.vocabulary.items():
+            codes = pd.Categorical(data[col], categories=categories).codes
+            if (codes < 0).any():
+                logger.warning('%s cars have an unseen or missing %s.', (codes < 0).sum(), col)
+            dummies = np.zeros((len(data), len(categories)))
+            known = codes >= 0
+            dummies[np.flatnonzero(known), codes[known]] = 1
+            blocks.append(dummies)
+        # column major like a data frame, so that the scaler sums in the same order
+        return np.asfortranarray(np.hstack(blocks))
+
+
 def featurize(data: pd.DataFrame,
               feature_cols: List[str],
               is_get_dummies: bool,
-              is_standardize: bool) -> pd.DataFrame:
+              is_standardize: bool,
+              transform_path: Optional[str] = None) -> pd.DataFrame:
     """Generate features from cleaned data.
 
     Args:
@@ -19,29 +144,18 @@ def featurize(data: pd.DataFrame,
         is_get_dummies (bool): If true, convert categorical variables to
             dummies variables.
         is_standardize (bool): If true, standardize the data.
+        transform_path (str): If given, the fitted `Featurizer` is saved to this
+            path, to featurize new cars later.
 
     Returns:
-        pd.DataFrame: _description_
+        pd.DataFrame: The features.
     """
     logger.info("Generating features from cleaned data...")
+    featurizer = Featurizer(feature_cols, is_get_dummies, is_standardize)
+    feature = featurizer.fit_transform(data)
 
-    # keep only the data to be
-    feature = data[feature_cols]
-
-    # convert categorical data to dummies
-    if is_get_dummies:
-        logger.info("Getting dummies...")
-        feature = pd.get_dummies(data[feature_cols]).astype(float)
-        # make all column names lower case
-        feature.columns = [col.lower() for col in feature.columns]
-
-
-    # standardize the variables
-    if is_standardize:
-        logger.info("Standardizing variables...")
-        scaler_std = StandardScaler()
-        feature = pd.DataFrame(scaler_std.fit_transform(feature),
-                               columns=feature.columns)
+    if transform_path is not None:
+        io.save_model(featurizer, transform_path)
 
     logger.info("All features generated.")
     return feature
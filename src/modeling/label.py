@@ -1,7 +1,9 @@
 import logging
 
 import pandas as pd
+import sklearn
 
+from src.modeling.assign import assign_clusters
 from src.utils import io
 
 logger = logging.getLogger(__name__)
@@ -31,14 +33,34 @@ def label(model_save_path: str,
     feature = io.read_pandas(feature_path)
     logger.info('Features loaded.')
 
-    # label: get cluster assignment
-    cluster_assignment = model.predict(feature)
-    logger.info('Cluster assigned.')
-
     # load clean data
     data = io.read_pandas(clean_data_path)
     logger.info('Clean data loaded.')
 
+    return label_data(model, model_save_path, feature, data, col_cluster)
+
+
+def label_data(model: sklearn.base.BaseEstimator,
+               model_save_path: str,
+               feature: pd.DataFrame,
+               data: pd.DataFrame,
+               col_cluster: str) -> pd.DataFrame:
+    """Label the cars of a clean data set with a clustering model.
+
+    Args:
+        model (sklearn.base.BaseEstimator): The clustering model.
+        model_save_path (str): Path to the clustering model.
+        feature (pd.DataFrame): Features of the clean data.
+        data (pd.DataFrame): Clean data.
+        col_cluster (str): Name of the cluster assignment column.
+
+    Returns:
+        pd.DataFrame: Clean data with the assignment column appended.
+    """
+    # label: get cluster assignment
+    cluster_assignment = assign_clusters(model, model_save_path, feature)
+    logger.info('Cluster assigned.')
+
     # append cluster assignment to every car
     labels = data.copy()
     labels[col_cluster] = cluster_assignment
@@ -0,0 +1,136 @@
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+import pandas as pd
+
+from src.modeling import clean, evaluate, featurize, label, train
+from src.utils import io
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_MODES = ['sync', 'async', 'none']
+
+
+class CheckpointWriter:
+    """Write the intermediate outputs of the pipeline.
+
+    Args:
+        mode (str): `sync` writes every output before the next stage starts,
+            `async` writes them in a background thread while the next stages run,
+            and `none` does not write them at all.
+    """
+
+    def __init__(self, mode: str):
+        if mode not in CHECKPOINT_MODES:
+            raise ValueError(f'Unknown checkpoint mode {mode}, '
+                             f'must be one of {CHECKPOINT_MODES}')
+        self.mode = mode
+        self._executor = ThreadPoolExecutor(max_workers=1) if mode == 'async' else None
+        self._futures: List[Future] = []
+
+    def write(self, write_func: Callable[..., Any], *args: Any) -> None:
+        """Write an output.
+
+        Args:
+            write_func (Callable[..., Any]): Function writing the output, e.g.
+                `io.write_pandas`.
+            *args (Any): Arguments of `write_func`.
+        """
+        if self._executor is not None:
+            self._futures.append(self._executor.submit(write_func, *args))
+        elif self.mode == 'sync':
+            write_func(*args)
+
+    def wait(self) -> None:
+        """Wait until all outputs are written. Raises the error of a failed write."""
+        for future in self._futures:
+            future.result()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+@contextmanager
+def timed(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    """Record how many seconds a stage of the pipeline takes.
+
+    Args:
+        timings (Dict[str, float]): Seconds taken by every stage.
+        stage (str): Name of the stage.
+    """
+    logger.info('Pipeline stage %s started.', stage)
+    start = time.perf_counter()
+    yield
+    timings[stage] = time.perf_counter() - start
+    logger.info('Pipeline stage %s finished in %.2f seconds.', stage, timings[stage])
+
+
+def run_pipeline(input_path: str,
+                 config: Dict[str, Any],
+                 model_save_path: str,
+                 labels_path: str,
+                 evaluation_path: str,
+                 checkpoints: str = 'async') -> pd.DataFrame:
+    """Run clean, featurize, train, label and evaluate in one process. The data
+    frames are handed from one stage to the next in memory. Only the model, the
+    labeled data and the evaluation results are always written to disk. The clean
+    data and the features are checkpoints, written to the paths of the `label`
+    section of the config.
+
+    Args:
+        input_path (str): Path to the raw data.
+        config (Dict[str, Any]): Configurations of the modeling pipeline. Every
+            stage takes the section of its name.
+        model_save_path (str): Path to save the trained model.
+        labels_path (str): Path to save the labeled data.
+        evaluation_path (str): Path to save the evaluation results.
+        checkpoints (str): How the checkpoints are written, see `CheckpointWriter`.
+
+    Returns:
+        pd.DataFrame: Seconds taken by every stage.
+    """
+    writer = CheckpointWriter(checkpoints)
+    clean_data_path = config['label']['clean_data_path']
+    feature_path = config['label']['feature_path']
+    timings: Dict[str, float] = {}
+
+    with timed(timings, 'read'):
+        data = io.read_pandas(input_path)
+
+    with timed(timings, 'clean'):
+        df_clean = clean.clean(data=data, **config['clean'])
+        writer.write(io.write_pandas, df_clean, clean_data_path)
+
+    with timed(timings, 'featurize'):
+        df_feature = featurize.featurize(data=df_clean, **config['featurize'])
+        if io.get_file_format(feature_path) == 'npy':
+            writer.write(io.write_feature_store, df_feature, feature_path,
+                         df_clean[config['clean']['new_index']])
+        else:
+            writer.write(io.write_pandas, df_feature, feature_path)
+
+    with timed(timings, 'train'):
+        model = train.train(feature=df_feature, model_save_path=model_save_path,
+                            **config['train'])
+
+    with timed(timings, 'label'):
+        labels = label.label_data(model, model_save_path, df_feature, df_clean,
+                                  config['label']['col_cluster'])
+        io.write_pandas(labels, labels_path)
+
+    with timed(timings, 'evaluate'):
+        evaluate_config = {key: value for key, value in config['evaluate'].items()
+                           if key != 'feature_path'}
+        df_evaluation = evaluate.evaluate_model(model, model_save_path, df_feature,
+                                                **evaluate_config)
+        io.write_pandas(df_evaluation, evaluation_path)
+
+    with timed(timings, 'checkpoints'):
+        writer.wait()
+
+    df_timings = pd.DataFrame(list(timings.items()), columns=['stage', 'seconds'])
+    logger.info('Pipeline finished in %.2f seconds:\n%s',
+                df_timings['seconds'].sum(), df_timings.to_string(index=False))
+    return df_timings
@@ -0,0 +1,147 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import sklearn
+from sklearn.cluster import KMeans
+from threadpoolctl import threadpool_limits
+
+from src.modeling.assign import get_fingerprint
+from src.modeling.evaluate import compute_metrics, get_metric_names
+from src.utils import io
+
+logger = logging.getLogger(__name__)
+
+
+def get_cluster_counts(n_clusters: Dict[str, int]) -> List[int]:
+    """Expand the range of cluster counts to try.
+
+    Args:
+        n_clusters (Dict[str, int]): `start`, `stop` (inclusive) and `step` of the range.
+
+    Returns:
+        List[int]: The cluster counts.
+    """
+    return list(range(n_clusters['start'], n_clusters['stop'] + 1,
+                      n_clusters.get('step', 1)))
+
+
+def fit_and_score(feature_path: str,
+                  n_clusters: int,
+                  model_config: dict,
+                  metrics: List[str],
+                  threads_per_fit: int,
+                  silhouette: Optional[dict] = None
+                  ) -> Tuple[dict, sklearn.base.BaseEstimator]:
+    """Fit a KMeans model with a given number of clusters and evaluate it. Runs in
+    a worker process of `sweep`.
+
+    Args:
+        feature_path (str): Path to the features.
+        n_clusters (int): Number of clusters.
+        model_config (dict): Other KMeans configurations.
+        metrics (List[str]): A list of metrics to be computed.
+        threads_per_fit (int): Maximum number of threads used by the fit.
+        silhouette (dict): Options of the silhouette metric, see
+            `evaluate.compute_silhouette`.
+
+    Returns:
+        Tuple[dict, sklearn.base.BaseEstimator]: One row of the sweep results and
+            the fitted model.
+    """
+    # a feature store is memory mapped, so all workers share one copy of it
+    feature = io.read_pandas(feature_path)
+
+    with threadpool_limits(limits=threads_per_fit):
+        start = time.perf_counter()
+        model = KMeans(n_clusters=n_clusters, **model_config).fit(feature)
+        fit_seconds = time.perf_counter() - start
+        df_metrics = compute_metrics(feature, model.labels_, metrics, silhouette,
+                                     model.cluster_centers_)
+    logger.info('Fitted %s clusters in %.2f seconds.', n_clusters, fit_seconds)
+
+    # the inertia of the fit, next to the `inertia` metric from the cluster centers
+    result = {'n_clusters': n_clusters,
+              'fit_seconds': fit_seconds,
+              'model_inertia': model.inertia_}
+    result.update(zip(df_metrics['metric name'], df_metrics['score']))
+    return result, model
+
+
+def sweep(feature_path: str,
+          model_save_path: str,
+          n_clusters: Dict[str, int],
+          model_config: dict,
+          metrics: List[str],
+          select_by: str,
+          maximize: bool = True,
+          n_jobs: Optional[int] = None,
+          threads_per_fit: int = 1,
+          silhouette: Optional[dict] = None) -> pd.DataFrame:
+    """Fit and evaluate KMeans models for a range of cluster counts in parallel, and
+    save the best one to local directory.
+
+    Args:
+        feature_path (str): Path to the features.
+        model_save_path (str): Path to save the best model.
+        n_clusters (Dict[str, int]): `start`, `stop` (inclusive) and `step` of the
+            cluster counts to try.
+        model_config (dict): Other KMeans configurations, e.g. `random_state`.
+        metrics (List[str]): A list of metrics to be computed for every model.
+        select_by (str): Metric used to select the best model.
+        maximize (bool): Whether a higher `select_by` is better.
+        n_jobs (int): Number of models fitted at the same time. Defaults to as many
+            as the CPUs allow with `threads_per_fit` threads each.
+        threads_per_fit (int): Maximum number of threads used by each fit, so that
+            parallel fits do not oversubscribe the CPUs.
+        silhouette (dict): Options of the silhouette metric, see
+            `evaluate.compute_silhouette`.
+
+    Raises:
+        ValueError: A metric is unknown, or `select_by` is not a column of the
+            results.
+
+    Returns:
+        pd.DataFrame: One row per cluster count with its fit time, the inertia of
+            the fit (`model_inertia`) and the scores of the metrics.
+    """
+    # check before fitting anything, metrics like cluster_size have several columns
+    columns = ['model_inertia', *get_metric_names(metrics)]
+    if select_by not in columns:
+        raise ValueError(f'Cannot select the best model by {select_by}, '
+                         f'it is not one of the result columns: {columns}')
+
+    cluster_counts = get_cluster_counts(n_clusters)
+    if n_jobs is None:
+        n_jobs = max(1, (os.cpu_count() or 1) // threads_per_fit)
+    logger.info('Sweeping %s cluster counts with %s workers of %s threads each.',
+                len(cluster_counts), n_jobs, threads_per_fit)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        futures = [executor.submit(fit_and_score, feature_path, k, model_config,
+                                   metrics, threads_per_fit, silhouette)
+                   for k in cluster_counts]
+        results = [future.result() for future in futures]
+    logger.info('Sweep finished in %.2f seconds.', time.perf_counter() - start)
+
+    df_result = pd.DataFrame([result for result, _ in results])
+    best = df_result[select_by].idxmax() if maximize else df_result[select_by].idxmin()
+    best_result, best_model = results[best]
+    logger.info('Best model has %s clusters (%s = %s).',
+                best_result['n_clusters'], select_by, best_result[select_by])
+
+    # save best model to local directory
+    io.save_model(best_model, model_save_path)
+    io.save_model_metadata({'backend': 'kmeans',
+                            'model_config': {'n_clusters': best_result['n_clusters'],
+                                             **model_config},
+                            'fit_seconds': best_result['fit_seconds'],
+                            'inertia': float(best_result['model_inertia']),
+                            'fingerprint': get_fingerprint(io.read_pandas(feature_path))},
+                           model_save_path)
+
+    return df_result
@@ -1,29 +1,92 @@
 import logging
+import time
+from typing import Optional
 
 import pandas as pd
-from sklearn.cluster import KMeans
+import sklearn
+from sklearn.cluster import KMeans, MiniBatchKMeans
 
+from src.modeling.assign import get_fingerprint
 from src.utils import io
 
 logger = logging.getLogger(__name__)
 
 
-def train(feature: pd.DataFrame,
+def train(feature: Optional[pd.DataFrame],
           model_save_path: str,
-          model_config: dict):
-    """Train a clustering model and save to local directory.
+          model_config: dict,
+          backend: str = 'kmeans',
+          feature_path: Optional[str] = None,
+          chunksize: Optional[int] = None,
+          n_epochs: int = 1) -> sklearn.base.BaseEstimator:
+    """Train a clustering model and save to local directory. The fit time and
+    inertia of the model, and the fingerprint of the features it was trained on, are
+    saved next to it (see `io.save_model_metadata`).
 
     Args:
-        feature (pd.DataFrame): Data frame with all the features column.
+        feature (pd.DataFrame): Data frame with all the features column. If None,
+            the features are read from `feature_path`.
         model_save_path (str): Path to save the trained model.
         model_config (dict): Model configurations
+        backend (str): `kmeans` to fit a full-batch `KMeans`, `minibatch` to fit a
+            `MiniBatchKMeans`.
+        feature_path (str): Path to the features. Only used if `feature` is None.
+        chunksize (int): Only used by the `minibatch` backend. If given, the
+            features are read from `feature_path` in chunks of this many rows and
+            fed to `partial_fit`, so memory use does not grow with the data.
+        n_epochs (int): Number of passes over the chunks of features.
+
+    Raises:
+        ValueError: The backend is unknown, or `chunksize` is given for the
+            `kmeans` backend, which needs all features in memory.
+
+    Returns:
+        sklearn.base.BaseEstimator: The trained model.
     """
+    if backend not in ['kmeans', 'minibatch']:
+        raise ValueError(f'Unknown training backend: {backend}')
+    if backend == 'kmeans' and chunksize is not None:
+        raise ValueError('Training in chunks is only supported by the minibatch backend, '
+                         f'got chunksize {chunksize} with the kmeans backend.')
+
+    logger.info('Fitting model... Backend: %s Model config: %s', backend, model_config)
 
-    logger.info('Fitting model... Model config: %s', model_config)
+    start = time.perf_counter()
+    if backend == 'minibatch' and chunksize is not None and feature is None:
+        # fit model chunk by chunk
+        model = MiniBatchKMeans(**model_config)
+        for epoch in range(n_epochs):
+            for chunk in io.read_pandas_chunks(feature_path, chunksize=chunksize):
+                model.partial_fit(chunk)
+            logger.debug('Epoch %s finished.', epoch + 1)
+        fit_seconds = time.perf_counter() - start
 
-    # fit model
-    model = KMeans(**model_config).fit(feature)
-    logger.info('Model fitted.')
+        # partial_fit does not track the inertia, compute it with one more pass
+        inertia = -sum(model.score(chunk) for chunk in
+                       io.read_pandas_chunks(feature_path, chunksize=chunksize))
+        # labels_ only holds the last chunk, it cannot be reused by label/evaluate
+        fingerprint = None
+    else:
+        if feature is None:
+            feature = io.read_pandas(feature_path)
+
+        # fit model
+        if backend == 'minibatch':
+            model = MiniBatchKMeans(**model_config).fit(feature)
+        else:
+            model = KMeans(**model_config).fit(feature)
+        fit_seconds = time.perf_counter() - start
+        inertia = model.inertia_
+        fingerprint = get_fingerprint(feature)
+    logger.info('Model fitted in %.2f seconds. Inertia: %s', fit_seconds, inertia)
 
     # save model to local directory
     io.save_model(model, model_save_path)
+    io.save_model_metadata({'backend': backend,
+                            'model_config': model_config,
+                            'fit_seconds': fit_seconds,
+                            'inertia': float(inertia),
+                            'fingerprint': fingerprint},
+                           model_save_path)
+
+    return model
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# code whose changes invalidate the cached outputs of every step: python files of
+# these directories, and single files
+CODE_PATHS = [Path(__file__).resolve().parents[1] / 'modeling',
+              Path(__file__).resolve().parent,
+              Path(__file__).resolve().parents[2] / 'run_model.py']
+
+HASH_BLOCK_SIZE = 2 ** 20
+
+
+def hash_file(path: str, cache_dir: str) -> str:
+    """Hash the content of a file. Hashes are memoized by path, size and
+    modification time in `cache_dir`, so unchanged files are not read again.
+    The memo is replaced atomically, and the hash is merged into its latest
+    version, so that concurrent runs do not corrupt it. Should two runs still
+    race, one memoized hash is lost, which only costs reading that file again.
+
+    Args:
+        path (str): Path to the file.
+        cache_dir (str): Directory of the step cache.
+
+    Returns:
+        str: Sha256 hash of the file.
+    """
+    stat = os.stat(path)
+    memo_path = os.path.join(cache_dir, 'file_hashes.json')
+    abs_path = os.path.abspath(path)
+    memo = _read_memo(memo_path)
+    if memo.get(abs_path, [None])[:2] == [stat.st_size, stat.st_mtime_ns]:
+        return memo[abs_path][2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+
+    # merge into the memo as it is now, hashing may take a while
+    memo = _read_memo(memo_path)
+    memo[abs_path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    os.makedirs(cache_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', dir=cache_dir, delete=False,
+                                     encoding='utf-8') as file:
+        json.dump(memo, file)
+    os.replace(file.name, memo_path)
+    return digest.hexdigest()
+
+
+def get_code_version() -> str:
+    """Hash the source code of the modeling pipeline.
+
+    Returns:
+        str: Sha256 hash of all python files of `CODE_PATHS`.
+    """
+    digest = hashlib.sha256()
+    for code_path in CODE_PATHS:
+        paths = sorted(code_path.glob('*.py')) if code_path.is_dir() else [code_path]
+        for path in paths:
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def get_step_key(step: str,
+                 input_paths: Dict[str, str],
+                 config: Dict[str, Any],
+                 cache_dir: str) -> str:
+    """Compute the cache key of a run of a step: a hash of the content of its input
+    files, its configuration and the code version.
+
+    Args:
+        step (str): Name of the step.
+        input_paths (Dict[str, str]): Path of every file read by the step, by name.
+        config (Dict[str, Any]): Everything else the outputs depend on, e.g. the
+            step's section of the config file and the output formats.
+        cache_dir (str): Directory of the step cache.
+
+    Returns:
+        str: The cache key.
+    """
+    inputs = {name: hash_file(path, cache_dir) if os.path.isfile(path) else None
+              for name, path in input_paths.items()}
+    key = {'step': step,
+           'inputs': inputs,
+           'config': config,
+           'code': get_code_version()}
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def restore_outputs(step: str, key: str, output_paths: Dict[str, str],
+                    cache_dir: str) -> bool:
+    """Copy the cached outputs of a step to their paths.
+
+    Args:
+        step (str): Name of the step.
+        key (str): Cache key of the run, see `get_step_key`.
+        output_paths (Dict[str, str]): Path of every output, by name.
+        cache_dir (str): Directory of the step cache.
+
+    Returns:
+        bool: True if the outputs were cached, False otherwise.
+    """
+    entry_dir = os.path.join(cache_dir, step, key)
+    cached = _get_cached_names(entry_dir)
+    if cached is None or not set(output_paths) <= set(cached):
+        logger.info('Cache miss for step %s (%s).', step, key[:12])
+        return False
+
+    try:
+        for name, path in output_paths.items():
+            if cached[name]:
+                _make_parent_dir(path)
+                shutil.copyfile(os.path.join(entry_dir, name), path)
+        # mark the entry as recently used, see `evict`
+        os.utime(entry_dir)
+    except FileNotFoundError:
+        # another run evicted the entry meanwhile
+        logger.info('Cache entry of step %s (%s) was evicted.', step, key[:12])
+        return False
+    logger.info('Cache hit for step %s (%s), outputs restored.', step, key[:12])
+    return True
+
+
+def save_outputs(step: str, key: str, output_paths: Dict[str, str],
+                 cache_dir: str, max_entries: Optional[int] = None) -> None:
+    """Copy the outputs of a step to the cache.
+
+    Args:
+        step (str): Name of the step.
+        key (str): Cache key of the run, see `get_step_key`.
+        output_paths (Dict[str, str]): Path of every output, by name. Outputs that
+            the step did not write are recorded as missing.
+        cache_dir (str): Directory of the step cache.
+        max_entries (int): If set, only keep this many entries of the step, see
+            `evict`. Optional.
+    """
+    step_dir = os.path.join(cache_dir, step)
+    os.makedirs(step_dir, exist_ok=True)
+
+    # fill a temporary directory first, so that a partial entry is never visible
+    tmp_dir = tempfile.mkdtemp(dir=step_dir)
+    cached = {}
+    for name, path in output_paths.items():
+        cached[name] = os.path.isfile(path)
+        if cached[name]:
+            shutil.copyfile(path, os.path.join(tmp_dir, name))
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as file:
+        json.dump(cached, file)
+
+    entry_dir = os.path.join(step_dir, key)
+    try:
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        # another run of the same step stored it first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    logger.info('Outputs of step %s saved to cache (%s).', step, key[:12])
+
+    if max_entries is not None:
+        evict(step, cache_dir, max_entries)
+
+
+def evict(step: str, cache_dir: str, max_entries: int) -> int:
+    """Delete the least recently saved or restored entries of a step beyond
+    `max_entries`.
+
+    Args:
+        step (str): Name of the step.
+        cache_dir (str): Directory of the step cache.
+        max_entries (int): Number of entries to keep.
+
+    Returns:
+        int: Number of deleted entries.
+    """
+    step_dir = os.path.join(cache_dir, step)
+    try:
+        # entries are named by their key, other directories are being filled
+        entries = [entry for entry in os.scandir(step_dir)
+                   if entry.is_dir() and len(entry.name) == 64]
+    except FileNotFoundError:
+        return 0
+
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[max_entries:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+    n_evicted = max(0, len(entries) - max_entries)
+    if n_evicted:
+        logger.info('Evicted %s cache entries of step %s.', n_evicted, step)
+    return n_evicted
+
+
+def _read_memo(memo_path: str) -> Dict[str, Any]:
+    try:
+        with open(memo_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _get_cached_names(entry_dir: str) -> Optional[Dict[str, bool]]:
+    try:
+        with open(os.path.join(entry_dir, 'manifest.json'), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def _make_parent_dir(path: str) -> None:
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
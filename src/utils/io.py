@@ -1,8 +1,11 @@
 import logging
+import os
 import sys
-from typing import List, Dict, Optional, Union
+import json
+from typing import Any, Iterator, List, Dict, Optional, Sequence, Tuple, Union
 from joblib import dump, load
 
+import numpy as np
 import sklearn
 import pandas as pd
 import yaml
@@ -10,12 +13,41 @@ import yaml
 logger = logging.getLogger(__name__)
 
 
-def read_pandas(input_path: str) -> Optional[Union[pd.DataFrame,
-                                                   pd.Series]]:
-    """Read csv to pandas data frame or series.
+FILE_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".ftr": "feather",
+    ".npy": "npy",
+}
+
+
+def get_file_format(path: str) -> str:
+    """Detect the format of a data file from its extension. Files with an
+    unknown extension are treated as csv.
+
+    Args:
+        path (str): Path of the data.
+
+    Returns:
+        str: `csv`, `parquet`, `feather` or `npy` (feature store).
+    """
+    return FILE_FORMATS.get(os.path.splitext(str(path))[1].lower(), "csv")
+
+
+def read_pandas(input_path: str,
+                columns: Optional[List[str]] = None) -> Optional[Union[pd.DataFrame,
+                                                                       pd.Series]]:
+    """Read csv, parquet, feather or feature store file to pandas data frame or
+    series. The format is detected from the file extension. Parquet and feather
+    files keep the data types they were saved with. Feature stores are memory
+    mapped (see `read_feature_store`): the data frame is a view of the mapped
+    array, unless `columns` is given, which copies the selected columns.
 
     Args:
         input_path (str): Path of the data
+        columns (List[str]): Only read these columns. Optional.
 
     Returns:
         Union[pd.DataFrame, pd.Series]: Output data.
@@ -25,10 +57,21 @@ def read_pandas(input_path: str) -> Optional[Union[pd.DataFrame,
         logger.warning("Input path is None. Nothing loaded")
         return None
 
-    logger.info("Reading csv from %s", input_path)
+    file_format = get_file_format(input_path)
+    logger.info("Reading %s from %s", file_format, input_path)
     try:
-        # read csv to data frame
-        data = pd.read_csv(input_path)
+        # read file to data frame
+        if file_format == "parquet":
+            data = pd.read_parquet(input_path, columns=columns)
+        elif file_format == "feather":
+            data = pd.read_feather(input_path, columns=columns)
+        elif file_format == "npy":
+            array, manifest = read_feature_store(input_path)
+            data = pd.DataFrame(array, columns=manifest["columns"], copy=False)
+            if columns is not None:
+                data = data[columns]
+        else:
+            data = pd.read_csv(input_path, usecols=columns)
 
         logger.info("Loaded data from %s Size: n_row: %s n_col: %s", input_path,
                     data.shape[0],
@@ -40,6 +83,167 @@ def read_pandas(input_path: str) -> Optional[Union[pd.DataFrame,
         raise err_os
 
 
+def read_pandas_chunks(input_path: str,
+                       chunksize: int,
+                       dtype: Optional[Dict[str, type]] = None) -> Iterator[pd.DataFrame]:
+    """Read csv, parquet or feather file to pandas data frames of at most
+    `chunksize` rows each, so that files larger than memory can be processed.
+
+    Args:
+        input_path (str): Path of the data
+        chunksize (int): Number of rows per chunk.
+        dtype (Dict[str, type]): Data types of some columns. Only used for csv.
+            Optional.
+
+    Yields:
+        pd.DataFrame: The next chunk of data.
+    """
+    file_format = get_file_format(input_path)
+    logger.info("Reading %s from %s in chunks of %s rows",
+                file_format, input_path, chunksize)
+    try:
+        if file_format == "parquet":
+            import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+            for batch in pyarrow.parquet.ParquetFile(input_path).iter_batches(chunksize):
+                yield batch.to_pandas()
+        elif file_format == "feather":
+            import pyarrow  # pylint: disable=import-outside-toplevel
+            # feather files are arrow ipc files: map the file and only convert one
+            # record batch at a time, instead of loading the whole table
+            with pyarrow.memory_map(str(input_path)) as source:
+                reader = pyarrow.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    batch = reader.get_batch(i)
+                    for start in range(0, batch.num_rows, chunksize):
+                        yield batch.slice(start, chunksize).to_pandas()
+        elif file_format == "npy":
+            # the feature store is memory mapped, slicing does not copy the data
+            data = read_pandas(input_path)
+            for start in range(0, len(data), chunksize):
+                yield data.iloc[start:start + chunksize]
+        else:
+            with pd.read_csv(input_path, chunksize=chunksize, dtype=dtype) as reader:
+                yield from reader
+    except OSError as err_os:
+        logger.error("Fail to read data due to OSError. Error message: %s",
+                     err_os)
+        raise err_os
+
+
+def write_pandas(df_output: Optional[Union[pd.DataFrame, pd.Series]],
+                 output_path: str) -> None:
+    """Save pandas data frame to output path as csv, parquet, feather or feature
+    store. The format is detected from the file extension.
+
+    Args:
+        df_output (pd.DataFrame, pd.Series): Data to be saved.
+        output_path (str): Path to save the data.
+    """
+    file_format = get_file_format(output_path)
+    if file_format == "csv" or df_output is None:
+        write_pandas_to_csv(df_output, output_path)
+        return
+    if file_format == "npy":
+        write_feature_store(df_output, output_path)
+        return
+
+    logger.info("Saving output to %s", output_path)
+    if isinstance(df_output, pd.Series):
+        # parquet and feather need string column names, name it like `to_csv` does
+        df_output = df_output.to_frame(name="0" if df_output.name is None
+                                       else str(df_output.name))
+    try:
+        if file_format == "parquet":
+            df_output.to_parquet(output_path, index=False)
+        else:
+            df_output.reset_index(drop=True).to_feather(output_path)
+    except OSError as err_os:
+        logger.error("Fail to save data due to OSError. Error message: %s",
+                     err_os)
+        raise err_os
+    logger.info("Output saved to %s", output_path)
+
+
+def get_manifest_path(store_path: str) -> str:
+    """Get the path of the manifest of a feature store, e.g. `feature.json` for
+    `feature.npy`.
+
+    Args:
+        store_path (str): Path of the feature store.
+
+    Returns:
+        str: Path of the manifest.
+    """
+    return os.path.splitext(str(store_path))[0] + ".json"
+
+
+def write_feature_store(feature: pd.DataFrame,
+                        output_path: str,
+                        car_ids: Optional[Sequence] = None,
+                        dtype: Any = np.float32) -> None:
+    """Save a feature matrix as a feature store: a contiguous `.npy` array, plus
+    a json manifest holding the column names, the data type of the array and the
+    car id of every row.
+
+    Args:
+        feature (pd.DataFrame): Features. All columns must be numeric.
+        output_path (str): Path to save the array. Should end with `.npy`.
+        car_ids (Sequence): Car id of every row. Optional.
+        dtype (Any): Data type of the saved array. Defaults to float32, which
+            halves the size of the store compared to the float64 features. None
+            keeps the data type of the features.
+    """
+    if car_ids is not None and len(car_ids) != len(feature):
+        raise ValueError(f"Got {len(car_ids)} car ids for {len(feature)} rows.")
+
+    logger.info("Saving feature store to %s", output_path)
+    array = np.ascontiguousarray(feature.to_numpy(dtype=dtype))
+    manifest = {
+        "columns": [str(col) for col in feature.columns],
+        "car_ids": None if car_ids is None else [str(car_id) for car_id in car_ids],
+        "dtype": array.dtype.str,
+        "shape": list(array.shape),
+    }
+    try:
+        np.save(output_path, array)
+        with open(get_manifest_path(output_path), "w", encoding="utf-8") as file:
+            json.dump(manifest, file)
+    except OSError as err_os:
+        logger.error("Fail to save data due to OSError. Error message: %s",
+                     err_os)
+        raise err_os
+    logger.info("Feature store saved to %s", output_path)
+
+
+def read_feature_store(input_path: str,
+                       mmap: bool = True) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Open a feature store saved by `write_feature_store`. By default the array
+    is memory mapped read-only, so processes opening the same store share its
+    pages instead of each holding a copy.
+
+    Args:
+        input_path (str): Path of the `.npy` array.
+        mmap (bool): If true, memory map the array instead of reading it.
+
+    Returns:
+        np.ndarray: The feature matrix.
+        Dict[str, Any]: The manifest, with `columns`, `car_ids`, `dtype` and `shape`.
+    """
+    logger.info("Opening feature store %s", input_path)
+    try:
+        array = np.load(input_path, mmap_mode="r" if mmap else None)
+        with open(get_manifest_path(input_path), "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    except OSError as err_os:
+        logger.error("Fail to read data due to OSError. Error message: %s",
+                     err_os)
+        raise err_os
+
+    if list(array.shape) != manifest["shape"] or array.dtype.str != manifest["dtype"]:
+        raise ValueError(f"Feature store {input_path} does not match its manifest.")
+    return array, manifest
+
+
 def write_pandas_to_csv(df_output: Optional[Union[pd.DataFrame,
                                                   pd.Series]],
                         output_path: str) -> None:
@@ -124,3 +328,47 @@ def load_model(input_dir: str) -> sklearn.base.BaseEstimator:
     else:
         logger.error("Input path is None. Model not loaded")
         sys.exit(1)
+
+
+def get_model_metadata_path(model_path: str) -> str:
+    """Get the path of the metadata of a saved model, e.g. `models/kmeans_50.json`
+    for `models/kmeans_50`.
+
+    Args:
+        model_path (str): Where the model is saved.
+
+    Returns:
+        str: Path of the metadata.
+    """
+    return str(model_path) + ".json"
+
+
+def save_model_metadata(metadata: Dict[str, Any], model_path: str) -> None:
+    """Save information about a trained model (e.g. fit time) next to it.
+
+    Args:
+        metadata (Dict[str, Any]): Json serializable information about the model.
+        model_path (str): Where the model is saved.
+    """
+    metadata_path = get_model_metadata_path(model_path)
+    with open(metadata_path, "w", encoding="utf-8") as file:
+        json.dump(metadata, file, indent=2)
+    logger.info("Model metadata saved to %s", metadata_path)
+
+
+def load_model_metadata(model_path: str) -> Optional[Dict[str, Any]]:
+    """Load the information saved next to a trained model.
+
+    Args:
+        model_path (str): Where the model is saved.
+
+    Returns:
+        Optional[Dict[str, Any]]: The metadata. None if there is none.
+    """
+    metadata_path = get_model_metadata_path(model_path)
+    try:
+        with open(metadata_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        logger.warning("No model metadata found at %s", metadata_path)
+        return None
@@ -0,0 +1,63 @@
+import importlib
+import os
+
+import pandas as pd
+import pytest
+
+from src.database.add_cars import CarManager
+from src.database.create_db import create_db
+
+app_cars = pd.DataFrame({
+    'car_id': [str(car_id) for car_id in range(8)],
+    'maker': ['Audi', 'Audi', 'BMW', 'BMW', 'Ford', 'Ford', 'Kia', 'Kia'],
+    'genmodel': ['A3', 'A4', '3 Series', 'X5', 'Focus', 'Fiesta', 'Rio', 'Sorento'],
+    'year': [2018, 2019, 2017, 2020, 2016, 2018, 2019, 2020],
+    'bodytype': ['Hatchback', 'Saloon', 'Saloon', 'SUV', 'Hatchback', 'Hatchback',
+                 'Hatchback', 'SUV'],
+    'genmodel_id': ['A3_id', 'A4_id', '3_id', 'X5_id', 'Focus_id', 'Fiesta_id', 'Rio_id',
+                    'Sorento_id'],
+    'engin_size': [1.6, 2.0, 2.0, 3.0, 1.0, 1.2, 1.2, 2.2],
+    'gearbox': ['Manual', 'Automatic', 'Manual', 'Automatic', 'Manual', 'Manual', 'Manual',
+                'Automatic'],
+    'fuel_type': ['Petrol', 'Diesel', 'Diesel', 'Diesel', 'Petrol', 'Petrol', 'Petrol',
+                  'Diesel'],
+    'price': [15000.0, 21000.0, 18000.0, 40000.0, 8000.0, 9000.0, 11000.0, 30000.0],
+    'seat_num': [5.0, 5.0, 5.0, 7.0, 5.0, 5.0, 5.0, 7.0],
+    'door_num': [5.0, 4.0, 4.0, 5.0, 5.0, 3.0, 5.0, 5.0],
+    'cluster': [0, 1, 1, 2, 0, 0, 0, 2]})
+
+
+@pytest.fixture
+def app_car_manager(tmp_path):
+    """Car manager of a sqlite database holding the cars of `app_cars`."""
+    engine_string = f'sqlite:///{tmp_path / "app_cars.db"}'
+    create_db(engine_string)
+    app_cars.to_csv(tmp_path / 'app_cars.csv', index=False)
+    manager = CarManager(engine_string=engine_string)
+    manager.add_car_df(str(tmp_path / 'app_cars.csv'))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """The `app` module, serving the cars of `app_cars` from a sqlite database.
+    The module reads its configuration when it is imported, so it is imported
+    once the database is set up."""
+    tmp_path = tmp_path_factory.mktemp('app')
+    engine_string = f'sqlite:///{tmp_path / "cars.db"}'
+    create_db(engine_string)
+    app_cars.to_csv(tmp_path / 'cars.csv', index=False)
+    manager = CarManager(engine_string=engine_string)
+    manager.add_car_df(str(tmp_path / 'cars.csv'))
+    manager.close()
+
+    os.environ['SQLALCHEMY_DATABASE_URI'] = engine_string
+    return importlib.import_module('app')
+
+
+@pytest.fixture
+def client(app_module):
+    """Test client of the flask app."""
+    app_module.app.config['TESTING'] = True
+    return app_module.app.test_client()
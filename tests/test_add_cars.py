@@ -0,0 +1,133 @@
+import pandas as pd
+import pytest
+import sqlalchemy.exc
+
+from src.database.add_cars import CarManager
+from src.database.create_db import Cars, DataVersion, create_db
+
+cars_in = pd.DataFrame({
+    'car_id': [str(car_id) for car_id in range(6)],
+    'maker': ['Audi', 'Audi', 'BMW', 'BMW', 'Ford', 'Ford'],
+    'genmodel': ['A3', 'A4', '3 Series', 'X5', 'Focus', 'Fiesta'],
+    'year': [2018, 2019, 2017, 2020, 2016, 2018],
+    'bodytype': ['Hatchback', 'Saloon', 'Saloon', 'SUV', 'Hatchback', 'Hatchback'],
+    'genmodel_id': ['A3_id', 'A4_id', '3_id', 'X5_id', 'Focus_id', 'Fiesta_id'],
+    'engin_size': [1.6, 2.0, 2.0, 3.0, 1.0, 1.2],
+    'gearbox': ['Manual', 'Automatic', 'Manual', 'Automatic', 'Manual', 'Manual'],
+    'fuel_type': ['Petrol', 'Diesel', 'Diesel', 'Diesel', 'Petrol', 'Petrol'],
+    'price': [15000.0, 21000.0, 18000.0, 40000.0, 8000.0, 9000.0],
+    'seat_num': [5.0, 5.0, 5.0, 7.0, 5.0, 5.0],
+    'door_num': [5.0, 4.0, 4.0, 5.0, 5.0, 3.0],
+    'cluster': [0, 1, 1, 2, 0, 0]})
+
+
+@pytest.fixture
+def car_manager(tmp_path):
+    """Car manager of an empty sqlite database."""
+    engine_string = f'sqlite:///{tmp_path / "cars.db"}'
+    create_db(engine_string)
+    manager = CarManager(engine_string=engine_string)
+    yield manager
+    manager.close()
+
+
+def write_cars(cars: pd.DataFrame, path) -> str:
+    """Write cars to a csv and return its path."""
+    cars.to_csv(path, index=False)
+    return str(path)
+
+
+def count_cars(car_manager: CarManager) -> int:
+    """Count the rows of the cars table."""
+    return car_manager.session.query(Cars).count()
+
+
+def drop_data_version(car_manager: CarManager) -> None:
+    """Drop the data version table, so that recording a new version fails."""
+    DataVersion.__table__.drop(car_manager.session.get_bind())
+
+
+@pytest.mark.parametrize('chunksize', [1, 4, 6, 100])
+def test_add_car_df_chunked(car_manager, tmp_path, chunksize) -> None:
+    """
+    Test if `add_car_df` inserts every row whatever the chunk size.
+    """
+    n_rows = car_manager.add_car_df(write_cars(cars_in, tmp_path / 'cars.csv'),
+                                    chunksize=chunksize)
+
+    assert n_rows == len(cars_in)
+    assert count_cars(car_manager) == len(cars_in)
+    assert car_manager.get_data_version() is not None
+
+
+def test_add_car_df_rollback(car_manager, tmp_path) -> None:
+    """
+    Test if `add_car_df` inserts nothing when a later chunk fails.
+    """
+    cars_dup = pd.concat([cars_in, cars_in.iloc[[0]]])
+    n_rows = car_manager.add_car_df(write_cars(cars_dup, tmp_path / 'cars.csv'), chunksize=4)
+
+    assert n_rows == 0
+    assert count_cars(car_manager) == 0
+    assert car_manager.get_data_version() is None
+
+
+def test_add_car_df_version_failed(car_manager, tmp_path) -> None:
+    """
+    Test if `add_car_df` inserts nothing when the data version cannot be recorded.
+    """
+    drop_data_version(car_manager)
+    n_rows = car_manager.add_car_df(write_cars(cars_in, tmp_path / 'cars.csv'))
+
+    assert n_rows == 0
+    assert count_cars(car_manager) == 0
+
+
+def test_upsert_car_df_expected(car_manager, tmp_path) -> None:
+    """
+    Test if `upsert_car_df` inserts new, updates changed and deletes missing cars.
+    """
+    car_manager.add_car_df(write_cars(cars_in, tmp_path / 'cars.csv'), chunksize=4)
+    version = car_manager.get_data_version()
+
+    cars_new = cars_in.drop(index=0).copy()
+    cars_new.loc[1, 'cluster'] = 2
+    cars_new = pd.concat([cars_new, cars_in.iloc[[5]].assign(car_id='6')])
+    counts = car_manager.upsert_car_df(write_cars(cars_new, tmp_path / 'new.csv'),
+                                       chunksize=2, delete_missing=True)
+
+    assert counts == {'inserted': 1, 'updated': 1, 'unchanged': 4, 'deleted': 1}
+    assert count_cars(car_manager) == 6
+    assert car_manager.session.query(Cars.cluster).filter(Cars.car_id == '1').scalar() == 2
+    assert car_manager.get_data_version() != version
+
+
+def test_upsert_car_df_atomic(car_manager, tmp_path) -> None:
+    """
+    Test if `upsert_car_df` leaves the table and the data version as they were
+    when a later chunk fails.
+    """
+    car_manager.add_car_df(write_cars(cars_in.iloc[:2], tmp_path / 'cars.csv'))
+    version = car_manager.get_data_version()
+
+    # the new car 3 appears in the first and the third chunk
+    cars_new = pd.concat([cars_in, cars_in.iloc[[3]]])
+    with pytest.raises(sqlalchemy.exc.IntegrityError):
+        car_manager.upsert_car_df(write_cars(cars_new, tmp_path / 'new.csv'), chunksize=3)
+
+    assert count_cars(car_manager) == 2
+    assert car_manager.get_data_version() == version
+
+
+def test_upsert_car_df_version_failed(car_manager, tmp_path) -> None:
+    """
+    Test if `upsert_car_df` leaves the table as it was when the data version cannot
+    be recorded.
+    """
+    car_manager.add_car_df(write_cars(cars_in.iloc[:2], tmp_path / 'cars.csv'))
+    drop_data_version(car_manager)
+
+    with pytest.raises(sqlalchemy.exc.OperationalError):
+        car_manager.upsert_car_df(write_cars(cars_in, tmp_path / 'new.csv'), chunksize=3)
+
+    assert count_cars(car_manager) == 2
@@ -0,0 +1,275 @@
+import gzip
+import json
+import sqlite3
+
+import pytest
+from sklearn.cluster import KMeans
+
+from src.flaskapp.assigner import ClusterAssigner
+from src.flaskapp.neighbors import FeatureNeighbors
+from src.modeling.featurize import featurize
+from src.utils import io
+from tests.conftest import app_cars
+
+feature_cols = ['engin_size', 'gearbox', 'seat_num', 'door_num']
+spec = {'engin_size': 2.0, 'gearbox': 'Manual', 'seat_num': 5, 'door_num': 4}
+
+
+@pytest.fixture
+def assigner(app_module, tmp_path, monkeypatch) -> ClusterAssigner:
+    """Cluster assigner of a model fitted on the cars of the app."""
+    feature = featurize(app_cars, feature_cols, True, True,
+                        transform_path=str(tmp_path / 'featurizer'))
+    io.save_model(KMeans(n_clusters=3, n_init=1, random_state=0).fit(feature),
+                  str(tmp_path / 'kmeans'))
+    cluster_assigner = ClusterAssigner(str(tmp_path / 'kmeans'), str(tmp_path / 'featurizer'))
+    monkeypatch.setattr(app_module, 'assigner', cluster_assigner)
+    return cluster_assigner
+
+
+@pytest.fixture
+def neighbors(app_module, tmp_path, monkeypatch) -> FeatureNeighbors:
+    """Nearest-neighbour search over the features of the cars of the app, but the
+    last one."""
+    cars = app_cars.iloc[:-1]
+    io.write_pandas(featurize(cars, feature_cols, True, True), str(tmp_path / 'feature.csv'))
+    io.write_pandas(cars, str(tmp_path / 'labels.csv'))
+    feature_neighbors = FeatureNeighbors(str(tmp_path / 'feature.csv'),
+                                         str(tmp_path / 'labels.csv'))
+    monkeypatch.setattr(app_module, 'neighbors', feature_neighbors)
+    return feature_neighbors
+
+
+def test_assign_expected(client, assigner) -> None:
+    """
+    Test if `/api/assign` assigns a spec, and a list of specs, to their cluster and
+    recommends its cars but those of the spec's model.
+    """
+    response = client.post('/api/assign', json=spec)
+    cluster = int(assigner.assign([spec])[0])
+    expected = app_cars[app_cars['cluster'] == cluster]
+
+    assert response.status_code == 200
+    # compact json, also in debug mode
+    assert '\n' not in response.get_data(as_text=True).strip()
+    assert response.json['cluster'] == cluster
+    assert [car['car_id'] for car in response.json['recommendations']] == \
+        expected.sort_values(['maker', 'genmodel', 'year'])['car_id'].tolist()
+
+    response = client.post('/api/assign', json=[spec, {**spec, 'model': 'A3'}])
+    assert response.status_code == 200
+    assert [result['cluster'] for result in response.json] == [cluster, cluster]
+    assert 'A3' not in [car['genmodel'] for car in response.json[1]['recommendations']]
+
+
+@pytest.mark.parametrize('payload', [
+    None,
+    [],
+    [spec, 'not a spec'],
+    {**spec, 'model': {'name': 'A3'}},
+    {**spec, 'gearbox': ['Manual']},
+    {**spec, 'engin_size': 'big'},
+    {'gearbox': 'Manual'},
+])
+def test_assign_not_valid(client, assigner, payload) -> None:
+    """
+    Test if `/api/assign` rejects specs that are missing, not dicts, or have fields
+    that are not scalars or not valid.
+    """
+    response = client.post('/api/assign', json=payload)
+
+    assert response.status_code == 400
+    assert 'error' in response.json
+
+
+def test_assign_unavailable(client, monkeypatch, app_module) -> None:
+    """
+    Test if `/api/assign` answers 503 without a clustering model.
+    """
+    monkeypatch.setattr(app_module, 'assigner', None)
+    assert client.post('/api/assign', json=spec).status_code == 503
+
+
+def test_batch_recommendations_expected(client) -> None:
+    """
+    Test if `/api/recommendations` recommends for every car, in order, and reports
+    the cars that are not in the database.
+    """
+    response = client.post('/api/recommendations', json=[
+        {'maker': 'Audi', 'model': 'A3', 'year': 2018, 'bodytype': 'Hatchback'},
+        ['Tesla', 'Model 3', 2020, 'Saloon'],
+        ['BMW', '3 Series', '2017', 'Saloon']])
+    results = response.json
+
+    assert response.status_code == 200
+    assert [result['model'] for result in results] == ['A3', 'Model 3', '3 Series']
+    assert results[0]['dream_car']['car_id'] == '0'
+    assert [car['car_id'] for car in results[0]['recommendations']] == ['5', '4', '6']
+    assert results[1]['dream_car'] is None
+    assert results[1]['recommendations'] == []
+    assert results[1]['error'] == 'No car found for Tesla Model 3 2020 Saloon.'
+    assert [car['car_id'] for car in results[2]['recommendations']] == ['1']
+    assert 'error' not in results[0] and 'error' not in results[2]
+
+
+def test_batch_recommendations_no_features(client, neighbors) -> None:
+    """
+    Test if `/api/recommendations` reports the cars without features in neighbours
+    mode, and still recommends for the other cars.
+    """
+    response = client.post('/api/recommendations', json=[
+        ['Kia', 'Sorento', 2020, 'SUV'],
+        ['Audi', 'A3', 2018, 'Hatchback']])
+    results = response.json
+
+    assert response.status_code == 200
+    assert results[0]['dream_car']['car_id'] == '7'
+    assert results[0]['recommendations'] == []
+    assert results[0]['error'] == 'Car 7 has no features.'
+    assert [car['car_id'] for car in results[1]['recommendations']] == \
+        neighbors.query('0', 100)
+
+
+@pytest.mark.parametrize('payload, status', [
+    ([['Audi', 'A3', 2018, 'Hatchback']] * 3, 413),
+    ([], 400),
+    ({'maker': 'Audi'}, 400),
+    ([['Audi', 'A3', 2018]], 400),
+    ([['Audi', 'A3', 'new', 'Hatchback']], 400),
+])
+def test_batch_recommendations_not_valid(client, app_module, monkeypatch, payload,
+                                         status) -> None:
+    """
+    Test if `/api/recommendations` rejects oversized batches and cars that are not valid.
+    """
+    monkeypatch.setitem(app_module.app.config, 'API_MAX_BATCH_SIZE', 2)
+    response = client.post('/api/recommendations', json=payload)
+
+    assert response.status_code == status
+    assert 'error' in response.json
+
+
+def test_recommend_cached(client) -> None:
+    """
+    Test if `GET /recommend` sends an ETag that clients must revalidate, and answers
+    304 to a matching `If-None-Match`.
+    """
+    query = {'maker': 'Audi', 'model': 'A3', 'year': '2018', 'bodytype': 'Hatchback'}
+    response = client.get('/recommend', query_string=query)
+
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, no-cache'
+    etag, _ = response.get_etag()
+    response = client.get('/recommend', query_string=query,
+                          headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize('query, status', [
+    ({'maker': 'Audi', 'model': 'A3', 'year': '2018'}, 400),
+    ({'maker': 'Audi', 'model': 'A3', 'year': 'new', 'bodytype': 'Hatchback'}, 400),
+    ({'maker': 'Audi', 'model': 'A3', 'year': '1990', 'bodytype': 'Hatchback'}, 404),
+])
+def test_recommend_error(client, query, status) -> None:
+    """
+    Test if `GET /recommend` sends error pages with an error status and without
+    caching headers.
+    """
+    response = client.get('/recommend', query_string=query)
+
+    assert response.status_code == status
+    assert 'ETag' not in response.headers
+    assert 'Cache-Control' not in response.headers
+
+
+@pytest.mark.parametrize('path, expected', [
+    ('/models/Audi', {'models': [{'id': 'A3', 'name': 'A3'}, {'id': 'A4', 'name': 'A4'}]}),
+    ('/models/Tesla', {'models': []}),
+    ('/years/Kia/Rio', {'years': [{'id': 2019, 'name': 2019}]}),
+    ('/bodytypes/BMW/X5/2020', {'bodytypes': [{'id': 'SUV', 'name': 'SUV'}]}),
+    ('/bodytypes/BMW/X5/new', {'bodytypes': []}),
+])
+def test_dropdowns_expected(client, path, expected) -> None:
+    """
+    Test if the dropdown lists are served from the catalog.
+    """
+    response = client.get(path)
+
+    assert response.status_code == 200
+    assert response.json == expected
+
+
+@pytest.mark.parametrize('path, lookup', [
+    ('/', 'makers'),
+    ('/models/Audi', 'models'),
+    ('/years/Audi/A3', 'years'),
+    ('/bodytypes/Audi/A3/2018', 'bodytypes'),
+])
+def test_database_error(client, app_module, monkeypatch, path, lookup) -> None:
+    """
+    Test if pages send the error page with status 500, without caching headers, when
+    the database is not available.
+    """
+    def fail(*args):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(app_module.catalog, lookup, fail)
+    response = client.get(path)
+
+    assert response.status_code == 500
+    assert 'ETag' not in response.headers
+
+
+def test_catalog_json_expected(client) -> None:
+    """
+    Test if `/catalog.json` sends the whole catalog tree, gzipped if accepted.
+    """
+    plain = client.get('/catalog.json')
+    compressed = client.get('/catalog.json', headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert plain.status_code == 200 and compressed.status_code == 200
+    assert 'Content-Encoding' not in plain.headers
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+    assert json.loads(gzip.decompress(compressed.get_data())) == plain.json
+    assert plain.json['Audi'] == {'A3': {'2018': ['Hatchback']}, 'A4': {'2019': ['Saloon']}}
+
+
+def test_catalog_json_not_modified(client) -> None:
+    """
+    Test if `/catalog.json` answers 304 to the ETag of the same encoding only.
+    """
+    plain_etag, _ = client.get('/catalog.json').get_etag()
+    gzip_etag, _ = client.get('/catalog.json', headers={'Accept-Encoding': 'gzip'}).get_etag()
+
+    assert plain_etag != gzip_etag
+    response = client.get('/catalog.json', headers={'Accept-Encoding': 'gzip',
+                                                    'If-None-Match': f'W/"{gzip_etag}"'})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    response = client.get('/catalog.json', headers={'Accept-Encoding': 'gzip',
+                                                    'If-None-Match': f'"{plain_etag}"'})
+    assert response.status_code == 200
+
+
+def test_warm_page_cache_expected(app_module, tmp_path, monkeypatch) -> None:
+    """
+    Test if `flask warm-page-cache` renders the pages of the most popular dream cars
+    only, and skips the cars that are not in the database.
+    """
+    keys_path = tmp_path / 'popular_keys.csv'
+    keys_path.write_text('maker,model,year,bodytype,count\n'
+                         'Audi,A3,2018,Hatchback,5\n'
+                         'Tesla,Model 3,2020,Saloon,9\n'
+                         'BMW,X5,2020,SUV,1\n')
+    page_cache = app_module.PageCache(local=app_module.MemoryCache())
+    monkeypatch.setattr(app_module, 'page_cache', page_cache)
+
+    result = app_module.app.test_cli_runner().invoke(
+        args=['warm-page-cache', '--keys', str(keys_path), '--top', '2'])
+
+    assert result.exit_code == 0
+    assert page_cache.stats()['entries'] == 1
+    with app_module.app.test_request_context():
+        version = app_module.get_recommendation_etag()
+    assert page_cache.get(version, ['Audi', 'A3', 2018, 'Hatchback']) is not None
@@ -0,0 +1,160 @@
+import asyncio
+import gzip
+import importlib
+import json
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def asgi_module(app_module, monkeypatch):
+    """The `asgi` module, imported once the app is set up."""
+    module = importlib.import_module('asgi')
+    monkeypatch.setattr(module, 'pending', None)
+    return module
+
+
+def call(asgi_module, path, method='GET', query='', headers=None):
+    """Send a request to the ASGI app and collect its response.
+
+    Returns:
+        Tuple[int, Dict[str, str], bytes]: Status code, headers and body.
+    """
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'query_string': query.encode(),
+             'headers': [(name.encode(), value.encode())
+                         for name, value in (headers or {}).items()]}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi_module.app(scope, receive, send))
+    start, body = messages
+    return (start['status'],
+            {name.decode(): value.decode() for name, value in start['headers']},
+            body['body'])
+
+
+def test_dropdowns_expected(asgi_module) -> None:
+    """
+    Test if the dropdown lists are served like by the flask app.
+    """
+    status, headers, body = call(asgi_module, '/models/Audi')
+    assert status == 200
+    assert headers['content-type'] == 'application/json'
+    assert json.loads(body) == {'models': [{'id': 'A3', 'name': 'A3'},
+                                           {'id': 'A4', 'name': 'A4'}]}
+
+    assert json.loads(call(asgi_module, '/years/Audi/A3')[2]) == \
+        {'years': [{'id': 2018, 'name': 2018}]}
+    assert json.loads(call(asgi_module, '/bodytypes/Audi/A3/2018')[2]) == \
+        {'bodytypes': [{'id': 'Hatchback', 'name': 'Hatchback'}]}
+
+
+def test_lookups_off_event_loop(asgi_module, monkeypatch) -> None:
+    """
+    Test if index lookups, which may query the database, run in the thread pool.
+    """
+    threads = []
+    get = asgi_module.catalog.get
+
+    def record_thread():
+        threads.append(threading.current_thread().name)
+        return get()
+
+    monkeypatch.setattr(asgi_module.catalog, 'get', record_thread)
+    call(asgi_module, '/models/Audi')
+    call(asgi_module, '/catalog.json')
+
+    assert threads
+    assert all(name.startswith('asgi-db') for name in threads)
+
+
+def test_catalog_expected(asgi_module, client) -> None:
+    """
+    Test if `/catalog.json` is gzipped if accepted, with the ETag of the flask app,
+    and answered with 304 to a matching `If-None-Match`.
+    """
+    status, headers, body = call(asgi_module, '/catalog.json',
+                                 headers={'accept-encoding': 'gzip'})
+    flask_response = client.get('/catalog.json', headers={'Accept-Encoding': 'gzip'})
+
+    assert status == 200
+    assert headers['content-encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(body)) == json.loads(gzip.decompress(flask_response.data))
+    assert headers['etag'] == flask_response.headers['ETag']
+
+    status, headers, body = call(asgi_module, '/catalog.json',
+                                 headers={'accept-encoding': 'gzip',
+                                          'if-none-match': f'W/{headers["etag"]}'})
+    assert status == 304
+    assert body == b''
+    assert 'content-encoding' not in headers
+
+
+@pytest.mark.parametrize('accept_encoding, compressed', [
+    ('gzip', True),
+    ('deflate, gzip;q=0.5', True),
+    ('*', True),
+    ('gzip;q=0', False),
+    ('deflate', False),
+    ('', False),
+])
+def test_catalog_accept_encoding(asgi_module, client, accept_encoding, compressed) -> None:
+    """
+    Test if `/catalog.json` is gzipped only if `Accept-Encoding` allows it, with
+    quality values, like by the flask app.
+    """
+    _, headers, body = call(asgi_module, '/catalog.json',
+                            headers={'accept-encoding': accept_encoding})
+    flask_response = client.get('/catalog.json', headers={'Accept-Encoding': accept_encoding})
+
+    assert ('content-encoding' in headers) == compressed
+    assert ('Content-Encoding' in flask_response.headers) == compressed
+    flask_body = flask_response.get_data()
+    if compressed:
+        body, flask_body = gzip.decompress(body), gzip.decompress(flask_body)
+    assert json.loads(body) == json.loads(flask_body)
+
+
+def test_recommend_expected(asgi_module) -> None:
+    """
+    Test if `/api/recommend` recommends the cars of the dream car's cluster.
+    """
+    status, _, body = call(asgi_module, '/api/recommend',
+                           query='maker=Audi&model=A3&year=2018&bodytype=Hatchback')
+    result = json.loads(body)
+
+    assert status == 200
+    assert result['dream_car']['car_id'] == '0'
+    assert [car['car_id'] for car in result['recommendations']] == ['5', '4', '6']
+
+
+@pytest.mark.parametrize('path, method, query, status', [
+    ('/api/recommend', 'GET', 'maker=Audi&model=A3&year=2018', 400),
+    ('/api/recommend', 'GET', 'maker=Audi&model=A3&year=new&bodytype=Hatchback', 400),
+    ('/api/recommend', 'GET', 'maker=Audi&model=A3&year=1990&bodytype=Hatchback', 404),
+    ('/unknown', 'GET', '', 404),
+    ('/models/Audi', 'POST', '', 405),
+])
+def test_errors(asgi_module, path, method, query, status) -> None:
+    """
+    Test if requests that cannot be answered get a json error and their status.
+    """
+    response_status, _, body = call(asgi_module, path, method=method, query=query)
+
+    assert response_status == status
+    assert 'error' in json.loads(body)
+
+
+def test_too_many_requests(asgi_module, monkeypatch) -> None:
+    """
+    Test if requests beyond `ASYNC_MAX_PENDING` get a 503.
+    """
+    monkeypatch.setattr(asgi_module, 'pending', asyncio.Semaphore(0))
+    assert call(asgi_module, '/models/Audi')[0] == 503
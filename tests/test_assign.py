@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.datasets import make_blobs
+
+from src.modeling.assign import assign_clusters, get_fingerprint
+from src.modeling.evaluate import evaluate
+from src.modeling.label import label
+from src.modeling.train import train
+from src.utils import io
+
+feature_values, _ = make_blobs(n_samples=50, centers=3, n_features=3, random_state=0)
+feature_in = pd.DataFrame(feature_values, columns=['price', 'engin_size', 'door_num'])
+
+
+@pytest.fixture
+def model_path(tmp_path) -> str:
+    """Path of a KMeans model saved with the fingerprint of `feature_in`. Its
+    `labels_` are replaced by 99, to tell them apart from predicted clusters."""
+    model = KMeans(n_clusters=3, n_init=1, random_state=0).fit(feature_in)
+    model.labels_ = np.full(len(feature_in), 99)
+    path = str(tmp_path / 'kmeans')
+    io.save_model(model, path)
+    io.save_model_metadata({'fingerprint': get_fingerprint(feature_in)}, path)
+    return path
+
+
+def test_assign_clusters_reuse(model_path) -> None:
+    """
+    Test if `assign_clusters` reuses the assignment of the model on its training features.
+    """
+    model = io.load_model(model_path)
+    assert (assign_clusters(model, model_path, feature_in.copy()) == 99).all()
+
+
+@pytest.mark.parametrize('feature', [
+    feature_in.assign(price=feature_in['price'] + 1e-9),
+    feature_in.iloc[:-1],
+])
+def test_assign_clusters_mismatch(model_path, feature) -> None:
+    """
+    Test if `assign_clusters` predicts the clusters, chunk by chunk, of features that
+    differ from the training features by a value or a row.
+    """
+    model = io.load_model(model_path)
+    clusters = assign_clusters(model, model_path, feature, chunksize=7)
+
+    assert (clusters != 99).all()
+    np.testing.assert_array_equal(clusters, model.predict(feature))
+
+
+def test_assign_clusters_no_metadata(model_path, tmp_path) -> None:
+    """
+    Test if `assign_clusters` predicts the clusters of a model saved without a fingerprint.
+    """
+    model = io.load_model(model_path)
+    clusters = assign_clusters(model, str(tmp_path / 'other'), feature_in)
+
+    np.testing.assert_array_equal(clusters, model.predict(feature_in))
+
+
+@pytest.mark.parametrize('train_format, label_format, train_config', [
+    ('csv', 'npy', {'backend': 'kmeans'}),
+    ('npy', 'csv', {'backend': 'minibatch', 'chunksize': 20}),
+])
+def test_assign_clusters_other_dtype(tmp_path, train_format, label_format, train_config) -> None:
+    """
+    Test if a model trained on float64 csv features labels and evaluates a float32
+    feature store, and the other way around, like on the features it was trained on.
+    """
+    paths = {file_format: str(tmp_path / f'features.{file_format}') for file_format in ['csv', 'npy']}
+    feature_in.to_csv(paths['csv'], index=False)
+    io.write_feature_store(feature_in, paths['npy'])
+    pd.DataFrame({'car_id': range(len(feature_in))}).to_csv(tmp_path / 'clean.csv', index=False)
+    model_path = str(tmp_path / 'kmeans')
+
+    model = train(None, model_path, {'n_clusters': 3, 'n_init': 3, 'random_state': 0},
+                  feature_path=paths[train_format], **train_config)
+    labels = label(model_path, paths[label_format], str(tmp_path / 'clean.csv'), 'cluster')
+    results = evaluate(model_path, paths[label_format], ['inertia', 'cluster_size'])
+
+    expected = model.predict(io.read_pandas(paths[train_format]))
+    np.testing.assert_array_equal(labels['cluster'], expected)
+    assert results.loc[results['metric name'] == 'cluster_size_min', 'score'].iloc[0] == \
+        np.bincount(expected).min()
@@ -0,0 +1,77 @@
+import json
+import os
+
+import pytest
+
+from src.utils import cache
+
+step_config = {'config': {'method': 'exact'}, 'output_format': 'csv'}
+
+
+@pytest.fixture
+def input_path(tmp_path) -> str:
+    """Path of an input file of a step."""
+    path = tmp_path / 'input.csv'
+    path.write_text('car_id,price\n1,15000\n')
+    return str(path)
+
+
+def test_get_step_key_expected(tmp_path, input_path) -> None:
+    """
+    Test if the cache key changes with the step's config section and its inputs only.
+    """
+    cache_dir = str(tmp_path / 'cache')
+    key = cache.get_step_key('evaluate', {'input': input_path}, step_config, cache_dir)
+
+    assert cache.get_step_key('evaluate', {'input': input_path}, step_config, cache_dir) == key
+    assert cache.get_step_key('evaluate', {'input': input_path},
+                              {**step_config, 'config': {'method': 'sampled'}},
+                              cache_dir) != key
+    with open(input_path, 'a', encoding='utf-8') as file:
+        file.write('2,8000\n')
+    assert cache.get_step_key('evaluate', {'input': input_path}, step_config, cache_dir) != key
+
+
+def test_get_code_version_run_model() -> None:
+    """
+    Test if the code version covers run_model.py.
+    """
+    assert any(path.name == 'run_model.py' and path.is_file() for path in cache.CODE_PATHS)
+
+
+def test_hash_file_merge(tmp_path, input_path) -> None:
+    """
+    Test if `hash_file` keeps the hashes memoized by other runs.
+    """
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir()
+    memo_path = cache_dir / 'file_hashes.json'
+    memo_path.write_text(json.dumps({'/other/file.csv': [1, 2, 'abc']}))
+
+    digest = cache.hash_file(input_path, str(cache_dir))
+    memo = json.loads(memo_path.read_text())
+
+    assert memo['/other/file.csv'] == [1, 2, 'abc']
+    assert memo[os.path.abspath(input_path)][2] == digest
+    assert os.listdir(cache_dir) == ['file_hashes.json']
+
+
+def test_save_outputs_evict(tmp_path) -> None:
+    """
+    Test if `save_outputs` keeps the most recently used entries of a step only.
+    """
+    cache_dir = str(tmp_path / 'cache')
+    output_path = tmp_path / 'output.csv'
+    output_path.write_text('a\n1\n')
+    keys = [str(i) * 64 for i in range(4)]
+
+    for i, key in enumerate(keys[:3]):
+        cache.save_outputs('clean', key, {'output': str(output_path)}, cache_dir, max_entries=3)
+        os.utime(os.path.join(cache_dir, 'clean', key), (i, i))
+    # restoring the oldest entry makes it the most recent
+    assert cache.restore_outputs('clean', keys[0], {'output': str(output_path)}, cache_dir)
+    cache.save_outputs('clean', keys[3], {'output': str(output_path)}, cache_dir, max_entries=3)
+
+    assert sorted(os.listdir(os.path.join(cache_dir, 'clean'))) == \
+        sorted([keys[0], keys[2], keys[3]])
+    assert not cache.restore_outputs('clean', keys[1], {'output': str(output_path)}, cache_dir)
@@ -0,0 +1,114 @@
+import os
+import sqlite3
+
+import pytest
+
+from src.flaskapp import cache_backends
+from src.flaskapp.cache_backends import MemoryCache, SQLiteCache
+
+
+class Clock:
+    """Settable replacement of `time.monotonic` and `time.time`."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    """Clock of the cache backends."""
+    fake_clock = Clock()
+    monkeypatch.setattr(cache_backends.time, 'monotonic', fake_clock)
+    monkeypatch.setattr(cache_backends.time, 'time', fake_clock)
+    return fake_clock
+
+
+def test_memory_cache_ttl(clock) -> None:
+    """
+    Test if `MemoryCache` entries expire `ttl_seconds` after they were written.
+    """
+    cache = MemoryCache(max_entries=10, ttl_seconds=60)
+    cache.set('a', b'1')
+    clock.now += 59
+
+    assert cache.get('a') == b'1'
+    clock.now += 1
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_memory_cache_lru(clock) -> None:
+    """
+    Test if `MemoryCache` evicts the least recently used entries beyond `max_entries`.
+    """
+    cache = MemoryCache(max_entries=2, ttl_seconds=60)
+    cache.set('a', b'1')
+    cache.set('b', b'2')
+    cache.get('a')
+    cache.set('c', b'3')
+
+    assert cache.get('a') == b'1'
+    assert cache.get('b') is None
+    assert cache.get('c') == b'3'
+
+
+def test_sqlite_cache_expected(tmp_path, clock) -> None:
+    """
+    Test if `SQLiteCache` entries are shared by all caches opening the file, and
+    expire `ttl_seconds` after they were written.
+    """
+    cache = SQLiteCache(str(tmp_path / 'cache' / 'shared.db'), ttl_seconds=60)
+    cache.set('a', b'1')
+    cache.set('a', b'2')
+    other = SQLiteCache(str(tmp_path / 'cache' / 'shared.db'), ttl_seconds=60)
+
+    assert other.get('a') == b'2'
+    clock.now += 60
+    assert other.get('a') is None
+
+
+def test_sqlite_cache_evict(tmp_path, clock, monkeypatch) -> None:
+    """
+    Test if `SQLiteCache` deletes the expired, then the oldest entries beyond
+    `max_entries`, every `EVICT_EVERY` writes.
+    """
+    monkeypatch.setattr(cache_backends, 'EVICT_EVERY', 5)
+    cache = SQLiteCache(str(tmp_path / 'shared.db'), max_entries=3, ttl_seconds=60)
+    cache.set('expired', b'0')
+    clock.now += 30
+    for key in ['a', 'b', 'c']:
+        cache.set(key, b'1')
+        clock.now += 10
+    assert len(cache) == 4
+
+    cache.set('d', b'1')
+    assert len(cache) == 3
+    assert [key for key in ['expired', 'a', 'b', 'c', 'd'] if cache.get(key)] == ['b', 'c', 'd']
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_sqlite_cache_fork(tmp_path) -> None:
+    """
+    Test if a forked worker opens its own connection to the file of `SQLiteCache`.
+    """
+    cache = SQLiteCache(str(tmp_path / 'shared.db'))
+    cache.set('parent', b'1')
+    parent_connection = cache._connect()
+
+    pid = os.fork()
+    if pid == 0:
+        # child: exit code 0 if it used a new connection and saw the parent's entry
+        try:
+            is_new = cache._connect() is not parent_connection
+            cache.set('child', b'2')
+            os._exit(0 if is_new and cache.get('parent') == b'1' else 1)
+        except sqlite3.Error:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert cache._connect() is parent_connection
+    assert cache.get('child') == b'2'
@@ -0,0 +1,69 @@
+import gzip
+import json
+
+import pytest
+
+from src.flaskapp.catalog import Catalog
+from tests.conftest import app_cars
+
+
+@pytest.fixture
+def catalog(app_car_manager) -> Catalog:
+    """Catalog of the cars of `app_cars`."""
+    return Catalog(app_car_manager)
+
+
+def test_makers_expected(catalog) -> None:
+    """
+    Test if `makers` lists every maker once, sorted.
+    """
+    assert catalog.makers() == sorted(app_cars['maker'].unique())
+
+
+@pytest.mark.parametrize('maker, expected', [
+    ('Audi', ['A3', 'A4']),
+    ('Ford', ['Fiesta', 'Focus']),
+    ('Tesla', []),
+])
+def test_models_expected(catalog, maker, expected) -> None:
+    """
+    Test if `models` lists the sorted models of a maker, and nothing for unknown makers.
+    """
+    assert catalog.models(maker) == expected
+
+
+@pytest.mark.parametrize('maker, model, expected', [
+    ('BMW', 'X5', [2020]),
+    ('BMW', 'A3', []),
+    ('Tesla', 'Model 3', []),
+])
+def test_years_expected(catalog, maker, model, expected) -> None:
+    """
+    Test if `years` lists the years of a model, and nothing for unknown models.
+    """
+    assert catalog.years(maker, model) == expected
+
+
+@pytest.mark.parametrize('maker, model, year, expected', [
+    ('Audi', 'A3', '2018', ['Hatchback']),
+    ('Audi', 'A3', '2019', []),
+    ('Audi', 'A3', 'new', []),
+])
+def test_bodytypes_expected(catalog, maker, model, year, expected) -> None:
+    """
+    Test if `bodytypes` lists the body types of a model in a year, and nothing for
+    unknown cars or years that are not integers.
+    """
+    assert catalog.bodytypes(maker, model, year) == expected
+
+
+def test_to_json_expected(catalog) -> None:
+    """
+    Test if `to_json` serializes the whole tree, plain and gzipped.
+    """
+    tree = json.loads(catalog.to_json())
+
+    assert json.loads(gzip.decompress(catalog.to_json(compressed=True))) == tree
+    assert tree['Kia'] == {'Rio': {'2019': ['Hatchback']}, 'Sorento': {'2020': ['SUV']}}
+    assert sum(len(bodytypes) for models in tree.values() for years in models.values()
+               for bodytypes in years.values()) == len(app_cars)
@@ -1,7 +1,9 @@
 import pytest
 import pandas as pd
 
-from src.modeling.clean import aggregate_by_keys, transform_vars, method_to_func
+from src.modeling.clean import (aggregate_by_keys, transform_vars, method_to_func,
+                                clean, clean_chunked, mode_from_counts)
+from src.utils import io
 
 df_in = pd.DataFrame([['3.0L', '24995'],
                       ['3.0L', 10995],
@@ -168,3 +170,158 @@ def test_method_to_func_unexpected() -> None:
     Test if `method_to_func` return None when receiving unexpected input.
     """
     assert method_to_func('not_a_method') is None
+
+
+def test_clean_chunked_expected(tmp_path) -> None:
+    """
+    Test if `clean_chunked` gives the same output as `clean`.
+    """
+    df_raw = pd.DataFrame([['3.0L', '24995', 'Jaguar', 2018, 5.0, 4.0],
+                           ['3.0L', '10995', 'Jaguar', 2018, 2.0, 2.0],
+                           ['2.0L', 'unknown', 'Jaguar', 2018, 5.0, 4.0],
+                           ['1.0L', '5107', 'Kia', 2018, 5.0, 3.0],
+                           ['1.6L', '6995', 'Kia', 2018, 5.0, 5.0],
+                           ['2.0L', '23000', 'Ford', 2018, 7.0, 5.0],
+                           ['2.2L', '11999', 'Ford', 2018, 5.0, 5.0],
+                           ['1.6L', '1295', 'Ford', 2020, 5.0, 5.0],
+                           ['2.2L', '17990', 'Kia', 2018, 5.0, 3.0],
+                           ['2.0L', '2865', 'Jaguar', 2017, 5.0, 4.0]],
+                          columns=['Engin_size', 'Price', ' Maker', 'Adv_year',
+                                   'Seat_num', 'Door_num'])
+    raw_path = tmp_path / 'raw.csv'
+    df_raw.to_csv(raw_path, index=False)
+
+    config = {
+        'transformation': transformation,
+        'aggregation': {
+            'key_cols': ['maker', 'year'],
+            'key_path': str(tmp_path / 'keys.csv'),
+            'agg_cols_transforms': {
+                'engin_size': 'first',
+                'price': 'mean',
+                'seat_num': 'mode',
+                'door_num': 'mode'
+            }
+        },
+        'rename_map': {'adv_year': 'year'},
+        'new_index': 'newcol'
+    }
+
+    df_true = clean(data=pd.read_csv(raw_path), **config)
+    df_out = clean_chunked(input_path=str(raw_path), chunksize=3, **config)
+
+    # Test that the true and test are the same
+    pd.testing.assert_frame_equal(df_true, df_out)
+
+
+def test_clean_chunked_first_chunk_dropped(tmp_path) -> None:
+    """
+    Test if `clean_chunked` gives the same output as `clean` when every row of the
+    first chunk is dropped.
+    """
+    df_raw = pd.DataFrame([['3.0L', 'unknown', 'Jaguar', 2018, 4.0],
+                           ['2.0L', 'unknown', 'Jaguar', 2018, 4.0],
+                           ['2.0L', '23000', 'Ford', 2018, 5.0],
+                           ['2.2L', '11999', 'Ford', 2018, 3.0]],
+                          columns=['engin_size', 'price', 'maker', 'year', 'door_num'])
+    raw_path = tmp_path / 'raw.csv'
+    df_raw.to_csv(raw_path, index=False)
+    config = {'transformation': transformation,
+              'aggregation': dict(aggregation, key_path=str(tmp_path / 'keys.csv'),
+                                  agg_cols_transforms={'engin_size': 'first',
+                                                       'price': 'mean',
+                                                       'door_num': 'mode'}),
+              'rename_map': {},
+              'new_index': 'newcol'}
+
+    df_true = clean(data=pd.read_csv(raw_path), **config)
+    df_out = clean_chunked(input_path=str(raw_path), chunksize=2, **config)
+
+    pd.testing.assert_frame_equal(df_true, df_out)
+
+
+@pytest.mark.parametrize('has_chunks', [True, False])
+def test_clean_chunked_empty(tmp_path, monkeypatch, has_chunks) -> None:
+    """
+    Test if `clean_chunked` returns an empty data frame with the cleaned columns
+    when the raw data has no rows, whether or not the reader yields an empty chunk.
+    """
+    raw_path = tmp_path / 'raw.csv'
+    pd.DataFrame(columns=['engin_size', 'price', 'maker', 'year', 'door_num']).to_csv(
+        raw_path, index=False)
+    if not has_chunks:
+        monkeypatch.setattr(io, 'read_pandas_chunks', lambda *args, **kwargs: iter([]))
+
+    df_out = clean_chunked(input_path=str(raw_path),
+                           chunksize=2,
+                           transformation=transformation,
+                           aggregation=dict(aggregation, key_path=str(tmp_path / 'keys.csv')),
+                           rename_map={},
+                           new_index='newcol')
+
+    assert df_out.empty
+    assert list(df_out.columns) == ['newcol', 'maker', 'year', 'seat_num', 'door_num']
+
+
+def test_clean_chunked_unexpected(tmp_path) -> None:
+    """
+    Test if `clean_chunked` raises error when the raw data does not exist.
+    """
+    with pytest.raises(FileNotFoundError):
+        clean_chunked(input_path=str(tmp_path / 'not_a_file.csv'),
+                      chunksize=3,
+                      transformation=transformation,
+                      aggregation=aggregation,
+                      rename_map={},
+                      new_index='newcol')
+
+
+def test_mode_from_counts_expected() -> None:
+    """
+    Test if `mode_from_counts` picks the most frequent value and breaks ties
+    by taking the smallest value.
+    """
+    counts = df_in_2.groupby(['maker', 'door_num']).size()
+    s_true = df_in_2.groupby('maker')['door_num'].agg(lambda x: pd.Series.mode(x)[0])
+
+    s_out = mode_from_counts(counts, ['maker'], 'door_num')
+
+    pd.testing.assert_series_equal(s_true, s_out)
+
+
+def test_mode_from_counts_ties() -> None:
+    """
+    Test if `mode_from_counts` breaks ties between the most frequent values like
+    `pd.Series.mode(x)[0]`, for numbers and strings.
+    """
+    df_ties = pd.DataFrame({'maker': ['Kia', 'Kia', 'Kia', 'Kia', 'Ford', 'Ford', 'Ford', 'BMW'],
+                            'door_num': [5.0, 3.0, 3.0, 5.0, 4.0, 2.0, 5.0, 3.0],
+                            'gearbox': ['Manual', 'Automatic', 'Manual', 'Automatic',
+                                        'Manual', 'Manual', 'Automatic', 'Automatic']})
+
+    for col in ['door_num', 'gearbox']:
+        s_true = df_ties.groupby('maker')[col].agg(lambda x: pd.Series.mode(x)[0])
+        s_out = mode_from_counts(df_ties.groupby(['maker', col]).size(), ['maker'], col)
+        pd.testing.assert_series_equal(s_true, s_out)
+
+    assert s_out.to_dict() == {'BMW': 'Automatic', 'Ford': 'Manual', 'Kia': 'Automatic'}
+
+
+def test_aggregate_by_keys_mode_ties(tmp_path) -> None:
+    """
+    Test if `aggregate_by_keys` gives the same modes as aggregating every group with
+    `pd.Series.mode(x)[0]`, ties included.
+    """
+    df_ties = df_in_2.assign(door_num=[5.0, 4.0, 5.0, 4.0, 5.0, 3.0, 2.0, 2.0, 5.0, 4.0,
+                                       5.0, 5.0, 5.0, 5.0, 3.0, 3.0, 2.0, 5.0, 5.0, 3.0])
+    agg_mode = dict(aggregation, key_path=str(tmp_path / 'keys.csv'),
+                    agg_cols_transforms={'door_num': 'mode'})
+
+    df_true = (df_ties.groupby(['maker', 'year'])[['door_num']]
+               .agg(lambda x: pd.Series.mode(x)[0])
+               .reset_index()
+               .reset_index(drop=False)
+               .rename(columns={'index': 'newcol'}))
+    df_out = aggregate_by_keys(df_ties, agg_mode, 'newcol')
+
+    pd.testing.assert_frame_equal(df_true, df_out)
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+import pytest
+import sqlalchemy
+
+from src.database.create_db import Cars, create_db, create_indexes
+
+cars_indexes = {
+    'ix_cars_maker_genmodel_year_bodytype': ['maker', 'genmodel', 'year', 'bodytype'],
+    'ix_cars_cluster_maker_genmodel_year': ['cluster', 'maker', 'genmodel', 'year']}
+
+# root of the repository, where `run_db.py` is run from
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_indexes(engine_string: str) -> Dict[str, List[str]]:
+    """Get the columns of every index of the cars table, by index name."""
+    engine = sqlalchemy.create_engine(engine_string)
+    indexes = sqlalchemy.inspect(engine).get_indexes('cars')
+    engine.dispose()
+    return {index['name']: index['column_names'] for index in indexes}
+
+
+@pytest.fixture
+def old_db(tmp_path) -> str:
+    """Engine string of a database created before the cars table had indexes."""
+    engine_string = f'sqlite:///{tmp_path / "cars.db"}'
+    create_db(engine_string)
+    engine = sqlalchemy.create_engine(engine_string)
+    for index in Cars.__table__.indexes:
+        index.drop(engine)
+    engine.dispose()
+    return engine_string
+
+
+def test_create_db_indexes(tmp_path) -> None:
+    """
+    Test if `create_db` creates the composite indexes of the cars table.
+    """
+    engine_string = f'sqlite:///{tmp_path / "cars.db"}'
+    create_db(engine_string)
+
+    assert get_indexes(engine_string) == cars_indexes
+
+
+def test_create_indexes_expected(old_db) -> None:
+    """
+    Test if `create_indexes` adds the missing indexes, and can be run again.
+    """
+    assert get_indexes(old_db) == {}
+
+    create_indexes(old_db)
+    create_indexes(old_db)
+
+    assert get_indexes(old_db) == cars_indexes
+
+
+def test_run_db_create_indexes(old_db) -> None:
+    """
+    Test if `run_db.py create_indexes` adds the missing indexes.
+    """
+    subprocess.run([sys.executable, 'run_db.py', 'create_indexes', '--engine_string', old_db],
+                   cwd=root, check=True, capture_output=True)
+
+    assert get_indexes(old_db) == cars_indexes
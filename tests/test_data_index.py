@@ -0,0 +1,101 @@
+import pickle
+import sqlite3
+import threading
+
+from src.flaskapp.cache_backends import MemoryCache
+from src.flaskapp.data_index import DataIndex
+
+
+class FakeCarManager:
+    """Car manager with a settable data version."""
+
+    def __init__(self):
+        self.version = 'v1'
+
+    def get_data_version(self):
+        return self.version
+
+
+class CountingIndex(DataIndex):
+    """Index of the data version, counting how many times it was built."""
+
+    n_builds = 0
+
+    def build(self):
+        CountingIndex.n_builds += 1
+        return {'version': self.car_manager.get_data_version()}
+
+
+class FailingCache(MemoryCache):
+    """Shared cache whose storage is not available."""
+
+    def get(self, key):
+        raise sqlite3.OperationalError('database is locked')
+
+    def set(self, key, value):
+        raise sqlite3.OperationalError('database is locked')
+
+
+def test_data_index_store_expected() -> None:
+    """
+    Test if an index built by one worker is loaded from the shared store by another.
+    """
+    store = MemoryCache()
+    car_manager = FakeCarManager()
+    n_builds = CountingIndex.n_builds
+
+    assert CountingIndex(car_manager, store=store).get() == {'version': 'v1'}
+    assert CountingIndex(car_manager, store=store).get() == {'version': 'v1'}
+    assert CountingIndex.n_builds == n_builds + 1
+
+
+def test_data_index_store_error() -> None:
+    """
+    Test if the index is built from the database when the shared store fails or
+    holds a corrupt snapshot.
+    """
+    car_manager = FakeCarManager()
+    assert CountingIndex(car_manager, store=FailingCache()).get() == {'version': 'v1'}
+
+    store = MemoryCache()
+    store.set('index:CountingIndex:v1', b'not a pickle')
+    assert CountingIndex(car_manager, store=store).get() == {'version': 'v1'}
+    assert pickle.loads(store.get('index:CountingIndex:v1')) == {'version': 'v1'}
+
+
+class BlockingIndex(DataIndex):
+    """Index of the data version, whose builds wait for `release` once `blocked` is set."""
+
+    def __init__(self, car_manager):
+        super().__init__(car_manager, refresh_seconds=0)
+        self.blocked = False
+        self.building = threading.Event()
+        self.release = threading.Event()
+
+    def build(self):
+        if self.blocked:
+            self.building.set()
+            self.release.wait(10)
+        return {'version': self.car_manager.get_data_version()}
+
+
+def test_data_index_stale_read() -> None:
+    """
+    Test if `get` returns the current index without waiting while another thread
+    rebuilds it, and the new index once it is built.
+    """
+    car_manager = FakeCarManager()
+    index = BlockingIndex(car_manager)
+    assert index.get() == {'version': 'v1'}
+
+    car_manager.version = 'v2'
+    index.blocked = True
+    refresh = threading.Thread(target=index.get)
+    refresh.start()
+    assert index.building.wait(10)
+
+    assert index.get() == {'version': 'v1'}
+    index.release.set()
+    refresh.join(10)
+    assert index.get() == {'version': 'v2'}
+    assert index.version == 'v2'
@@ -0,0 +1,124 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.datasets import make_blobs
+from sklearn.metrics import calinski_harabasz_score, davies_bouldin_score, silhouette_score
+
+from src.modeling.evaluate import (CENTROID_METRICS, compute_metrics, compute_silhouette,
+                                   get_cluster_stats, silhouette_chunked, silhouette_sampled)
+
+feature, cluster_assignment = make_blobs(n_samples=600, centers=4, n_features=5,
+                                         cluster_std=2.0, random_state=0)
+# one cluster of a single row, which scores 0
+cluster_assignment[0] = 9
+expected = silhouette_score(feature, cluster_assignment)
+
+
+@pytest.mark.parametrize('working_memory', [0, 1, 256])
+def test_silhouette_chunked_expected(working_memory) -> None:
+    """
+    Test if `silhouette_chunked` matches `sklearn.metrics.silhouette_score` whatever
+    the block size.
+    """
+    assert silhouette_chunked(feature, cluster_assignment, working_memory) == \
+        pytest.approx(expected, abs=1e-10)
+
+
+def test_silhouette_sampled_expected() -> None:
+    """
+    Test if `silhouette_sampled` estimates `sklearn.metrics.silhouette_score` within a
+    confidence interval.
+    """
+    score, ci_low, ci_high = silhouette_sampled(feature, cluster_assignment, sample_size=300,
+                                                n_repeats=10, random_state=0)
+
+    assert ci_low < score < ci_high
+    assert score == pytest.approx(expected, abs=0.02)
+    assert ci_high - ci_low < 0.05
+
+
+def test_silhouette_sampled_whole_data() -> None:
+    """
+    Test if `silhouette_sampled` returns the exact score and no interval when the
+    sample is not smaller than the data.
+    """
+    score, ci_low, ci_high = silhouette_sampled(feature, cluster_assignment,
+                                                sample_size=len(feature))
+
+    assert score == pytest.approx(expected)
+    assert ci_low is None and ci_high is None
+
+
+def test_compute_silhouette_unknown() -> None:
+    """
+    Test if `compute_silhouette` rejects an unknown method.
+    """
+    assert compute_silhouette(feature, cluster_assignment) == (expected, None, None)
+    with pytest.raises(ValueError):
+        compute_silhouette(feature, cluster_assignment, method='fast')
+
+
+@pytest.fixture(scope='module')
+def kmeans() -> KMeans:
+    """KMeans model fitted on `feature`, with 5 clusters."""
+    return KMeans(n_clusters=5, n_init=3, random_state=0).fit(feature)
+
+
+def get_scores(results: pd.DataFrame) -> Dict[str, float]:
+    """Get the score of every metric of the evaluation results."""
+    return dict(zip(results['metric name'], results['score']))
+
+
+@pytest.mark.parametrize('use_centers', [False, True])
+def test_centroid_metrics_sklearn(kmeans, use_centers) -> None:
+    """
+    Test if the Davies-Bouldin and Calinski-Harabasz indexes match sklearn, from the
+    cluster means and from the centers of a converged model.
+    """
+    scores = get_scores(compute_metrics(
+        feature, kmeans.labels_, ['davies_bouldin', 'calinski_harabasz'],
+        centroids=kmeans.cluster_centers_ if use_centers else None))
+    # the centers of the model are the cluster means up to the convergence tolerance
+    rel = 1e-6 if use_centers else 1e-10
+
+    assert scores['davies_bouldin'] == \
+        pytest.approx(davies_bouldin_score(feature, kmeans.labels_), rel=rel)
+    assert scores['calinski_harabasz'] == \
+        pytest.approx(calinski_harabasz_score(feature, kmeans.labels_), rel=rel)
+
+
+def test_centroid_metrics_direct(kmeans) -> None:
+    """
+    Test if inertia, cluster sizes and dispersions match a direct computation from
+    the distances of every row to its center.
+    """
+    scores = get_scores(compute_metrics(feature, kmeans.labels_,
+                                        ['inertia', 'cluster_size', 'dispersion'],
+                                        centroids=kmeans.cluster_centers_))
+    sq_dists = ((feature - kmeans.cluster_centers_[kmeans.labels_]) ** 2).sum(axis=1)
+    sizes = np.bincount(kmeans.labels_)
+    rms = np.sqrt(np.bincount(kmeans.labels_, sq_dists) / sizes)
+
+    assert scores['inertia'] == pytest.approx(kmeans.inertia_, rel=1e-10)
+    assert scores['inertia'] == pytest.approx(sq_dists.sum(), rel=1e-10)
+    assert [scores['cluster_size_min'], scores['cluster_size_median'],
+            scores['cluster_size_max']] == [sizes.min(), np.median(sizes), sizes.max()]
+    assert [scores['dispersion_min'], scores['dispersion_mean'],
+            scores['dispersion_max']] == pytest.approx([rms.min(), rms.mean(), rms.max()])
+
+
+def test_get_cluster_stats_chunked(kmeans) -> None:
+    """
+    Test if the metrics do not depend on the number of rows processed at a time.
+    """
+    stats_whole = get_cluster_stats(feature, kmeans.labels_, kmeans.cluster_centers_)
+    stats_chunked = get_cluster_stats(feature, kmeans.labels_, kmeans.cluster_centers_,
+                                      chunksize=7)
+    means_chunked = get_cluster_stats(feature, kmeans.labels_, chunksize=7)
+
+    for metric in CENTROID_METRICS.values():
+        assert metric(stats_chunked) == pytest.approx(metric(stats_whole), rel=1e-10)
+    np.testing.assert_allclose(means_chunked.centroids, means_chunked.means)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from src.modeling.featurize import featurize
+from src.utils import io
+
+feature_cols = ['engin_size', 'gearbox', 'seat_num', 'door_num', 'fuel_type']
+numeric_cols = ['engin_size', 'seat_num', 'door_num']
+clean_in = pd.DataFrame({
+    'car_id': ['0', '1', '2', '3', '4', '5'],
+    'engin_size': [1.6, 2.0, 2.0, 3.0, 1.0, 1.2],
+    'gearbox': ['Manual', 'Automatic', 'Manual', 'Automatic', 'Manual', 'Manual'],
+    'seat_num': [5.0, 5.0, 5.0, 7.0, 5.0, 2.0],
+    'door_num': [5.0, 4.0, 4.0, 5.0, 5.0, 3.0],
+    'fuel_type': ['Petrol', 'Diesel', 'Hybrid', 'Diesel', 'Petrol', 'Petrol']})
+new_in = pd.DataFrame({
+    'engin_size': [1.4, 2.5],
+    'gearbox': ['Automatic', 'Manual'],
+    'seat_num': [5.0, 7.0],
+    'door_num': [3.0, 5.0],
+    'fuel_type': ['Hybrid', 'Electric']})
+
+
+def featurize_old(data: pd.DataFrame,
+                  cols: list,
+                  is_get_dummies: bool,
+                  is_standardize: bool) -> pd.DataFrame:
+    """Features as generated before the `Featurizer`: `pd.get_dummies`, lower case
+    column names, then `StandardScaler`."""
+    feature = data[cols]
+    if is_get_dummies:
+        feature = pd.get_dummies(data[cols]).astype(float)
+        feature.columns = [col.lower() for col in feature.columns]
+    if is_standardize:
+        feature = pd.DataFrame(StandardScaler().fit_transform(feature), columns=feature.columns)
+    return feature
+
+
+@pytest.mark.parametrize('cols, is_get_dummies, is_standardize', [
+    (feature_cols, True, True),
+    (feature_cols, True, False),
+    (numeric_cols, False, True),
+    (numeric_cols, False, False)])
+def test_featurize_expected(cols, is_get_dummies, is_standardize) -> None:
+    """
+    Test if `featurize` generates the same features as before the `Featurizer`.
+    """
+    feature = featurize(clean_in, cols, is_get_dummies, is_standardize)
+    expected = featurize_old(clean_in, cols, is_get_dummies, is_standardize)
+
+    pd.testing.assert_frame_equal(feature, expected, check_dtype=False)
+
+
+def test_featurizer_transform_new_cars(tmp_path) -> None:
+    """
+    Test if the saved `Featurizer` featurizes new cars like the training cars, and
+    `transform_records` like `transform`. Unseen categories get no dummy.
+    """
+    transform_path = str(tmp_path / 'featurizer')
+    featurize(clean_in, feature_cols, True, True, transform_path=transform_path)
+    featurizer = io.load_model(transform_path)
+    assert featurizer.columns == featurize_old(clean_in, feature_cols, True, False).columns.tolist()
+    both = featurize_old(pd.concat([clean_in, new_in.iloc[[0]]], ignore_index=True),
+                         feature_cols, is_get_dummies=True, is_standardize=False)
+    scaler = StandardScaler().fit(both.iloc[:len(clean_in)])
+    expected = scaler.transform(both.iloc[[len(clean_in)]])
+
+    feature = featurizer.transform(new_in)
+    np.testing.assert_allclose(feature.iloc[[0]].to_numpy(), expected)
+    assert feature.columns.tolist() == both.columns.tolist()
+    np.testing.assert_allclose(featurizer.transform_records(new_in.to_dict('records')),
+                               feature.to_numpy())
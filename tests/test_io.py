@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.io import (read_feature_store, read_pandas, read_pandas_chunks, write_feature_store,
+                          write_pandas)
+
+df_in = pd.DataFrame({
+    'car_id': [str(car_id) for car_id in range(7)],
+    'price': [15000.0, 21000.0, 18000.0, 40000.0, 8000.0, 9000.0, 12000.0],
+    'cluster': [0, 1, 1, 2, 0, 0, 2]})
+
+feature_in = pd.DataFrame({
+    'price': [-0.5, 1.25, 0.0, 2.5],
+    'engin_size': [0.1, -1.0, 0.3, 0.7],
+    'fuel_type_diesel': [0.0, 1.0, 1.0, 0.0]})
+
+
+@pytest.mark.parametrize('extension', ['.csv', '.parquet', '.feather'])
+def test_read_pandas_chunks_expected(tmp_path, extension) -> None:
+    """
+    Test if `read_pandas_chunks` reads every row in chunks of at most `chunksize` rows.
+    """
+    path = str(tmp_path / f'data{extension}')
+    write_pandas(df_in, path)
+    chunks = list(read_pandas_chunks(path, chunksize=3, dtype={'car_id': str}))
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df_in)
+
+
+@pytest.mark.parametrize('extension', ['.parquet', '.feather'])
+def test_write_pandas_series(tmp_path, extension) -> None:
+    """
+    Test if `write_pandas` saves named and unnamed series to parquet and feather.
+    """
+    path_named = str(tmp_path / f'named{extension}')
+    path_unnamed = str(tmp_path / f'unnamed{extension}')
+    write_pandas(df_in['cluster'], path_named)
+    write_pandas(pd.Series([0.5, 1.5]), path_unnamed)
+
+    assert read_pandas(path_named)['cluster'].tolist() == df_in['cluster'].tolist()
+    assert read_pandas(path_unnamed)['0'].tolist() == [0.5, 1.5]
+
+
+def test_feature_store_round_trip(tmp_path) -> None:
+    """
+    Test if a feature store reads back as a memory-mapped float32 array with its
+    columns and car ids.
+    """
+    path = str(tmp_path / 'feature.npy')
+    write_feature_store(feature_in, path, car_ids=[10, 11, 12, 13])
+    array, manifest = read_feature_store(path)
+
+    assert isinstance(array, np.memmap)
+    assert array.dtype == np.float32
+    assert manifest['dtype'] == array.dtype.str
+    assert manifest['columns'] == list(feature_in.columns)
+    assert manifest['car_ids'] == ['10', '11', '12', '13']
+    np.testing.assert_allclose(array, feature_in.to_numpy(), rtol=1e-6)
+
+
+def test_feature_store_read_pandas(tmp_path) -> None:
+    """
+    Test if `read_pandas` reads a feature store, kept as float64 if asked, to a data frame.
+    """
+    path = str(tmp_path / 'feature.npy')
+    write_feature_store(feature_in, path, dtype=None)
+
+    pd.testing.assert_frame_equal(read_pandas(path), feature_in)
+    pd.testing.assert_frame_equal(read_pandas(path, columns=['price']), feature_in[['price']])
+
+
+def test_feature_store_misaligned(tmp_path) -> None:
+    """
+    Test if `write_feature_store` rejects car ids not aligned with the rows.
+    """
+    with pytest.raises(ValueError):
+        write_feature_store(feature_in, str(tmp_path / 'feature.npy'), car_ids=[10, 11])
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from src.flaskapp.neighbors import FeatureNeighbors
+from src.utils import io
+
+# cars on a line: car 0 is at x = 0, car 1 at x = 1, ...
+labels = pd.DataFrame({
+    'car_id': ['0', '1', '2', '3', '4', '5', '6'],
+    'genmodel': ['A3', 'A4', 'A5', 'A3', 'X5', 'Rio', 'A6'],
+    'cluster': [0, 0, 0, 0, 1, 1, 0]})
+features = pd.DataFrame({
+    'x': [0.0, 1.0, 3.0, 0.5, 2.0, 10.0, -1.0],
+    'y': [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]})
+
+
+@pytest.fixture(params=['csv', 'npy'])
+def neighbors(request, tmp_path) -> FeatureNeighbors:
+    """Nearest-neighbour search over `features`, from a csv or a feature store."""
+    labels.to_csv(tmp_path / 'labels.csv', index=False)
+    feature_path = str(tmp_path / f'features.{request.param}')
+    if request.param == 'npy':
+        io.write_feature_store(features, feature_path, car_ids=labels['car_id'])
+    else:
+        features.to_csv(feature_path, index=False)
+    return FeatureNeighbors(feature_path, str(tmp_path / 'labels.csv'))
+
+
+@pytest.mark.parametrize('car_id, k, same_cluster, expected', [
+    # cars 1 and 6 are both at distance 1, the first row comes first
+    ('0', 3, True, ['1', '6', '2']),
+    ('0', 10, False, ['1', '6', '4', '2', '5']),
+    ('0', 2, False, ['1', '6']),
+    ('4', 3, True, ['5']),
+    ('4', 3, False, ['1', '2', '3']),
+    ('2', 1, True, ['1']),
+])
+def test_query_expected(neighbors, car_id, k, same_cluster, expected) -> None:
+    """
+    Test if `query` ranks the candidates by distance, and never returns cars of the
+    same model as the queried car.
+    """
+    assert neighbors.query(car_id, k, same_cluster) == expected
+
+
+def test_query_same_model_excluded(neighbors) -> None:
+    """
+    Test if cars of the same model are skipped even when they are the closest.
+    """
+    # car 0 is the closest to car 3, but both are A3
+    assert neighbors.query('3', 10, same_cluster=False) == ['1', '4', '6', '2', '5']
+
+
+def test_query_k_above_candidates(neighbors) -> None:
+    """
+    Test if `query` returns all candidates when `k` is above their number.
+    """
+    assert neighbors.query('5', 100) == ['4']
+    assert len(neighbors.query('5', 100, same_cluster=False)) == len(labels) - 1
+
+
+def test_query_unknown_car(neighbors) -> None:
+    """
+    Test if `query` raises a ValueError for a car without features.
+    """
+    with pytest.raises(ValueError):
+        neighbors.query('99', 3)
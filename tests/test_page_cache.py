@@ -0,0 +1,39 @@
+import sqlite3
+
+from src.flaskapp.cache_backends import MemoryCache
+from src.flaskapp.page_cache import PageCache
+
+
+class FailingCache(MemoryCache):
+    """Shared cache whose storage is not available."""
+
+    def get(self, key):
+        raise sqlite3.OperationalError('database is locked')
+
+    def set(self, key, value):
+        raise OSError(28, 'No space left on device')
+
+
+def test_page_cache_expected() -> None:
+    """
+    Test if pages are found in the shared cache by other workers, per version and key.
+    """
+    shared = MemoryCache()
+    page_cache = PageCache(local=MemoryCache(), shared=shared)
+    page_cache.set('v1', ['Audi', 'A3', 2018, 'Hatchback'], '<html>A3</html>')
+    other_worker = PageCache(local=MemoryCache(), shared=shared)
+
+    assert other_worker.get('v1', ['Audi', 'A3', 2018, 'Hatchback']) == '<html>A3</html>'
+    assert other_worker.get('v2', ['Audi', 'A3', 2018, 'Hatchback']) is None
+    assert other_worker.stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+
+
+def test_page_cache_shared_error() -> None:
+    """
+    Test if pages are still cached in memory when the shared cache fails.
+    """
+    page_cache = PageCache(local=MemoryCache(), shared=FailingCache())
+    page_cache.set('v1', ['Audi'], '<html></html>')
+
+    assert page_cache.get('v1', ['Audi']) == '<html></html>'
+    assert page_cache.get('v1', ['BMW']) is None
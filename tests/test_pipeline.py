@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.modeling.pipeline import CheckpointWriter, run_pipeline
+from src.utils import io
+
+rng = np.random.default_rng(0)
+n_rows = 60
+raw_in = pd.DataFrame({
+    'maker': rng.choice(['Audi', 'BMW', 'Ford'], n_rows),
+    'genmodel': rng.choice(['A', 'B'], n_rows),
+    'genmodel_id': 'id',
+    'adv_year': rng.choice([2017, 2018, 2019], n_rows),
+    'bodytype': rng.choice(['Saloon', 'SUV'], n_rows),
+    'engin_size': [f'{size:.1f}L' for size in rng.choice([1.0, 1.6, 2.0, 3.0], n_rows)],
+    'gearbox': rng.choice(['Manual', 'Automatic'], n_rows),
+    'fuel_type': rng.choice(['Petrol', 'Diesel'], n_rows),
+    'price': rng.integers(5000, 40000, n_rows).astype(str),
+    'seat_num': rng.choice([2.0, 5.0, 7.0], n_rows),
+    'door_num': rng.choice([3.0, 5.0], n_rows)})
+
+
+@pytest.mark.parametrize('checkpoints', ['sync', 'async', 'none'])
+def test_run_pipeline_expected(tmp_path, checkpoints) -> None:
+    """
+    Test if `run_pipeline` writes the model, labels and evaluation, and the
+    checkpoints unless they are disabled.
+    """
+    config = io.read_yml('config/config_modeling.yml')
+    config['clean']['aggregation']['key_path'] = str(tmp_path / 'keys.csv')
+    config['featurize']['transform_path'] = str(tmp_path / 'featurizer')
+    config['train']['model_config']['n_clusters'] = 3
+    config['label']['clean_data_path'] = str(tmp_path / 'clean.csv')
+    config['label']['feature_path'] = str(tmp_path / 'feature.npy')
+    input_path = str(tmp_path / 'raw.csv')
+    raw_in.to_csv(input_path, index=False)
+
+    df_timings = run_pipeline(input_path, config, str(tmp_path / 'kmeans'),
+                              str(tmp_path / 'labels.csv'), str(tmp_path / 'evaluation.csv'),
+                              checkpoints=checkpoints)
+
+    assert df_timings['stage'].tolist() == ['read', 'clean', 'featurize', 'train', 'label',
+                                            'evaluate', 'checkpoints']
+    labels = io.read_pandas(str(tmp_path / 'labels.csv'))
+    assert set(labels['cluster']) == {0, 1, 2}
+    assert io.read_pandas(str(tmp_path / 'evaluation.csv'))['metric name'].notna().all()
+    assert (tmp_path / 'clean.csv').exists() == (checkpoints != 'none')
+    assert (tmp_path / 'feature.npy').exists() == (checkpoints != 'none')
+    if checkpoints != 'none':
+        array, manifest = io.read_feature_store(str(tmp_path / 'feature.npy'))
+        assert manifest['car_ids'] == labels['car_id'].astype(str).tolist()
+        assert len(array) == len(labels)
+
+
+def test_checkpoint_writer_unknown() -> None:
+    """
+    Test if `CheckpointWriter` rejects an unknown mode.
+    """
+    with pytest.raises(ValueError):
+        CheckpointWriter('later')
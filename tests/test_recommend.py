@@ -0,0 +1,71 @@
+import pytest
+
+from src.flaskapp.recommend import RecommendationIndex, get_recommendation
+from tests.conftest import app_cars
+
+# (maker, model, year, body type) of every car of `app_cars`
+car_keys = list(app_cars[['maker', 'genmodel', 'year', 'bodytype']].itertuples(index=False,
+                                                                                name=None))
+
+
+@pytest.fixture
+def index(app_car_manager) -> RecommendationIndex:
+    """Recommendation index of the cars of `app_cars`, checking the data version on
+    every use."""
+    return RecommendationIndex(app_car_manager, refresh_seconds=0)
+
+
+def test_build_expected(index) -> None:
+    """
+    Test if the index maps every key and id to its car, and every cluster to its
+    cars sorted by maker, model and year.
+    """
+    tables = index.get()
+
+    assert {key: car.car_id for key, car in tables.by_key.items()} == \
+        dict(zip(car_keys, app_cars['car_id']))
+    assert sorted(tables.by_id) == sorted(app_cars['car_id'])
+    assert all(car.car_id == car_id for car_id, car in tables.by_id.items())
+    assert {cluster: [car.car_id for car in cars]
+            for cluster, cars in tables.by_cluster.items()} == \
+        {0: ['0', '5', '4', '6'], 1: ['1', '2'], 2: ['3', '7']}
+
+
+@pytest.mark.parametrize('key', car_keys)
+@pytest.mark.parametrize('max_rows', [1, 2, 10])
+def test_get_recommendation_index(app_car_manager, index, key, max_rows) -> None:
+    """
+    Test if recommending from the index gives the same cars as querying the database.
+    """
+    cars_sql, dream_car_sql = get_recommendation(app_car_manager, *key, max_rows=max_rows)
+    cars_index, dream_car_index = get_recommendation(app_car_manager, *key,
+                                                     max_rows=max_rows, index=index)
+
+    assert dream_car_index.car_id == dream_car_sql.car_id
+    assert [car.car_id for car in cars_index] == [car.car_id for car in cars_sql]
+
+
+def test_get_recommendation_index_not_found(app_car_manager, index) -> None:
+    """
+    Test if recommending for a car that is not in the index raises a ValueError.
+    """
+    with pytest.raises(ValueError):
+        get_recommendation(app_car_manager, 'Audi', 'A3', 1990, 'Hatchback',
+                           max_rows=5, index=index)
+
+
+def test_index_rebuilt_on_ingest(app_car_manager, index, tmp_path) -> None:
+    """
+    Test if the index is rebuilt after an ingest changes the data version.
+    """
+    assert index.get_car('Kia', 'Rio', 2019, 'Hatchback').cluster == 0
+    version = index.version
+
+    cars_new = app_cars.copy()
+    cars_new.loc[cars_new['genmodel'] == 'Rio', 'cluster'] = 1
+    cars_new.to_csv(tmp_path / 'new.csv', index=False)
+    app_car_manager.upsert_car_df(str(tmp_path / 'new.csv'))
+
+    assert index.get_car('Kia', 'Rio', 2019, 'Hatchback').cluster == 1
+    assert [car.car_id for car in index.get_cluster(1)] == ['1', '2', '6']
+    assert index.version == app_car_manager.get_data_version() != version
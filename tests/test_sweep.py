@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+from sklearn.datasets import make_blobs
+
+from src.modeling.evaluate import get_metric_names
+from src.modeling.sweep import sweep
+from src.utils import io
+
+feature_values, _ = make_blobs(n_samples=200, centers=3, n_features=4, random_state=0)
+feature_in = pd.DataFrame(feature_values, columns=['a', 'b', 'c', 'd'])
+
+
+def test_get_metric_names_expected() -> None:
+    """
+    Test if `get_metric_names` lists every score of metrics with several scores.
+    """
+    assert get_metric_names(['silhouette', 'inertia', 'cluster_size']) == \
+        ['silhouette', 'inertia', 'cluster_size_min', 'cluster_size_median',
+         'cluster_size_max']
+    with pytest.raises(ValueError):
+        get_metric_names(['accuracy'])
+
+
+def test_sweep_expected(tmp_path) -> None:
+    """
+    Test if `sweep` selects the best model by a score of a metric with several
+    scores, and keeps the inertia of the fit apart from the inertia metric.
+    """
+    feature_path = str(tmp_path / 'feature.csv')
+    model_path = str(tmp_path / 'kmeans_best')
+    io.write_pandas(feature_in, feature_path)
+
+    df_result = sweep(feature_path, model_path, {'start': 2, 'stop': 4},
+                      {'random_state': 0, 'n_init': 1}, ['inertia', 'cluster_size'],
+                      select_by='cluster_size_min', n_jobs=1)
+
+    assert df_result['n_clusters'].tolist() == [2, 3, 4]
+    assert {'model_inertia', 'inertia', 'cluster_size_min'} <= set(df_result.columns)
+    assert df_result['inertia'].to_numpy() == pytest.approx(df_result['model_inertia'].to_numpy())
+    best = df_result.loc[df_result['cluster_size_min'].idxmax(), 'n_clusters']
+    assert io.load_model(model_path).n_clusters == best
+
+
+def test_sweep_select_by_unknown(tmp_path) -> None:
+    """
+    Test if `sweep` rejects a `select_by` that is not a result column before fitting.
+    """
+    with pytest.raises(ValueError):
+        sweep(str(tmp_path / 'missing.csv'), str(tmp_path / 'kmeans_best'),
+              {'start': 2, 'stop': 4}, {}, ['cluster_size'], select_by='cluster_size')
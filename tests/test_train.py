@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.datasets import make_blobs
+
+from src.modeling.assign import get_fingerprint
+from src.modeling.train import train
+from src.utils import io
+
+feature_values, _ = make_blobs(n_samples=60, centers=3, n_features=3, random_state=0)
+feature_in = pd.DataFrame(feature_values, columns=['price', 'engin_size', 'door_num'])
+model_config = {'n_clusters': 3, 'random_state': 0, 'n_init': 3}
+
+
+@pytest.mark.parametrize('backend, model_class', [
+    ('kmeans', KMeans),
+    ('minibatch', MiniBatchKMeans),
+])
+def test_train_expected(tmp_path, backend, model_class) -> None:
+    """
+    Test if `train` fits the model of the backend on the features, and saves it with
+    its fit time, inertia and the fingerprint of the features.
+    """
+    model_path = str(tmp_path / 'model')
+    model = train(feature_in, model_path, model_config, backend=backend)
+    metadata = io.load_model_metadata(model_path)
+
+    assert isinstance(model, model_class)
+    assert isinstance(io.load_model(model_path), model_class)
+    assert metadata['backend'] == backend
+    assert metadata['model_config'] == model_config
+    assert metadata['fit_seconds'] > 0
+    assert metadata['inertia'] == pytest.approx(model.inertia_)
+    assert metadata['fingerprint'] == get_fingerprint(feature_in)
+
+
+@pytest.mark.parametrize('file_format', ['csv', 'npy'])
+def test_train_chunked(tmp_path, file_format) -> None:
+    """
+    Test if the `minibatch` backend fits the features chunk by chunk from disk, and
+    saves the inertia of the model on all features.
+    """
+    feature_path = str(tmp_path / f'features.{file_format}')
+    if file_format == 'npy':
+        io.write_feature_store(feature_in, feature_path)
+    else:
+        feature_in.to_csv(feature_path, index=False)
+    model_path = str(tmp_path / 'model')
+
+    model = train(None, model_path, model_config, backend='minibatch',
+                  feature_path=feature_path, chunksize=25, n_epochs=3)
+    metadata = io.load_model_metadata(model_path)
+
+    assert isinstance(model, MiniBatchKMeans)
+    # the last chunk has 10 rows
+    assert len(model.labels_) == 10
+    assert metadata['fingerprint'] is None
+    assert metadata['inertia'] == pytest.approx(-model.score(io.read_pandas(feature_path)),
+                                                rel=1e-5)
+    # every blob gets its own cluster
+    assert len(np.unique(model.predict(io.read_pandas(feature_path)))) == 3
+
+
+def test_train_from_path(tmp_path) -> None:
+    """
+    Test if `train` reads the features from `feature_path` when none are given.
+    """
+    feature_in.to_csv(tmp_path / 'features.csv', index=False)
+    model = train(None, str(tmp_path / 'model'), model_config,
+                  feature_path=str(tmp_path / 'features.csv'))
+    model_true = KMeans(**model_config).fit(feature_in)
+
+    np.testing.assert_allclose(model.cluster_centers_, model_true.cluster_centers_)
+
+
+@pytest.mark.parametrize('backend, chunksize', [
+    ('dbscan', None),
+    ('kmeans', 25),
+])
+def test_train_unexpected(tmp_path, backend, chunksize) -> None:
+    """
+    Test if `train` raises a ValueError for an unknown backend, or a chunk size with
+    the `kmeans` backend, before saving anything.
+    """
+    with pytest.raises(ValueError):
+        train(feature_in, str(tmp_path / 'model'), model_config, backend=backend,
+              chunksize=chunksize)
+
+    assert not list(tmp_path.iterdir())